@@ -1,8 +1,10 @@
+import json
 import os
 from flask import Flask
 from .extensions import db
+from . import admission, archive, assets, calc_state, fragments, http_cache, json_provider, mathrender, metrics, profiling, run_results, run_search, streaming, timeseries, versions
 
-def create_app():
+def create_app(test_config=None):
     app = Flask(__name__, instance_relative_config=True)
     
     # Configuration
@@ -11,6 +13,11 @@ def create_app():
         SQLALCHEMY_DATABASE_URI='sqlite:///' + os.path.join(app.instance_path, 'lab_manual.db'),
         SQLALCHEMY_TRACK_MODIFICATIONS=False,
     )
+    if test_config:
+        app.config.update(test_config)
+    # JSON columns are written through the app's JSON provider, like API responses.
+    engine_options = app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", {})
+    engine_options.setdefault("json_serializer", lambda obj: json.dumps(obj, default=app.json.default))
 
     # Ensure instance folder exists
     try:
@@ -19,13 +26,28 @@ def create_app():
         pass
 
     # Initialize Extensions
+    json_provider.init_app(app)
     db.init_app(app)
+    metrics.init_app(app)
+    profiling.init_app(app)
+    mathrender.init_app(app)
+    fragments.init_app(app)
+    http_cache.init_app(app)
+    assets.init_app(app)
+    streaming.init_app(app)
+    timeseries.init_app(app)
+    admission.init_app(app)
+    calc_state.init_app(app)
+    run_results.init_app(app)
+    run_search.init_app(app)
+    archive.init_app(app)
 
     # Register Blueprints
-    from .blueprints import main, admin, api
+    from .blueprints import main, admin, api, stream
     app.register_blueprint(main.bp)
     app.register_blueprint(admin.bp)
     app.register_blueprint(api.bp)
+    app.register_blueprint(stream.bp)
 
     @app.context_processor
     def inject_experiments():
@@ -38,5 +60,10 @@ def create_app():
     # Create DB Tables
     with app.app_context():
         db.create_all()
+        from .models import upgrade_schema
+        upgrade_schema()
+        run_search.install(db.engine)
+        versions.install(db.engine)
+        versions.backfill()
 
     return app
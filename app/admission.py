@@ -0,0 +1,189 @@
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from flask import current_app, g, has_request_context, request
+
+from app.profiling import profiler
+
+
+TRIAL_KEY_RE = re.compile(r"^trial_(\d+)_", re.IGNORECASE)
+
+_budget = threading.local()
+
+
+class AdmissionError(Exception):
+    status = 400
+
+
+class PayloadTooLarge(AdmissionError):
+    status = 413
+
+
+class ServerBusy(AdmissionError):
+    status = 429
+
+
+class BudgetExceeded(AdmissionError):
+    status = 503
+
+
+def read_json():
+    """Parse the request body as JSON, refusing bodies over CALC_MAX_PAYLOAD bytes before reading them."""
+    limit = current_app.config["CALC_MAX_PAYLOAD"]
+    if request.content_length is not None and request.content_length > limit:
+        raise PayloadTooLarge(f"Request body too large; the limit is {limit} bytes.")
+    body = request.stream.read(limit + 1)
+    if len(body) > limit:
+        raise PayloadTooLarge(f"Request body too large; the limit is {limit} bytes.")
+    if not body.strip():
+        return {}
+    try:
+        data = json.loads(body)
+    except ValueError:
+        raise AdmissionError("Request body is not valid JSON.")
+    if not isinstance(data, dict):
+        raise AdmissionError("Expected a JSON object.")
+    return data
+
+
+def count_trials(inputs):
+    if not isinstance(inputs, dict):
+        return 0
+    columns = inputs.get("columns")
+    if isinstance(columns, str):
+        try:
+            columns = json.loads(columns)
+        except ValueError:
+            columns = None
+    if isinstance(columns, dict):
+        return max((len(values) for values in columns.values() if isinstance(values, list)), default=0)
+    for key in ("observations", "runs"):
+        rows = inputs.get(key)
+        if isinstance(rows, str):
+            try:
+                rows = json.loads(rows)
+            except ValueError:
+                rows = None
+        if isinstance(rows, list):
+            return len(rows)
+    trials = {match.group(1) for match in map(TRIAL_KEY_RE.match, map(str, inputs)) if match}
+    return max(1, len(trials))
+
+
+def check_trials(inputs):
+    limit = current_app.config["CALC_MAX_TRIALS"]
+    count = count_trials(inputs)
+    if count > limit:
+        raise PayloadTooLarge(f"Too many trials ({count}); submit at most {limit} per request.")
+
+
+def check_sweep(sweep):
+    limit = current_app.config["SIM_MAX_POINTS"]
+    points = (sweep or {}).get("points") if isinstance(sweep, dict) else None
+    try:
+        points = int(points) if points is not None else 0
+    except (TypeError, ValueError):
+        return
+    if points > limit:
+        raise PayloadTooLarge(f"Too many sweep points ({points}); request at most {limit}.")
+
+
+def check_deadline():
+    """Stop a pooled calculation that has used up its budget; a no-op outside the pool.
+
+    Long loops (trials, formulas) call this between iterations, since Python
+    threads can't be interrupted from outside.
+    """
+    deadline = getattr(_budget, "deadline", None)
+    if deadline is not None and time.monotonic() > deadline:
+        raise BudgetExceeded("Calculation ran past its time budget and was stopped.")
+
+
+class ComputePool:
+    """Runs calculations on a few worker threads with a wall-clock budget per request.
+
+    At most ``workers + queue`` calculations are admitted at once; further
+    requests are refused immediately instead of queueing. When the budget runs
+    out the request gets an error straight away, and the calculation stops at
+    its next :func:`check_deadline` and frees its slot; one still queued at
+    that point never starts.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._slots = None
+        self.workers = 4
+        self.queue = 8
+
+    def configure(self, workers, queue):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            self._executor = None
+            self.workers = workers
+            self.queue = queue
+            self._slots = threading.BoundedSemaphore(workers + queue)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="calc")
+            return self._executor
+
+    def run(self, fn, *args, timeout=None):
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            raise ServerBusy("Server is busy with other calculations; try again shortly.")
+        app = current_app._get_current_object()
+        # Worker threads have no request context; stage() metrics read the endpoint from g instead.
+        endpoint = request.endpoint if has_request_context() else None
+        # An active request profile follows the calculation onto the worker thread.
+        capture = g.get("_profile_capture") if has_request_context() else None
+        deadline = time.monotonic() + timeout if timeout is not None else None
+
+        def task():
+            _budget.deadline = deadline
+            worker = profiler.follow(capture) if capture is not None else None
+            try:
+                check_deadline()
+                with app.app_context():
+                    g.request_endpoint = endpoint
+                    return fn(*args)
+            finally:
+                if worker is not None:
+                    profiler.unfollow(capture, worker)
+                _budget.deadline = None
+                slots.release()
+
+        try:
+            future = self._get_executor().submit(task)
+        except RuntimeError:
+            slots.release()
+            raise ServerBusy("Calculation workers are restarting; try again shortly.")
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            raise BudgetExceeded(f"Calculation took longer than {timeout:g} s and was abandoned.")
+
+
+pool = ComputePool()
+
+
+def run_limited(fn, *args):
+    return pool.run(fn, *args, timeout=current_app.config["CALC_TIMEOUT"])
+
+
+def init_app(app):
+    app.config.setdefault("CALC_MAX_PAYLOAD", 256 * 1024)
+    app.config.setdefault("CALC_MAX_TRIALS", 200)
+    app.config.setdefault("SIM_MAX_POINTS", 200)
+    app.config.setdefault("CALC_TIMEOUT", 5.0)
+    app.config.setdefault("CALC_WORKERS", 4)
+    app.config.setdefault("CALC_QUEUE", 8)
+    app.config.setdefault("SAVE_MAX_BATCH", 50)
+    pool.configure(app.config["CALC_WORKERS"], app.config["CALC_QUEUE"])
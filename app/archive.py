@@ -0,0 +1,175 @@
+"""Compressed, append-only archive files for old student runs.
+
+``flask archive-runs --before 2025-01-01`` moves older runs out of
+``student_run`` into files under ARCHIVE_DIR, one per experiment and semester
+(``<slug>-<year>-s1.lra`` for January-June, ``-s2`` for July-December)::
+
+    magic "LABARC\\x01" | dict_len u32 | zlib preset dictionary
+    frames: length u32 | crc32 u32 | zlib(JSON of one run)
+
+The preset dictionary is the JSON of the first run written to the file. Runs
+of one experiment share their keys and most of their layout, so even a
+single-run frame compresses well against it. ``archived_run`` keeps each run's
+id and student fields plus the file, offset and length of its frame, and
+:func:`load_run` reads a run from whichever table holds it.
+"""
+import json
+import os
+import struct
+import zlib
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from app.extensions import db
+from app.models import ArchivedRun, Experiment, StudentRun
+
+
+MAGIC = b"LABARC\x01"
+FILE_HEADER = struct.Struct("<7sI")
+FRAME_HEADER = struct.Struct("<II")
+MAX_DICT = 32 * 1024
+RECORD_FIELDS = (
+    "id", "experiment_id", "student_name", "usn", "inputs", "results", "experiment_version_id", "timeseries",
+    "idempotency_key",
+)
+
+
+class ArchiveError(ValueError):
+    pass
+
+
+def semester(date):
+    return f"{date.year}-s{1 if date.month <= 6 else 2}"
+
+
+def archive_name(slug, date):
+    return f"{slug}-{semester(date)}.lra"
+
+
+def archive_path(name):
+    folder = current_app.config["ARCHIVE_DIR"]
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, os.path.basename(name))
+
+
+def run_record(run):
+    record = {field: getattr(run, field) for field in RECORD_FIELDS}
+    record["date"] = run.date.isoformat() if run.date else None
+    return record
+
+
+def _encode(record):
+    return json.dumps(record, separators=(",", ":")).encode("utf-8")
+
+
+def _read_dict(fh):
+    raw = fh.read(FILE_HEADER.size)
+    if len(raw) < FILE_HEADER.size:
+        raise ArchiveError("Truncated archive header.")
+    magic, dict_len = FILE_HEADER.unpack(raw)
+    if magic != MAGIC:
+        raise ArchiveError("Not a run archive.")
+    return fh.read(dict_len)
+
+
+def append_records(path, records):
+    """Append one frame per record; returns ``(offset, length)`` for each."""
+    blobs = [_encode(record) for record in records]
+    if not os.path.exists(path):
+        zdict = blobs[0][-MAX_DICT:]
+        with open(path, "wb") as fh:
+            fh.write(FILE_HEADER.pack(MAGIC, len(zdict)) + zdict)
+    with open(path, "r+b") as fh:
+        zdict = _read_dict(fh)
+        offset = fh.seek(0, os.SEEK_END)
+        spans = []
+        for blob in blobs:
+            packer = zlib.compressobj(9, zdict=zdict)
+            frame = packer.compress(blob) + packer.flush()
+            fh.write(FRAME_HEADER.pack(len(frame), zlib.crc32(blob)) + frame)
+            spans.append((offset, FRAME_HEADER.size + len(frame)))
+            offset += FRAME_HEADER.size + len(frame)
+        fh.flush()
+        os.fsync(fh.fileno())
+    return spans
+
+
+def read_record(path, offset, length):
+    with open(path, "rb") as fh:
+        zdict = _read_dict(fh)
+        fh.seek(offset)
+        raw = fh.read(length)
+    if len(raw) != length:
+        raise ArchiveError("Truncated archive frame.")
+    frame_len, crc = FRAME_HEADER.unpack_from(raw)
+    blob = zlib.decompressobj(zdict=zdict).decompress(raw[FRAME_HEADER.size:FRAME_HEADER.size + frame_len])
+    if zlib.crc32(blob) != crc:
+        raise ArchiveError("Archive frame is corrupt.")
+    return json.loads(blob)
+
+
+def archive_runs(before, batch_size=500):
+    """Move runs dated before ``before`` into the archive; returns how many were moved.
+
+    ``student_run`` ids come from AUTOINCREMENT, so an archived id is never handed out again.
+    """
+    slugs = dict(db.session.query(Experiment.id, Experiment.slug).all())
+    moved = 0
+    while True:
+        runs = (StudentRun.query
+                .filter(StudentRun.date < before)
+                .order_by(StudentRun.id)
+                .limit(batch_size)
+                .all())
+        if not runs:
+            return moved
+        by_file = {}
+        for run in runs:
+            by_file.setdefault(archive_name(slugs[run.experiment_id], run.date), []).append(run)
+        # Frames are written first: if the commit fails they are just unreferenced bytes.
+        entries = []
+        for name, group in by_file.items():
+            spans = append_records(archive_path(name), [run_record(run) for run in group])
+            for run, (offset, length) in zip(group, spans):
+                entries.append(ArchivedRun(
+                    id=run.id, experiment_id=run.experiment_id, student_name=run.student_name,
+                    usn=run.usn, date=run.date, archive=name, offset=offset, length=length,
+                ))
+        # Deleted before the archive rows go in, so the run search index hands the id over.
+        StudentRun.query.filter(StudentRun.id.in_([run.id for run in runs])).delete(synchronize_session=False)
+        db.session.add_all(entries)
+        db.session.commit()
+        moved += len(runs)
+
+
+def load_run(run_id):
+    """A run as a record dict (see ``run_record``) plus ``experiment`` and ``archived``; None if unknown."""
+    run = db.session.get(StudentRun, run_id)
+    if run is not None:
+        return {**run_record(run), "experiment": run.experiment, "archived": False}
+    entry = db.session.get(ArchivedRun, run_id)
+    if entry is None:
+        return None
+    record = read_record(archive_path(entry.archive), entry.offset, entry.length)
+    return {**record, "experiment": db.session.get(Experiment, entry.experiment_id), "archived": True}
+
+
+@click.command("archive-runs")
+@click.option("--before", required=True, type=click.DateTime(formats=["%Y-%m-%d"]),
+              help="Archive runs dated before this day (YYYY-MM-DD).")
+@click.option("--vacuum", is_flag=True, help="VACUUM the database afterwards to return the space to the OS.")
+@with_appcontext
+def archive_runs_command(before, vacuum):
+    """Move old student runs into compressed archive files."""
+    moved = archive_runs(before)
+    click.echo(f"Archived {moved} run(s) into {current_app.config['ARCHIVE_DIR']}.")
+    if vacuum and moved:
+        with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.exec_driver_sql("VACUUM")
+
+
+def init_app(app):
+    app.config.setdefault("ARCHIVE_DIR", os.path.join(app.instance_path, "archive"))
+    app.cli.add_command(archive_runs_command)
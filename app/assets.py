@@ -0,0 +1,194 @@
+import base64
+import hashlib
+import json
+import os
+import re
+import shutil
+import urllib.request
+
+import click
+from flask import current_app, url_for
+from flask.cli import with_appcontext
+from markupsafe import Markup, escape
+
+
+FA_CDN = "https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0"
+
+# Only the files the templates actually load. MathJax is the single combined
+# TeX-input/SVG-output build; its menu and autoloaded extensions are turned
+# off in the page config so no further components are fetched.
+VENDOR_ASSETS = {
+    "bootstrap_css": {
+        "path": "vendor/bootstrap/bootstrap.min.css",
+        "cdn": "https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/css/bootstrap.min.css",
+        "preload": "style",
+    },
+    "bootstrap_js": {
+        "path": "vendor/bootstrap/bootstrap.bundle.min.js",
+        "cdn": "https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/js/bootstrap.bundle.min.js",
+        "preload": "script",
+    },
+    "fontawesome_css": {
+        "path": "vendor/fontawesome/css/all.min.css",
+        "cdn": f"{FA_CDN}/css/all.min.css",
+        "preload": "style",
+    },
+    "chartjs": {
+        "path": "vendor/chart.js/chart.umd.min.js",
+        "cdn": "https://cdn.jsdelivr.net/npm/chart.js@4.4.0/dist/chart.umd.min.js",
+        "preload": "script",
+    },
+    "mathjax": {
+        "path": "vendor/mathjax/tex-svg.js",
+        "cdn": "https://cdn.jsdelivr.net/npm/mathjax@3.2.2/es5/tex-svg.js",
+    },
+    # Referenced relatively from all.min.css, so they keep their names.
+    "fa_solid": {
+        "path": "vendor/fontawesome/webfonts/fa-solid-900.woff2",
+        "cdn": f"{FA_CDN}/webfonts/fa-solid-900.woff2",
+        "preload": "font",
+        "hashed": False,
+    },
+}
+for _font in ["fa-solid-900.ttf", "fa-regular-400.woff2", "fa-regular-400.ttf", "fa-brands-400.woff2",
+              "fa-brands-400.ttf", "fa-v4compatibility.woff2", "fa-v4compatibility.ttf"]:
+    VENDOR_ASSETS[_font] = {
+        "path": f"vendor/fontawesome/webfonts/{_font}",
+        "cdn": f"{FA_CDN}/webfonts/{_font}",
+        "hashed": False,
+    }
+
+HASHED_NAME_RE = re.compile(r"\.[0-9a-f]{8}(\.[a-z0-9]+)$")
+MANIFEST_PATH = "vendor/manifest.json"
+
+
+def _hashed_name(path, digest):
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.{digest[:8]}{ext}"
+
+
+def _write_hashed_copy(static_folder, path, hashed):
+    target = os.path.join(static_folder, hashed)
+    if os.path.exists(target):
+        return True
+    folder, name = os.path.split(os.path.join(static_folder, path))
+    stem, ext = os.path.splitext(name)
+    try:
+        for old in os.listdir(folder):
+            if old.startswith(stem + ".") and old != name and HASHED_NAME_RE.sub(r"\1", old) == name:
+                os.remove(os.path.join(folder, old))
+        shutil.copyfile(os.path.join(static_folder, path), target)
+    except OSError:
+        return False
+    return True
+
+
+def build_manifest(static_folder):
+    """Write hashed copies of the vendored files and their manifest; part of ``flask fetch-assets``."""
+    built = {}
+    for name, spec in VENDOR_ASSETS.items():
+        source = os.path.join(static_folder, spec["path"])
+        if not os.path.isfile(source):
+            continue
+        with open(source, "rb") as fh:
+            data = fh.read()
+        entry = {
+            "file": spec["path"],
+            "integrity": "sha384-" + base64.b64encode(hashlib.sha384(data).digest()).decode("ascii"),
+        }
+        if spec.get("hashed", True):
+            hashed = _hashed_name(spec["path"], hashlib.sha1(data).hexdigest())
+            if _write_hashed_copy(static_folder, spec["path"], hashed):
+                entry["file"] = hashed
+        built[name] = entry
+    path = os.path.join(static_folder, MANIFEST_PATH)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(built, fh, indent=2, sort_keys=True)
+    return load_manifest(static_folder)
+
+
+def load_manifest(static_folder):
+    """Read the built manifest without touching static/; anything not built locally comes from the CDN."""
+    built = {}
+    if static_folder:
+        try:
+            with open(os.path.join(static_folder, MANIFEST_PATH), encoding="utf-8") as fh:
+                built = json.load(fh)
+        except (OSError, ValueError):
+            pass
+    manifest = {}
+    for name, spec in VENDOR_ASSETS.items():
+        entry = {"preload": spec.get("preload"), "cdn": spec["cdn"]}
+        local = built.get(name)
+        if local and os.path.isfile(os.path.join(static_folder, local["file"])):
+            entry["file"] = local["file"]
+            entry["integrity"] = local["integrity"]
+        manifest[name] = entry
+    return manifest
+
+
+def asset(name):
+    entry = current_app.extensions["assets"][name]
+    if "file" not in entry:
+        return {"url": entry["cdn"], "integrity": None, "preload": entry["preload"], "local": False}
+    return {
+        "url": url_for("static", filename=entry["file"]),
+        "integrity": entry["integrity"],
+        "preload": entry["preload"],
+        "local": True,
+    }
+
+
+def _integrity_attrs(item):
+    attrs = ""
+    if item["integrity"]:
+        attrs += f' integrity="{item["integrity"]}"'
+    if not item["local"] or item["preload"] == "font":
+        attrs += ' crossorigin="anonymous"'
+    return attrs
+
+
+def asset_tag(name, **attrs):
+    item = asset(name)
+    extra = "".join(f' {key}' if value is True else f' {key}="{escape(value)}"' for key, value in attrs.items())
+    if item["url"].split("?")[0].endswith(".css"):
+        return Markup(f'<link rel="stylesheet" href="{escape(item["url"])}"{_integrity_attrs(item)}{extra}>')
+    return Markup(f'<script src="{escape(item["url"])}"{_integrity_attrs(item)}{extra}></script>')
+
+
+def asset_preloads():
+    tags = []
+    for name, entry in current_app.extensions["assets"].items():
+        if not entry["preload"]:
+            continue
+        item = asset(name)
+        kind = ' type="font/woff2"' if item["preload"] == "font" else ""
+        tags.append(f'<link rel="preload" href="{escape(item["url"])}" as="{item["preload"]}"{kind}{_integrity_attrs(item)}>')
+    return Markup("\n    ".join(tags))
+
+
+@click.command("fetch-assets")
+@click.option("--force", is_flag=True, help="Download even when the file already exists.")
+@with_appcontext
+def fetch_assets_command(force):
+    """Download the vendored front-end files into static/vendor and build their manifest."""
+    for spec in VENDOR_ASSETS.values():
+        target = os.path.join(current_app.static_folder, spec["path"])
+        if os.path.exists(target) and not force:
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        click.echo(f"Fetching {spec['cdn']}")
+        with urllib.request.urlopen(spec["cdn"], timeout=30) as resp, open(target, "wb") as fh:
+            shutil.copyfileobj(resp, fh)
+    current_app.extensions["assets"] = build_manifest(current_app.static_folder)
+    local = sum("file" in entry for entry in current_app.extensions["assets"].values())
+    click.echo(f"{local}/{len(VENDOR_ASSETS)} assets served locally.")
+
+
+def init_app(app):
+    app.extensions["assets"] = load_manifest(app.static_folder)
+    app.add_template_global(asset)
+    app.add_template_global(asset_tag)
+    app.add_template_global(asset_preloads)
+    app.cli.add_command(fetch_assets_command)
@@ -1,6 +1,13 @@
-from flask import Blueprint, render_template, request, flash, redirect, url_for
-from app.models import Experiment, StudentRun
+from flask import Blueprint, render_template, request, flash, redirect, url_for, current_app, make_response, send_file, abort, jsonify
+from app.models import ArchivedRun, Experiment, StudentRun
+from app.archive import ArchiveError, load_run
+from app.run_results import full_results
 from app.extensions import db
+from app import fragments
+from app.formulas import FormulaError, compile_formulas
+from app.metrics import registry
+from app.profiling import profiler, MAX_REQUESTS
+from app.run_search import MODES, search
 import json
 
 bp = Blueprint('admin', __name__, url_prefix='/admin')
@@ -11,7 +18,8 @@ def dashboard():
     # Simple stats
     stats = {
         'total_experiments': len(experiments),
-        'total_runs': StudentRun.query.count()
+        'total_runs': StudentRun.query.count(),
+        'archived_runs': ArchivedRun.query.count(),
     }
     return render_template('admin/dashboard.html', experiments=experiments, stats=stats)
 
@@ -27,13 +35,18 @@ def edit_experiment(id):
             
             # Update Content JSON
             json_content = request.form['content_json']
-            experiment.content = json.loads(json_content)
+            content = json.loads(json_content)
+            compile_formulas(content)
+            experiment.content = content
             
             db.session.commit()
+            fragments.invalidate(experiment.id)
             flash('Experiment updated successfully!', 'success')
             return redirect(url_for('admin.dashboard'))
         except json.JSONDecodeError:
             flash('Invalid JSON format in content field.', 'danger')
+        except FormulaError as e:
+            flash(f'Invalid formulas: {str(e)}', 'danger')
         except Exception as e:
             flash(f'Error updating experiment: {str(e)}', 'danger')
             
@@ -47,6 +60,7 @@ def new_experiment():
             slug = request.form['slug']
             json_content = request.form['content_json']
             content = json.loads(json_content)
+            compile_formulas(content)
             
             exp = Experiment(title=title, slug=slug, content=content)
             db.session.add(exp)
@@ -54,6 +68,8 @@ def new_experiment():
             
             flash('Experiment created successfully!', 'success')
             return redirect(url_for('admin.dashboard'))
+        except FormulaError as e:
+            flash(f'Invalid formulas: {str(e)}', 'danger')
         except Exception as e:
             flash(f'Error creating experiment: {str(e)}', 'danger')
             
@@ -65,7 +81,112 @@ def new_experiment():
         "procedure": ["Step 1"],
         "inputs": [],
         "constants": {},
+        "formulas": [],
         "viva": []
     }
     
     return render_template('admin/edit_experiment.html', experiment=None, default_json=json.dumps(default_content, indent=4))
+
+@bp.route('/runs/search')
+def search_runs():
+    query = request.args.get('q', '').strip()
+    mode = request.args.get('mode', 'prefix')
+    if mode not in MODES:
+        mode = 'prefix'
+    limit = request.args.get('limit', current_app.config['RUN_SEARCH_LIMIT'], type=int)
+    limit = max(1, min(limit, current_app.config['RUN_SEARCH_LIMIT']))
+    runs = search(query, mode, limit) if query else []
+    if request.args.get('format') == 'json':
+        return jsonify({"success": True, "query": query, "mode": mode, "runs": runs})
+    return render_template('admin/runs_search.html', query=query, mode=mode, runs=runs)
+
+def _load_run_or_404(run_id):
+    try:
+        run = load_run(run_id)
+    except (OSError, ArchiveError) as e:
+        abort(500, description=f'Could not read archived run {run_id}: {e}')
+    if run is None:
+        abort(404)
+    run['results'] = full_results(run)
+    return run
+
+@bp.route('/runs/<int:run_id>')
+def run_detail(run_id):
+    run = _load_run_or_404(run_id)
+    return render_template('admin/run_detail.html', run=run)
+
+@bp.route('/runs/<int:run_id>/export')
+def export_run(run_id):
+    run = _load_run_or_404(run_id)
+    record = {key: val for key, val in run.items() if key != 'experiment'}
+    record['experiment'] = run['experiment'].slug if run['experiment'] else None
+    response = jsonify(record)
+    response.headers['Content-Disposition'] = f'attachment; filename=run-{run_id}.json'
+    return response
+
+@bp.route('/metrics', methods=['GET', 'POST'])
+def metrics():
+    if request.method == 'POST':
+        action = request.form.get('action')
+        if action == 'enable':
+            current_app.config['METRICS_ENABLED'] = True
+            flash('Stage timing enabled.', 'success')
+        elif action == 'disable':
+            current_app.config['METRICS_ENABLED'] = False
+            flash('Stage timing disabled.', 'success')
+        elif action == 'reset':
+            registry.reset()
+            flash('Metrics cleared.', 'success')
+        return redirect(url_for('admin.metrics'))
+
+    return render_template(
+        'admin/metrics.html',
+        rows=registry.snapshot(),
+        enabled=current_app.config.get('METRICS_ENABLED', False),
+    )
+
+@bp.route('/metrics/prometheus')
+def metrics_prometheus():
+    response = make_response(registry.prometheus_text())
+    response.headers['Content-Type'] = 'text/plain; version=0.0.4; charset=utf-8'
+    return response
+
+@bp.route('/profiling', methods=['GET', 'POST'])
+def profiling():
+    rules = sorted({rule.rule for rule in current_app.url_map.iter_rules() if rule.endpoint != 'static'})
+
+    if request.method == 'POST':
+        if request.form.get('action') == 'cancel':
+            profiler.disarm()
+            flash('Profiling cancelled.', 'success')
+            return redirect(url_for('admin.profiling'))
+
+        rule = request.form.get('rule', '')
+        try:
+            count = int(request.form.get('count', 10))
+        except ValueError:
+            count = 0
+        if rule not in rules:
+            flash('Choose an endpoint to profile.', 'danger')
+        elif not 1 <= count <= MAX_REQUESTS:
+            flash(f'Request count must be between 1 and {MAX_REQUESTS}.', 'danger')
+        else:
+            profiler.arm(rule, count)
+            flash(f'Profiling the next {count} request(s) to {rule}.', 'success')
+        return redirect(url_for('admin.profiling'))
+
+    return render_template(
+        'admin/profiling.html',
+        rules=rules,
+        status=profiler.status(),
+        captures=profiler.captures(),
+        max_requests=MAX_REQUESTS,
+    )
+
+@bp.route('/profiling/<capture_id>.<fmt>')
+def profiling_download(capture_id, fmt):
+    path = profiler.capture_path(capture_id, fmt)
+    if not path:
+        abort(404)
+    return send_file(path, as_attachment=True, download_name=f'{capture_id}.{fmt}',
+                     mimetype='text/plain' if fmt == 'collapsed' else 'application/octet-stream')
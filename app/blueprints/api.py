@@ -1,12 +1,29 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from app.utils import (
     calculate_experiment,
     build_therm_conductivity_steps,
     build_natural_convection_steps,
+    build_formula_steps,
+    mean_heat_transfer,
+    simulate_formula_experiment,
+    simulate_natural_convection,
+    simulate_therm_conductivity,
+    quantize,
 )
 from app.models import Experiment, StudentRun
+from app.archive import ArchiveError, load_run
+from app.run_results import stored_results
+from app.versions import snapshot_id
+from sqlalchemy.exc import IntegrityError
 from app.extensions import db
+from app.metrics import stage
+from app.calc_state import StaleCalcState, remember, resolve
+from app.admission import AdmissionError, check_sweep, check_trials, read_json, run_limited
+from app.mathrender import prerender, prerender_steps
+from app.streaming import STREAM_ID_RE, BatchTooLarge, StreamError, hub, parse_batch
+from app.timeseries import TimeSeriesError, discard_run_series, open_run_series, save_run_series
 import numpy as np
+import re
 from datetime import datetime
 
 bp = Blueprint('api', __name__, url_prefix='/api')
@@ -15,17 +32,23 @@ bp = Blueprint('api', __name__, url_prefix='/api')
 def calculate():
     # ... (existing calculate code) ...
     try:
-        data = request.json or {}
+        data = read_json()
         slug = data.get('slug')
-        inputs = data.get('inputs')
+        state_key, inputs, trial_cache = resolve(slug, data)
+        check_trials(inputs)
 
-        calc_data = calculate_experiment(slug, inputs)
+        with stage("calc"):
+            calc_data = run_limited(calculate_experiment, slug, inputs, trial_cache)
         if "error" in calc_data:
             return jsonify({"success": False, "error": calc_data["error"]}), 404
+        calc_token = remember(state_key, inputs, trial_cache)
 
         if slug == 'therm-conductivity-metal-rod':
             res = calc_data["results"]
-            steps = build_therm_conductivity_steps(calc_data)
+            with stage("steps"):
+                steps = build_therm_conductivity_steps(calc_data)
+            with stage("math"):
+                steps, math_pending = prerender_steps(steps)
             trace_table = [
                 {"label": "Vdot", "value": calc_data["normalized"]["vdot_m3s"], "unit": "m^3/s"},
                 {"label": "m_dot", "value": calc_data["normalized"]["m_dot"], "unit": "kg/s"},
@@ -47,25 +70,34 @@ def calculate():
                 {"label": "K_avg", "value": calc_data["trace"]["k_avg"], "unit": "W/mK"},
             ]
 
-            return jsonify({
-                "success": True,
-                "slug": slug,
-                "k_avg": round(res['k_avg'], 3),
-                "steps": steps,
-                "warnings": calc_data.get("warnings", []),
-                "trace": calc_data.get("trace", {}),
-                "normalized": calc_data.get("normalized", {}),
-                "raw_inputs": calc_data.get("raw_inputs", {}),
-                "trace_table": trace_table,
-                "graphs": {
-                    "type": "therm_conductivity",
-                    "rod_temps": calc_data["normalized"]["t_rod"],
-                }
-            })
+            with stage("serialize"):
+                return jsonify({
+                    "success": True,
+                    "slug": slug,
+                    "calc_token": calc_token,
+                    "k_avg": round(res['k_avg'], 3),
+                    "steps": steps,
+                    "warnings": calc_data.get("warnings", []),
+                    "trace": calc_data.get("trace", {}),
+                    "normalized": calc_data.get("normalized", {}),
+                    "raw_inputs": calc_data.get("raw_inputs", {}),
+                    "trace_table": trace_table,
+                    "math_pending": math_pending,
+                    "graphs": {
+                        "type": "therm_conductivity",
+                        "rod_temps": calc_data["normalized"]["t_rod"],
+                    }
+                })
 
         if slug == "natural-convection-vertical-tube":
             res = calc_data["results"]
-            steps_by_trial = build_natural_convection_steps(calc_data)
+            with stage("steps"):
+                steps_by_trial = build_natural_convection_steps(calc_data)
+            with stage("math"):
+                steps_by_trial, math_pending = prerender_steps(steps_by_trial)
+                explanation_blocks, blocks_pending = prerender_steps(calc_data.get("explanation_blocks", []))
+                final_explanation, final_pending = prerender(calc_data.get("final_explanation", ""))
+                math_pending = math_pending or blocks_pending or final_pending
             trials = res.get("trials", [])
             trial_payload = []
             for item in trials:
@@ -91,151 +123,333 @@ def calculate():
                 }
                 for item in trials
             ]
-            valid_exp = [item.get("h_exp") for item in trials if item.get("h_exp")]
-            valid_theory = [item.get("h_theoretical") for item in trials if item.get("h_theoretical")]
-            mean_h_exp = sum(valid_exp) / len(valid_exp) if valid_exp else None
-            mean_h_theoretical = sum(valid_theory) / len(valid_theory) if valid_theory else None
-
-            return jsonify({
-                "success": True,
-                "slug": slug,
-                "steps": [],
-                "steps_by_trial": steps_by_trial if isinstance(steps_by_trial, list) else [],
-                "steps_html": steps_by_trial,
-                "warnings": calc_data.get("warnings", []),
-                "trace": calc_data.get("trace", {}),
-                "normalized": calc_data.get("normalized", {}),
-                "raw_inputs": calc_data.get("raw_inputs", {}),
-                "trace_table": [],
-                "trials": trial_payload,
-                "trial_results": trial_payload,
-                "final_results": {
-                    "trial_summary": trial_summary,
-                    "optional_overall": {
-                        "mean_h_exp": mean_h_exp,
-                        "mean_h_theoretical": mean_h_theoretical,
+
+            with stage("serialize"):
+                return jsonify({
+                    "success": True,
+                    "slug": slug,
+                    "calc_token": calc_token,
+                    "steps": [],
+                    "steps_by_trial": steps_by_trial if isinstance(steps_by_trial, list) else [],
+                    "steps_html": steps_by_trial,
+                    "warnings": calc_data.get("warnings", []),
+                    "trace": calc_data.get("trace", {}),
+                    "normalized": calc_data.get("normalized", {}),
+                    "raw_inputs": calc_data.get("raw_inputs", {}),
+                    "trace_table": [],
+                    "trials": trial_payload,
+                    "trial_results": trial_payload,
+                    "final_results": {
+                        "trial_summary": trial_summary,
+                        "optional_overall": mean_heat_transfer(trials),
+                    },
+                    "explanation_blocks": explanation_blocks,
+                    "final_explanation": str(final_explanation),
+                    "math_pending": math_pending,
+                    "graphs": {
+                        "type": "natural_convection",
+                        "temp_labels": ["T1", "T2", "T3", "T4", "T5", "T6"],
+                        "trials": [
+                            {
+                                "label": f"Trial {item.get('trial', idx + 1)}",
+                                "temps": item.get("temps", []),
+                                "h_exp": item.get("h_exp", 0.0),
+                                "h_theoretical": item.get("h_theoretical", 0.0),
+                            }
+                            for idx, item in enumerate(trials)
+                        ],
                     }
-                },
-                "explanation_blocks": calc_data.get("explanation_blocks", []),
-                "final_explanation": calc_data.get("final_explanation", ""),
-                "graphs": {
-                    "type": "natural_convection",
-                    "temp_labels": ["T1", "T2", "T3", "T4", "T5", "T6"],
-                    "trials": [
-                        {
-                            "label": f"Trial {item.get('trial', idx + 1)}",
-                            "temps": item.get("temps", []),
-                            "h_exp": item.get("h_exp", 0.0),
-                            "h_theoretical": item.get("h_theoretical", 0.0),
-                        }
-                        for idx, item in enumerate(trials)
-                    ],
-                }
-            })
+                })
+
+        if calc_data.get("formulas") is not None:
+            res = calc_data["results"]
+            formulas = calc_data["formulas"]
+            trace_table = []
+            if not calc_data.get("batch"):
+                trace_table = [
+                    {"label": spec["label"], "value": res.get(spec["name"]), "unit": spec["unit"] or "-"}
+                    for spec in formulas
+                ]
+            with stage("steps"):
+                steps = build_formula_steps(calc_data)
+            with stage("math"):
+                steps, math_pending = prerender_steps(steps)
 
+            with stage("serialize"):
+                return jsonify({
+                    "success": True,
+                    "slug": slug,
+                    "calc_token": calc_token,
+                    "steps": steps,
+                    "warnings": calc_data.get("warnings", []),
+                    "trace": calc_data.get("trace", {}),
+                    "normalized": calc_data.get("normalized", {}),
+                    "raw_inputs": calc_data.get("raw_inputs", {}),
+                    "results": res,
+                    "formulas": formulas,
+                    "trace_table": trace_table,
+                    "math_pending": math_pending,
+                    "graphs": {
+                        "type": "formula",
+                        "labels": [spec["label"] for spec in formulas],
+                        "values": [] if calc_data.get("batch") else [res.get(spec["name"]) for spec in formulas],
+                    }
+                })
+
+    except AdmissionError as e:
+        return jsonify({"success": False, "error": str(e)}), e.status
+    except StaleCalcState as e:
+        return jsonify({"success": False, "error": str(e), "stale": True}), 409
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 400
 
     return jsonify({"success": False, "error": "Unknown slug"}), 404
 
+STUDENT_FIELDS = ('student_name', 'usn', 'date', 'instructor', 'slug')
+IDEMPOTENCY_KEY_RE = re.compile(r'^[A-Za-z0-9_.:-]{1,64}$')
+
+
+def _run_failure(error, status=400):
+    return {"success": False, "error": error, "status": status}
+
+
+def _build_run(exp, slug, form_data, key, version_id):
+    student_name = form_data.get('student_name', 'Unknown')
+    usn = form_data.get('usn', 'N/A')
+    date_str = form_data.get('date')
+
+    run_date = datetime.utcnow()
+    if date_str:
+        try:
+            run_date = datetime.strptime(date_str, '%Y-%m-%d')
+        except:
+            pass
+
+    # Convert form data to inputs format expected by calc engine
+    inputs = {k: v for k, v in form_data.items() if k not in STUDENT_FIELDS}
+    with stage("calc"):
+        calc_res = run_limited(calculate_experiment, slug, inputs)
+    if "error" in calc_res:
+        return None, calc_res["error"]
+
+    return StudentRun(
+        experiment_id=exp.id,
+        student_name=student_name,
+        usn=usn,
+        date=run_date,
+        inputs=calc_res.get('raw_inputs', inputs),
+        results=stored_results(calc_res),
+        experiment_version_id=version_id,
+        idempotency_key=key,
+    ), None
+
+
+def _stored_runs(keys):
+    if not keys:
+        return {}
+    rows = db.session.query(StudentRun.idempotency_key, StudentRun.id).filter(StudentRun.idempotency_key.in_(keys))
+    return dict(rows.all())
+
+
+def _save_runs(items):
+    """Calculate and store runs in one transaction.
+
+    Returns one outcome per item. A run whose ``idempotency_key`` is already
+    stored (or repeated earlier in the batch) is not recalculated; its outcome
+    carries the stored id and ``"duplicate": True``.
+    """
+    outcomes = [None] * len(items)
+    for idx, item in enumerate(items):
+        if not isinstance(item, dict) or not isinstance(item.get('formData') or {}, dict):
+            outcomes[idx] = _run_failure("Each run must be an object with 'slug' and 'formData'.")
+            continue
+        key = item.get('idempotency_key')
+        if key is not None and not (isinstance(key, str) and IDEMPOTENCY_KEY_RE.match(key)):
+            outcomes[idx] = _run_failure("'idempotency_key' must be 1-64 letters, digits or '_.:-'.")
+            continue
+        check_trials(item.get('formData') or {})
+
+    live = [idx for idx in range(len(items)) if outcomes[idx] is None]
+    keys = {items[idx].get('idempotency_key') for idx in live} - {None}
+    with stage("query"):
+        slugs = {items[idx].get('slug') for idx in live}
+        experiments = {exp.slug: exp for exp in Experiment.query.filter(Experiment.slug.in_(slugs))}
+        stored = _stored_runs(keys)
+
+    pending = {}
+    first_with_key = {}
+    snapshots = {}
+    for idx in live:
+        item = items[idx]
+        key = item.get('idempotency_key')
+        if key in stored:
+            outcomes[idx] = {"success": True, "id": stored[key], "duplicate": True}
+            continue
+        if key is not None and key in first_with_key:
+            continue
+        exp = experiments.get(item.get('slug'))
+        if not exp:
+            outcomes[idx] = _run_failure("Experiment not found", 404)
+            continue
+        if exp.id not in snapshots:
+            snapshots[exp.id] = snapshot_id(exp)
+        run, error = _build_run(exp, exp.slug, item.get('formData') or {}, key, snapshots[exp.id])
+        if error:
+            outcomes[idx] = _run_failure(error)
+            continue
+        pending[idx] = run
+        if key is not None:
+            first_with_key[key] = idx
+
+    with stage("flush"):
+        for attempt in range(2):
+            db.session.add_all(pending.values())
+            try:
+                db.session.flush()
+                break
+            except IntegrityError:
+                # Another request stored one of these keys after we looked; report it as a duplicate.
+                db.session.rollback()
+                if attempt:
+                    raise
+                stored = _stored_runs({run.idempotency_key for run in pending.values()} - {None})
+                for idx, run in list(pending.items()):
+                    if run.idempotency_key in stored:
+                        outcomes[idx] = {"success": True, "id": stored[run.idempotency_key], "duplicate": True}
+                        del pending[idx]
+
+    # Keep the raw logger history for new runs whose page was connected to one. The flush gave
+    # them ids, so the files are written first and each run is committed once, with its file name.
+    written = []
+    try:
+        for idx, run in pending.items():
+            stream_id = items[idx].get('stream_id')
+            if stream_id and STREAM_ID_RE.match(str(stream_id)):
+                exported = hub.export(str(stream_id))
+                if exported is not None and exported[0].size:
+                    with stage("timeseries"):
+                        run.timeseries = save_run_series(run.id, *exported)
+                    written.append(run.timeseries)
+        with stage("commit"):
+            db.session.commit()
+    except Exception:
+        db.session.rollback()
+        for filename in written:
+            discard_run_series(filename)
+        raise
+
+    for idx, run in pending.items():
+        outcomes[idx] = {"success": True, "id": run.id, "timeseries": bool(run.timeseries)}
+    for idx in live:
+        if outcomes[idx] is None:
+            first = outcomes[first_with_key[items[idx]['idempotency_key']]]
+            outcomes[idx] = {**first, "duplicate": True} if first["success"] else first
+    return outcomes
+
+
 @bp.route('/save_run', methods=['POST'])
 def save_run():
     try:
-        data = request.json
-        slug = data.get('slug')
-        form_data = data.get('formData')
-        
-        # 1. Get Experiment
-        exp = Experiment.query.filter_by(slug=slug).first()
-        if not exp:
-            return jsonify({"success": False, "error": "Experiment not found"}), 404
-            
-        # 2. Extract specific student info
-        student_name = form_data.get('student_name', 'Unknown')
-        usn = form_data.get('usn', 'N/A')
-        date_str = form_data.get('date')
-        
-        run_date = datetime.utcnow()
-        if date_str:
-            try:
-                run_date = datetime.strptime(date_str, '%Y-%m-%d')
-            except:
-                pass
-
-        # 3. Calculate Results to store them
-        # Convert form data to inputs format expected by calc engine
-        inputs = {k: v for k, v in form_data.items() if k not in ['student_name', 'usn', 'date', 'instructor', 'slug']}
-        
-        # Re-map t1..t13 keys if needed (the calc engine expects 't1', 't2'...) which matches form names
-        # Just passing filtered dict is fine
-        
-        calc_res = calculate_experiment(slug, inputs)
-        if "error" in calc_res:
-            return jsonify({"success": False, "error": calc_res["error"]}), 400
-        
-        # 4. Save to DB
-        run = StudentRun(
-            experiment_id=exp.id,
-            student_name=student_name,
-            usn=usn,
-            date=run_date,
-            inputs=calc_res.get('raw_inputs', inputs),
-            results={
-                "results": calc_res.get("results", {}),
-                "normalized": calc_res.get("normalized", {}),
-                "warnings": calc_res.get("warnings", []),
-                "trace": calc_res.get("trace", {}),
-            }
-        )
-        
-        db.session.add(run)
-        db.session.commit()
-        
-        return jsonify({"success": True, "id": run.id})
+        data = read_json()
+        outcome = _save_runs([data])[0]
+        if not outcome.pop("success"):
+            return jsonify({"success": False, "error": outcome["error"]}), outcome["status"]
+        return jsonify({"success": True, **outcome})
 
+    except AdmissionError as e:
+        return jsonify({"success": False, "error": str(e)}), e.status
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+@bp.route('/save_runs', methods=['POST'])
+def save_runs():
+    try:
+        data = read_json()
+        runs = data.get('runs')
+        if not isinstance(runs, list) or not runs:
+            return jsonify({"success": False, "error": "'runs' must be a non-empty list."}), 400
+        limit = current_app.config["SAVE_MAX_BATCH"]
+        if len(runs) > limit:
+            return jsonify({"success": False, "error": f"Too many runs ({len(runs)}); send at most {limit} per batch."}), 413
+        return jsonify({"success": True, "results": _save_runs(runs)})
+
+    except AdmissionError as e:
+        return jsonify({"success": False, "error": str(e)}), e.status
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@bp.route('/runs/<int:run_id>/timeseries', methods=['POST'])
+def upload_run_timeseries(run_id):
+    run = db.session.get(StudentRun, run_id)
+    if run is None:
+        return jsonify({"success": False, "error": "Run not found"}), 404
+    try:
+        times, columns = parse_batch(request.get_json(silent=True), current_app.config["TIMESERIES_MAX_SAMPLES"])
+        with stage("timeseries"):
+            run.timeseries = save_run_series(run.id, times, columns)
+            db.session.commit()
+    except BatchTooLarge as e:
+        return jsonify({"success": False, "error": str(e)}), 413
+    except (StreamError, TimeSeriesError) as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    return jsonify({"success": True, "samples": int(times.size), "channels": list(columns)})
+
+@bp.route('/runs/<int:run_id>/timeseries', methods=['GET'])
+def run_timeseries(run_id):
+    try:
+        run = load_run(run_id)
+    except (OSError, ArchiveError) as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+    if run is None or not run["timeseries"]:
+        return jsonify({"success": False, "error": "No time series stored for this run"}), 404
+    start = request.args.get('start', type=float)
+    end = request.args.get('end', type=float)
+    max_points = request.args.get('max_points', default=2000, type=int)
+    channels = [name for name in request.args.get('channels', '').split(',') if name] or None
+    try:
+        with open_run_series(run["timeseries"]) as series:
+            times, values = series.window(start, end, channels, max_points=max(1, min(max_points, 100000)))
+    except FileNotFoundError:
+        return jsonify({"success": False, "error": "Time-series file is missing"}), 404
+    except TimeSeriesError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    return jsonify({
+        "success": True,
+        "t": times.tolist(),
+        "channels": {name: [None if np.isnan(v) else float(v) for v in column] for name, column in values.items()},
+    })
+
 @bp.route('/simulate', methods=['POST'])
 def simulate():
     # ... (existing simulate code) ...
-    data = request.json or {}
-    slug = data.get("slug", "therm-conductivity-metal-rod")
-
-    if slug == "natural-convection-vertical-tube":
-        q = float(data.get("q", 100))
-        delta_t = float(data.get("delta_t", 30))
-        d_tube = float(data.get("d_tube", 0.038))
-        l_tube = float(data.get("l_tube", 0.5))
-        area_s = np.pi * d_tube * l_tube if d_tube and l_tube else 0.0
-
-        q_min = max(10.0, q * 0.4)
-        q_max = max(q_min + 10.0, q * 1.6)
-        qs = np.linspace(q_min, q_max, 10)
-        hs = [val / (area_s * delta_t) if area_s and delta_t else 0.0 for val in qs]
-        return jsonify({
-            "q": qs.tolist(),
-            "h": hs,
-            "delta_t": delta_t,
-        })
-
-    flow = float(data.get('flow', 0.15))
-    watts = float(data.get('watts', 40))
-
-    k_copper = 385
-    d = 0.035
-    area = np.pi * d**2 / 4
-    length = 0.3
-
-    q_eff = watts * 0.9
-    gradient = q_eff / (k_copper * area) if area else 0.0
-    t_cold = 25 + (watts / (flow * 4180 / 60 * 10)) if flow else 25
-    t_hot = t_cold + gradient * length
-
-    x = np.linspace(0, length, 10)
-    temps = t_hot - gradient * x
+    try:
+        data = read_json()
+        slug = data.get("slug", "therm-conductivity-metal-rod")
 
-    return jsonify({
-        "x": x.tolist(),
-        "temps": temps.tolist()
-    })
+        if slug == "natural-convection-vertical-tube":
+            with stage("compute"):
+                result = run_limited(
+                    simulate_natural_convection,
+                    quantize(data.get("q", 100)),
+                    quantize(data.get("delta_t", 30)),
+                    quantize(data.get("d_tube", 0.038)),
+                    quantize(data.get("l_tube", 0.5)),
+                )
+            return jsonify(result)
+
+        if slug != "therm-conductivity-metal-rod":
+            check_sweep(data.get("sweep"))
+            with stage("compute"):
+                result = run_limited(simulate_formula_experiment, slug, data.get("inputs"), data.get("sweep"))
+            if "error" in result:
+                status = 404 if result["error"] == "Unknown slug" else 400
+                return jsonify({"success": False, "error": result["error"]}), status
+            return jsonify(result)
+
+        with stage("compute"):
+            result = run_limited(simulate_therm_conductivity, quantize(data.get('flow', 0.15)), quantize(data.get('watts', 40)))
+        return jsonify(result)
+    except AdmissionError as e:
+        return jsonify({"success": False, "error": str(e)}), e.status
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
@@ -1,47 +1,52 @@
 import os
 import sys
-from flask import Blueprint, render_template, request, make_response, flash
+from flask import Blueprint, render_template, request, make_response, flash, g
 from app.models import Experiment
+from app.metrics import stage
+from app.charts import report_charts
+from app.mathrender import active_renderer, pdf_renderer
+from app.http_cache import conditional_page, page_etag
 from app.utils import (
     calculate_experiment,
     build_therm_conductivity_steps,
     build_natural_convection_steps,
+    build_formula_steps,
 )
 
 bp = Blueprint('main', __name__)
 
+def nav_version():
+    # Every page lists the experiments in the sidebar.
+    rows = Experiment.query.with_entities(Experiment.id, Experiment.slug, Experiment.title).order_by(Experiment.id).all()
+    return [tuple(row) for row in rows]
+
 @bp.route('/')
 def index():
-    experiments = Experiment.query.all()
-    return render_template('index.html', experiments=experiments)
+    etag = page_etag("index", nav_version())
+    return conditional_page(etag, lambda: render_template('index.html', experiments=Experiment.query.all()))
 
 @bp.route('/experiment/<slug>')
 def experiment_view(slug):
     experiment = Experiment.query.filter_by(slug=slug).first_or_404()
-    return render_template('experiment.html', experiment=experiment)
-
-@bp.route('/experiment/<slug>/report', methods=['POST'])
-def generate_report(slug):
-    experiment = Experiment.query.filter_by(slug=slug).first_or_404()
-    
-    # Get form data
-    inputs = request.form.to_dict()
-    
-    # Perform Calc
-    calc_data = calculate_experiment(slug, inputs)
-    if "error" in calc_data:
-        flash(calc_data["error"])
-        return render_template('experiment.html', experiment=experiment)
+    etag = page_etag("experiment", experiment.cache_key, active_renderer(), nav_version())
+    return conditional_page(etag, lambda: render_template('experiment.html', experiment=experiment))
 
+def report_context(experiment, inputs, calc_data):
+    slug = experiment.slug
     steps = []
     steps_by_trial = []
-    if slug == "therm-conductivity-metal-rod":
-        steps = build_therm_conductivity_steps(calc_data)
-    elif slug == "natural-convection-vertical-tube":
-        steps_by_trial = build_natural_convection_steps(calc_data)
-    
+    with stage("steps"):
+        if slug == "therm-conductivity-metal-rod":
+            steps = build_therm_conductivity_steps(calc_data)
+        elif slug == "natural-convection-vertical-tube":
+            steps_by_trial = build_natural_convection_steps(calc_data)
+        elif calc_data.get("formulas") is not None:
+            steps = build_formula_steps(calc_data)
+    with stage("charts"):
+        charts = report_charts(slug, calc_data)
+
     # Context for template
-    context = {
+    return {
         'experiment': experiment,
         'student': {
             'name': inputs.get('student_name', 'Student'),
@@ -59,21 +64,39 @@ def generate_report(slug):
         'steps_by_trial': steps_by_trial,
         'explanation_blocks': calc_data.get('explanation_blocks', []),
         'final_explanation': calc_data.get('final_explanation', ''),
+        'charts': charts,
         'theory_html': experiment.content.get('theory', '')
     }
+
+@bp.route('/experiment/<slug>/report', methods=['POST'])
+def generate_report(slug):
+    with stage("query"):
+        experiment = Experiment.query.filter_by(slug=slug).first_or_404()
+    
+    # Get form data
+    inputs = request.form.to_dict()
     
-    # Custom filter for LaTeX -> MathML
-    def latex_filter(s):
-        try:
-            import latex2mathml.converter
-            return latex2mathml.converter.convert(s)
-        except ImportError:
-            return s
-        except Exception:
-            return s
-            
-    # Render HTML
-    html = render_template('report.html', **context, latex=latex_filter)
+    # Perform Calc
+    with stage("calc"):
+        calc_data = calculate_experiment(slug, inputs)
+    if "error" in calc_data:
+        flash(calc_data["error"])
+        return render_template('experiment.html', experiment=experiment)
+
+    context = report_context(experiment, inputs, calc_data)
+    
+    # PDF engines run neither MathJax nor MathML: use SVG math, or plain HTML math without matplotlib.
+    # The override stays until the PDF (or its HTML fallback) is built.
+    g.math_renderer = pdf_renderer()
+    try:
+        return _report_response(slug, context)
+    finally:
+        g.pop("math_renderer", None)
+
+
+def _report_response(slug, context):
+    with stage("render"):
+        html = render_template('report.html', **context)
     
     def render_with_xhtml2pdf():
         from xhtml2pdf import pisa
@@ -101,15 +124,16 @@ def generate_report(slug):
     # Convert to PDF (avoid WeasyPrint on Windows unless explicitly enabled)
     try:
         force_weasy = os.getenv("USE_WEASYPRINT", "").lower() in ["1", "true", "yes"]
-        if sys.platform == "win32" and not force_weasy:
-            return render_with_xhtml2pdf()
-        try:
-            return render_with_weasyprint()
-        except Exception:
-            return render_with_xhtml2pdf()
+        with stage("pdf"):
+            if sys.platform == "win32" and not force_weasy:
+                return render_with_xhtml2pdf()
+            try:
+                return render_with_weasyprint()
+            except Exception:
+                return render_with_xhtml2pdf()
     except Exception as err:
         context["print_hint"] = True
-        html_fallback = render_template('report.html', **context, latex=latex_filter)
+        html_fallback = render_template('report.html', **context)
         response = make_response(html_fallback)
         response.headers['Content-Type'] = 'text/html; charset=utf-8'
         return response
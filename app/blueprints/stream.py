@@ -0,0 +1,85 @@
+import json
+import time
+
+from flask import Blueprint, Response, abort, current_app, jsonify, request
+from app.metrics import stage
+from app.steady_state import steady_inputs
+from app.streaming import STREAM_ID_RE, BatchTooLarge, StreamError, hub, parse_batch
+
+bp = Blueprint('stream', __name__, url_prefix='/api/stream')
+
+
+def _check_stream_id(stream_id):
+    if not STREAM_ID_RE.match(stream_id):
+        abort(404)
+
+
+@bp.route('/<stream_id>/ingest', methods=['POST'])
+def ingest(stream_id):
+    _check_stream_id(stream_id)
+    token = current_app.config.get("STREAM_INGEST_TOKEN")
+    if token and request.headers.get("X-Logger-Token") != token:
+        return jsonify({"success": False, "error": "Invalid logger token"}), 403
+    try:
+        with stage("parse"):
+            times, columns = parse_batch(request.get_json(silent=True), current_app.config["STREAM_MAX_BATCH"])
+        with stage("ingest"):
+            seq = hub.ingest(stream_id, times, columns)
+    except BatchTooLarge as e:
+        return jsonify({"success": False, "error": str(e)}), 413
+    except StreamError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    return jsonify({"success": True, "seq": seq, "samples": int(times.size)})
+
+
+@bp.route('/<stream_id>/latest')
+def latest(stream_id):
+    _check_stream_id(stream_id)
+    snapshot = hub.latest(stream_id)
+    if snapshot is None:
+        return jsonify({"success": False, "error": "No data for this stream yet"}), 404
+    return jsonify({"success": True, **snapshot})
+
+
+@bp.route('/<stream_id>/steady')
+def steady(stream_id):
+    _check_stream_id(stream_id)
+    status = hub.steady_status(stream_id)
+    if status is None:
+        return jsonify({"success": False, "error": "No data for this stream yet"}), 404
+    inputs = None
+    if status["snapshot"]:
+        inputs = steady_inputs(request.args.get("slug"), status["snapshot"]["means"])
+    return jsonify({"success": True, **status, "inputs": inputs})
+
+
+@bp.route('/<stream_id>/events')
+def events(stream_id):
+    _check_stream_id(stream_id)
+    config = current_app.config
+    interval = config["STREAM_PUSH_INTERVAL"]
+    keepalive = config["STREAM_KEEPALIVE"]
+    deadline = time.monotonic() + config["STREAM_MAX_SECONDS"]
+
+    def generate():
+        # Batches arriving faster than the push interval are coalesced into one event.
+        # The stream ends after STREAM_MAX_SECONDS; EventSource reconnects by itself.
+        yield "retry: 2000\n\n"
+        seq = 0
+        while time.monotonic() < deadline:
+            current = hub.wait(stream_id, seq, keepalive)
+            if current == seq:
+                yield ": keepalive\n\n"
+                continue
+            snapshot = hub.latest(stream_id)
+            if snapshot is None:
+                seq = current
+                continue
+            seq = snapshot["seq"]
+            yield f"id: {seq}\nevent: reading\ndata: {json.dumps(snapshot)}\n\n"
+            time.sleep(interval)
+
+    return Response(generate(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
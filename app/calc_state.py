@@ -0,0 +1,151 @@
+"""Per-session state for incremental recalculation.
+
+After each calculation the server keeps the inputs and the per-trial results
+for the browser session and returns a ``calc_token``. The next request can
+send only what changed::
+
+    {"slug": ..., "delta": {"token": "<calc_token>",
+                            "inputs": {"air_props_mode": "manual"},
+                            "trials": {"3": {"t2": 68.5}, "5": null}}}
+
+``trials`` patches readings by trial number (new numbers add a trial, ``null``
+removes one). Trials whose readings and shared settings are unchanged reuse
+their earlier results.
+"""
+import secrets
+import threading
+from collections import OrderedDict
+
+from flask import session
+
+from app.utils import OBSERVATION_FIELDS, TRIAL_FIELD_RE, parse_natural_convection_observations
+
+
+TRIAL_SLUGS = ("natural-convection-vertical-tube",)
+
+
+class StaleCalcState(ValueError):
+    pass
+
+
+class CalcState:
+    __slots__ = ("token", "inputs", "trial_cache")
+
+    def __init__(self, token, inputs, trial_cache):
+        self.token = token
+        self.inputs = inputs
+        self.trial_cache = trial_cache
+
+
+class CalcStateStore:
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            state = self._entries.get(key)
+            if state is not None:
+                self._entries.move_to_end(key)
+            return state
+
+    def put(self, key, state):
+        with self._lock:
+            self._entries[key] = state
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+store = CalcStateStore()
+
+
+def session_key():
+    sid = session.get("calc_sid")
+    if not sid:
+        sid = session["calc_sid"] = secrets.token_urlsafe(16)
+    return sid
+
+
+def normalize_inputs(slug, inputs):
+    """Keep trial readings in one form (an ``observations`` list) so deltas can patch them."""
+    if slug not in TRIAL_SLUGS or not isinstance(inputs, dict):
+        return inputs
+    fields = {
+        key: val for key, val in inputs.items()
+        if key not in ("columns", "observations") and not TRIAL_FIELD_RE.match(str(key))
+    }
+    fields["observations"] = parse_natural_convection_observations(inputs)
+    return fields
+
+
+def apply_delta(inputs, delta):
+    changes = delta.get("inputs") or {}
+    trials = delta.get("trials") or {}
+    if not isinstance(changes, dict) or not isinstance(trials, dict):
+        raise ValueError("'delta.inputs' and 'delta.trials' must be objects.")
+    merged = {**inputs, **changes}
+    if not trials:
+        return merged
+
+    observations = list(merged.get("observations") or [])
+    # Trial numbers may arrive as numbers or strings; match them as text.
+    index = {str(obs.get("trial")): idx for idx, obs in enumerate(observations)}
+    removed = set()
+    for trial_no, patch in trials.items():
+        try:
+            trial_no = int(trial_no)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid trial number '{trial_no}'.")
+        if patch is None:
+            removed.add(str(trial_no))
+            continue
+        if not isinstance(patch, dict):
+            raise ValueError(f"Changes for trial {trial_no} must be an object.")
+        patch = {key: val for key, val in patch.items() if key in OBSERVATION_FIELDS}
+        if str(trial_no) in index:
+            idx = index[str(trial_no)]
+            observations[idx] = {**observations[idx], **patch}
+        else:
+            index[str(trial_no)] = len(observations)
+            observations.append({"trial": trial_no, **{field: None for field in OBSERVATION_FIELDS}, **patch})
+    if removed:
+        observations = [obs for obs in observations if str(obs.get("trial")) not in removed]
+    merged["observations"] = observations
+    return merged
+
+
+def resolve(slug, data):
+    """``(key, inputs, trial_cache)`` for a calculate request: full inputs, or a delta on the session's last result."""
+    key = (session_key(), slug)
+    state = store.get(key)
+    delta = data.get("delta")
+    if delta is not None:
+        if not isinstance(delta, dict) or state is None or delta.get("token") != state.token:
+            raise StaleCalcState("The previous result has expired; send the full inputs.")
+        inputs = apply_delta(state.inputs, delta)
+    else:
+        inputs = normalize_inputs(slug, data.get("inputs"))
+    # A copy, so a concurrent request from the same session can't see a half-updated cache.
+    trial_cache = dict(state.trial_cache) if state is not None else {}
+    return key, inputs, trial_cache
+
+
+def remember(key, inputs, trial_cache):
+    token = secrets.token_urlsafe(12)
+    store.put(key, CalcState(token, inputs, trial_cache))
+    return token
+
+
+def init_app(app):
+    app.config.setdefault("CALC_STATE_SIZE", 256)
+    store.maxsize = app.config["CALC_STATE_SIZE"]
+    store.clear()
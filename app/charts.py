@@ -0,0 +1,245 @@
+import base64
+import json
+import math
+from functools import lru_cache
+
+import numpy as np
+from markupsafe import escape
+
+
+COLORS = ["#ff6384", "#36a2eb", "#ff9f40", "#4bc0c0", "#9966ff", "#c9cbcf"]
+
+WIDTH = 600
+HEIGHT = 320
+MARGIN_LEFT = 64
+MARGIN_RIGHT = 20
+LEGEND_ROW = 16
+MARGIN_BOTTOM = 52
+
+
+def nice_ticks(lo, hi, count=5):
+    if not (math.isfinite(lo) and math.isfinite(hi)):
+        lo, hi = 0.0, 1.0
+    if hi == lo:
+        pad = abs(lo) * 0.1 or 1.0
+        lo, hi = lo - pad, hi + pad
+    raw_step = (hi - lo) / count
+    magnitude = 10 ** math.floor(math.log10(raw_step))
+    step = next(mult * magnitude for mult in [1, 2, 2.5, 5, 10] if mult * magnitude >= raw_step)
+    start = math.floor(lo / step) * step
+    stop = math.ceil(hi / step) * step
+    return np.arange(start, stop + step / 2, step)
+
+
+def _values(values):
+    return np.array([np.nan if val is None else float(val) for val in values], dtype=float)
+
+
+def _fmt_tick(value):
+    if value == 0:
+        return "0"
+    if abs(value) >= 1e5 or abs(value) < 1e-3:
+        return f"{value:.2e}"
+    return f"{value:.6g}"
+
+
+class _Canvas:
+    def __init__(self, title, x_label, y_label, ticks, names):
+        self.parts = []
+        self.ticks = ticks
+        self.legend_items = self._layout_legend(names)
+        rows = max((ypos for _, _, ypos in self.legend_items), default=0) // LEGEND_ROW + 1
+        self.top = 12 + rows * LEGEND_ROW + 8
+        self.plot_w = WIDTH - MARGIN_LEFT - MARGIN_RIGHT
+        self.plot_h = HEIGHT - self.top - MARGIN_BOTTOM
+        self.title = title
+        self.x_label = x_label
+        self.y_label = y_label
+
+    def y(self, values):
+        lo, hi = self.ticks[0], self.ticks[-1]
+        return self.top + self.plot_h * (1.0 - (values - lo) / (hi - lo))
+
+    def axes(self):
+        parts = self.parts
+        ys = self.y(self.ticks)
+        for tick, ypos in zip(self.ticks, ys):
+            parts.append(
+                f'<line x1="{MARGIN_LEFT}" y1="{ypos:.1f}" x2="{WIDTH - MARGIN_RIGHT}" y2="{ypos:.1f}" stroke="#e5e5e5"/>'
+                f'<text x="{MARGIN_LEFT - 6}" y="{ypos + 4:.1f}" text-anchor="end">{_fmt_tick(tick)}</text>'
+            )
+        bottom = self.top + self.plot_h
+        parts.append(
+            f'<line x1="{MARGIN_LEFT}" y1="{self.top}" x2="{MARGIN_LEFT}" y2="{bottom}" stroke="#666"/>'
+            f'<line x1="{MARGIN_LEFT}" y1="{bottom}" x2="{WIDTH - MARGIN_RIGHT}" y2="{bottom}" stroke="#666"/>'
+        )
+        if self.x_label:
+            parts.append(
+                f'<text x="{MARGIN_LEFT + self.plot_w / 2:.1f}" y="{HEIGHT - 8}" text-anchor="middle">{escape(self.x_label)}</text>'
+            )
+        if self.y_label:
+            cy = self.top + self.plot_h / 2
+            parts.append(
+                f'<text x="14" y="{cy:.1f}" text-anchor="middle" transform="rotate(-90 14 {cy:.1f})">{escape(self.y_label)}</text>'
+            )
+
+    def x_labels(self, labels, xs):
+        bottom = self.top + self.plot_h
+        for label, xpos in zip(labels, xs):
+            self.parts.append(f'<text x="{xpos:.1f}" y="{bottom + 16}" text-anchor="middle">{escape(label)}</text>')
+
+    @staticmethod
+    def _layout_legend(names):
+        items = []
+        xpos, ypos = MARGIN_LEFT, 0
+        for name in names:
+            item_w = 28 + 7 * len(str(name))
+            if xpos + item_w > WIDTH - MARGIN_RIGHT and xpos > MARGIN_LEFT:
+                xpos, ypos = MARGIN_LEFT, ypos + LEGEND_ROW
+            items.append((name, xpos, ypos))
+            xpos += item_w
+        return items
+
+    def legend(self):
+        for idx, (name, xpos, ypos) in enumerate(self.legend_items):
+            color = COLORS[idx % len(COLORS)]
+            self.parts.append(
+                f'<rect x="{xpos}" y="{10 + ypos}" width="12" height="12" fill="{color}"/>'
+                f'<text x="{xpos + 16}" y="{20 + ypos}">{escape(name)}</text>'
+            )
+
+    def svg(self):
+        title = f"<title>{escape(self.title)}</title>" if self.title else ""
+        return (
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{WIDTH}" height="{HEIGHT}" '
+            f'viewBox="0 0 {WIDTH} {HEIGHT}" font-family="Helvetica, Arial, sans-serif" font-size="11">'
+            f'{title}<rect width="{WIDTH}" height="{HEIGHT}" fill="#fff"/>{"".join(self.parts)}</svg>'
+        )
+
+
+def _line_svg(spec):
+    labels = spec["labels"]
+    series = [(item["name"], _values(item["values"])) for item in spec["series"]]
+    finite = np.concatenate([vals[np.isfinite(vals)] for _, vals in series] or [np.array([])])
+    ticks = nice_ticks(float(finite.min()), float(finite.max())) if finite.size else nice_ticks(0.0, 1.0)
+
+    canvas = _Canvas(spec.get("title"), spec.get("x_label"), spec.get("y_label"), ticks, [name for name, _ in series])
+    canvas.axes()
+    count = len(labels)
+    xs = MARGIN_LEFT + (np.arange(count) + 0.5) * (canvas.plot_w / max(count, 1))
+    canvas.x_labels(labels, xs)
+
+    for idx, (_, vals) in enumerate(series):
+        color = COLORS[idx % len(COLORS)]
+        ys = canvas.y(vals[:count])
+        commands = []
+        pen_down = False
+        for xpos, ypos in zip(xs, ys):
+            if not math.isfinite(ypos):
+                pen_down = False
+                continue
+            commands.append(f"{'L' if pen_down else 'M'}{xpos:.1f} {ypos:.1f}")
+            pen_down = True
+        if commands:
+            canvas.parts.append(f'<path d="{" ".join(commands)}" fill="none" stroke="{color}" stroke-width="2"/>')
+        for xpos, ypos in zip(xs, ys):
+            if math.isfinite(ypos):
+                canvas.parts.append(f'<circle cx="{xpos:.1f}" cy="{ypos:.1f}" r="3" fill="{color}"/>')
+
+    canvas.legend()
+    return canvas.svg()
+
+
+def _bar_svg(spec):
+    labels = spec["labels"]
+    series = [(item["name"], _values(item["values"])) for item in spec["series"]]
+    finite = np.concatenate([vals[np.isfinite(vals)] for _, vals in series] or [np.array([])])
+    lo = min(0.0, float(finite.min())) if finite.size else 0.0
+    hi = max(0.0, float(finite.max())) if finite.size else 1.0
+    ticks = nice_ticks(lo, hi)
+
+    canvas = _Canvas(spec.get("title"), spec.get("x_label"), spec.get("y_label"), ticks, [name for name, _ in series])
+    canvas.axes()
+    count = max(len(labels), 1)
+    group_w = canvas.plot_w / count
+    bar_w = group_w * 0.7 / max(len(series), 1)
+    centers = MARGIN_LEFT + (np.arange(len(labels)) + 0.5) * group_w
+    canvas.x_labels(labels, centers)
+    zero = float(canvas.y(np.array(0.0)))
+
+    for idx, (_, vals) in enumerate(series):
+        color = COLORS[idx % len(COLORS)]
+        lefts = centers - group_w * 0.35 + idx * bar_w
+        tops = canvas.y(vals[:len(labels)])
+        for left, top in zip(lefts, tops):
+            if not math.isfinite(top):
+                continue
+            canvas.parts.append(
+                f'<rect x="{left:.1f}" y="{min(top, zero):.1f}" width="{bar_w * 0.92:.1f}" '
+                f'height="{abs(zero - top):.1f}" fill="{color}" fill-opacity="0.75"/>'
+            )
+
+    canvas.legend()
+    return canvas.svg()
+
+
+@lru_cache(maxsize=256)
+def _render_cached(spec_key):
+    spec = json.loads(spec_key)
+    svg = _bar_svg(spec) if spec["kind"] == "bar" else _line_svg(spec)
+    return "data:image/svg+xml;base64," + base64.b64encode(svg.encode("utf-8")).decode("ascii")
+
+
+def chart_uri(kind, labels, series, title="", x_label="", y_label=""):
+    # The JSON of the chart data is the cache key, so identical reports reuse the encoded SVG.
+    spec_key = json.dumps({
+        "kind": kind,
+        "labels": [str(label) for label in labels],
+        "series": [{"name": name, "values": [None if val is None else float(val) for val in values]}
+                   for name, values in series],
+        "title": title,
+        "x_label": x_label,
+        "y_label": y_label,
+    }, sort_keys=True)
+    return _render_cached(spec_key)
+
+
+def report_charts(slug, calc_data):
+    results = calc_data.get("results", {}) or {}
+    charts = []
+    if slug == "therm-conductivity-metal-rod":
+        t_rod = (calc_data.get("normalized") or {}).get("t_rod") or []
+        if t_rod:
+            charts.append({
+                "title": "Temperature Distribution Graph",
+                "uri": chart_uri(
+                    "line", [f"T{idx}" for idx in range(1, len(t_rod) + 1)],
+                    [("Temperature Distribution (C)", t_rod)],
+                    title="Temperature distribution along the rod",
+                    x_label="Points along rod", y_label="Temperature (C)",
+                ),
+            })
+    elif slug == "natural-convection-vertical-tube":
+        trials = results.get("trials", []) or []
+        if trials:
+            names = [f"Trial {item.get('trial', idx + 1)}" for idx, item in enumerate(trials)]
+            charts.append({
+                "title": "Temperature Distribution Graph",
+                "uri": chart_uri(
+                    "line", ["T1", "T2", "T3", "T4", "T5", "T6"],
+                    [(name, item.get("temps") or []) for name, item in zip(names, trials)],
+                    title="Surface temperatures per trial",
+                    x_label="Thermocouples", y_label="Temperature (C)",
+                ),
+            })
+            charts.append({
+                "title": "Comparison Graph",
+                "uri": chart_uri(
+                    "bar", names,
+                    [("h_exp (W/m^2K)", [item.get("h_exp") for item in trials]),
+                     ("h_theoretical (W/m^2K)", [item.get("h_theoretical") for item in trials])],
+                    title="Experimental vs theoretical h",
+                    y_label="h (W/m^2K)",
+                ),
+            })
+    return charts
@@ -0,0 +1,312 @@
+import ast
+import json
+import re
+from functools import lru_cache
+
+import numpy as np
+
+from app.admission import check_deadline
+
+
+class FormulaError(ValueError):
+    pass
+
+
+BUILTIN_CONSTANTS = {
+    "pi": np.pi,
+    "e": np.e,
+}
+
+# name -> (numpy ufunc, min args, max args)
+FUNCTIONS = {
+    "sqrt": (np.sqrt, 1, 1),
+    "exp": (np.exp, 1, 1),
+    "log": (np.log, 1, 1),
+    "ln": (np.log, 1, 1),
+    "log10": (np.log10, 1, 1),
+    "sin": (np.sin, 1, 1),
+    "cos": (np.cos, 1, 1),
+    "tan": (np.tan, 1, 1),
+    "abs": (np.abs, 1, 1),
+    "min": (np.minimum, 2, 2),
+    "max": (np.maximum, 2, 2),
+    "where": (np.where, 3, 3),
+}
+
+BIN_OPS = {
+    ast.Add: np.add,
+    ast.Sub: np.subtract,
+    ast.Mult: np.multiply,
+    ast.Div: np.true_divide,
+    ast.Pow: np.power,
+    # Lab sheets write powers as L^3; treat ^ as exponentiation, not xor.
+    ast.BitXor: np.power,
+}
+
+UNARY_OPS = {
+    ast.USub: np.negative,
+    ast.UAdd: np.positive,
+}
+
+COMPARE_OPS = {
+    ast.Lt: np.less,
+    ast.LtE: np.less_equal,
+    ast.Gt: np.greater,
+    ast.GtE: np.greater_equal,
+    ast.Eq: np.equal,
+    ast.NotEq: np.not_equal,
+}
+
+GREEK_NAMES = {
+    "alpha", "beta", "gamma", "delta", "epsilon", "eta", "theta", "lambda",
+    "mu", "nu", "pi", "rho", "sigma", "tau", "phi", "omega",
+    "Delta", "Gamma", "Theta", "Lambda", "Sigma", "Phi", "Omega",
+}
+
+NAME_RE = re.compile(r"^[A-Za-z][A-Za-z0-9_]*$")
+MAX_EXPR_LENGTH = 500
+
+
+def numeric_input_names(content):
+    names = []
+    for field in content.get("inputs", []) or []:
+        if not isinstance(field, dict) or not field.get("name"):
+            continue
+        if field.get("type") == "select":
+            continue
+        names.append(str(field["name"]))
+    return names
+
+
+def parse_formula_specs(content):
+    raw = content.get("formulas")
+    if raw is None:
+        return []
+    if not isinstance(raw, list):
+        raise FormulaError("'formulas' must be a list of {\"name\": ..., \"expr\": ...} objects.")
+
+    specs = []
+    for idx, item in enumerate(raw, start=1):
+        if not isinstance(item, dict):
+            raise FormulaError(f"Formula #{idx} must be an object with 'name' and 'expr'.")
+        name = str(item.get("name", "")).strip()
+        expr = str(item.get("expr", "")).strip()
+        if not name or not expr:
+            raise FormulaError(f"Formula #{idx} needs both 'name' and 'expr'.")
+        specs.append({
+            "name": name,
+            "expr": expr,
+            "label": str(item.get("label") or name),
+            "unit": str(item.get("unit") or ""),
+        })
+    return specs
+
+
+def _check_node(node, known, formula_name):
+    if isinstance(node, ast.Expression):
+        _check_node(node.body, known, formula_name)
+        return
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise FormulaError(f"'{formula_name}': only numeric literals are allowed.")
+        return
+    if isinstance(node, ast.Name):
+        if node.id not in known:
+            raise FormulaError(f"'{formula_name}': unknown name '{node.id}'.")
+        return
+    if isinstance(node, ast.BinOp):
+        if type(node.op) not in BIN_OPS:
+            raise FormulaError(f"'{formula_name}': operator '{type(node.op).__name__}' is not allowed.")
+        _check_node(node.left, known, formula_name)
+        _check_node(node.right, known, formula_name)
+        return
+    if isinstance(node, ast.UnaryOp):
+        if type(node.op) not in UNARY_OPS:
+            raise FormulaError(f"'{formula_name}': operator '{type(node.op).__name__}' is not allowed.")
+        _check_node(node.operand, known, formula_name)
+        return
+    if isinstance(node, ast.Compare):
+        if len(node.ops) != 1 or type(node.ops[0]) not in COMPARE_OPS:
+            raise FormulaError(f"'{formula_name}': only single comparisons (a < b) are allowed.")
+        _check_node(node.left, known, formula_name)
+        _check_node(node.comparators[0], known, formula_name)
+        return
+    if isinstance(node, ast.Call):
+        if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS:
+            raise FormulaError(f"'{formula_name}': unsupported function call.")
+        if node.keywords:
+            raise FormulaError(f"'{formula_name}': keyword arguments are not allowed.")
+        _, min_args, max_args = FUNCTIONS[node.func.id]
+        if not (min_args <= len(node.args) <= max_args):
+            raise FormulaError(f"'{formula_name}': {node.func.id}() takes {min_args} argument(s).")
+        for arg in node.args:
+            _check_node(arg, known, formula_name)
+        return
+    raise FormulaError(f"'{formula_name}': '{type(node).__name__}' expressions are not allowed.")
+
+
+def _compile_node(node):
+    if isinstance(node, ast.Expression):
+        return _compile_node(node.body)
+    if isinstance(node, ast.Constant):
+        try:
+            value = float(node.value)
+        except OverflowError:
+            raise FormulaError("Numeric literal is too large.") from None
+        return lambda env: value
+    if isinstance(node, ast.Name):
+        name = node.id
+        return lambda env: env[name]
+    if isinstance(node, ast.BinOp):
+        op = BIN_OPS[type(node.op)]
+        left = _compile_node(node.left)
+        right = _compile_node(node.right)
+        return lambda env: op(left(env), right(env))
+    if isinstance(node, ast.UnaryOp):
+        op = UNARY_OPS[type(node.op)]
+        operand = _compile_node(node.operand)
+        return lambda env: op(operand(env))
+    if isinstance(node, ast.Compare):
+        op = COMPARE_OPS[type(node.ops[0])]
+        left = _compile_node(node.left)
+        right = _compile_node(node.comparators[0])
+        return lambda env: op(left(env), right(env))
+    if isinstance(node, ast.Call):
+        func = FUNCTIONS[node.func.id][0]
+        args = [_compile_node(arg) for arg in node.args]
+        return lambda env: func(*[arg(env) for arg in args])
+    raise FormulaError(f"Cannot compile '{type(node).__name__}'.")
+
+
+def latex_name(name):
+    base, _, sub = name.partition("_")
+    base_tex = f"\\{base}" if base in GREEK_NAMES else base
+    if sub:
+        return f"{base_tex}_{{{sub}}}"
+    return base_tex
+
+
+def _to_latex(node):
+    if isinstance(node, ast.Expression):
+        return _to_latex(node.body)
+    if isinstance(node, ast.Constant):
+        return f"{node.value:g}" if isinstance(node.value, float) else str(node.value)
+    if isinstance(node, ast.Name):
+        return latex_name(node.id)
+    if isinstance(node, ast.BinOp):
+        left = _to_latex(node.left)
+        right = _to_latex(node.right)
+        if isinstance(node.op, ast.Div):
+            return f"\\frac{{{left}}}{{{right}}}"
+        if isinstance(node.op, (ast.Pow, ast.BitXor)):
+            if isinstance(node.left, (ast.BinOp, ast.UnaryOp)):
+                left = f"\\left({left}\\right)"
+            return f"{left}^{{{right}}}"
+        if isinstance(node.op, ast.Mult):
+            if isinstance(node.left, ast.BinOp) and isinstance(node.left.op, (ast.Add, ast.Sub)):
+                left = f"\\left({left}\\right)"
+            if isinstance(node.right, ast.BinOp) and isinstance(node.right.op, (ast.Add, ast.Sub)):
+                right = f"\\left({right}\\right)"
+            return f"{left} \\times {right}"
+        if isinstance(node.op, ast.Sub) and isinstance(node.right, ast.BinOp) and isinstance(node.right.op, (ast.Add, ast.Sub)):
+            right = f"\\left({right}\\right)"
+        symbol = "+" if isinstance(node.op, ast.Add) else "-"
+        return f"{left} {symbol} {right}"
+    if isinstance(node, ast.UnaryOp):
+        symbol = "-" if isinstance(node.op, ast.USub) else "+"
+        return f"{symbol}{_to_latex(node.operand)}"
+    if isinstance(node, ast.Compare):
+        symbols = {ast.Lt: "<", ast.LtE: "\\le", ast.Gt: ">", ast.GtE: "\\ge", ast.Eq: "=", ast.NotEq: "\\ne"}
+        return f"{_to_latex(node.left)} {symbols[type(node.ops[0])]} {_to_latex(node.comparators[0])}"
+    if isinstance(node, ast.Call):
+        name = node.func.id
+        args = [_to_latex(arg) for arg in node.args]
+        if name == "sqrt":
+            return f"\\sqrt{{{args[0]}}}"
+        if name == "abs":
+            return f"\\left|{args[0]}\\right|"
+        if name in ("ln", "log", "exp", "sin", "cos", "tan"):
+            func = "ln" if name == "log" else name
+            return f"\\{func}\\left({args[0]}\\right)"
+        return f"\\text{{{name}}}\\left({', '.join(args)}\\right)"
+    return ""
+
+
+class CompiledFormulas:
+    def __init__(self, specs, input_names, constant_names):
+        self.specs = specs
+        self.input_names = list(input_names)
+        self.constant_names = list(constant_names)
+        self.names = [spec["name"] for spec in specs]
+        self._evaluators = []
+        self.latex = {}
+
+        known = set(BUILTIN_CONSTANTS) | set(self.input_names) | set(self.constant_names)
+        for spec in specs:
+            name = spec["name"]
+            if not NAME_RE.match(name):
+                raise FormulaError(f"'{name}' is not a valid formula name (letters, digits and _ only).")
+            if name in known or name in FUNCTIONS:
+                raise FormulaError(f"'{name}' is already defined as an input, constant, function or formula.")
+            if len(spec["expr"]) > MAX_EXPR_LENGTH:
+                raise FormulaError(f"'{name}': expression is longer than {MAX_EXPR_LENGTH} characters.")
+            try:
+                tree = ast.parse(spec["expr"], mode="eval")
+            except SyntaxError as err:
+                raise FormulaError(f"'{name}': syntax error in expression ({err.msg}).") from None
+            # Only earlier formulas are visible, so definitions can never be cyclic.
+            _check_node(tree, known, name)
+            self._evaluators.append((name, _compile_node(tree)))
+            self.latex[name] = _to_latex(tree)
+            known.add(name)
+
+    def evaluate(self, columns, constants=None):
+        env = dict(BUILTIN_CONSTANTS)
+        for name in self.constant_names:
+            env[name] = float((constants or {}).get(name, 0.0))
+
+        size = 1
+        for name in self.input_names:
+            arr = np.asarray(columns.get(name, 0.0), dtype=float)
+            env[name] = arr
+            if arr.ndim:
+                size = max(size, arr.shape[0])
+
+        outputs = {}
+        with np.errstate(all="ignore"):
+            for name, evaluator in self._evaluators:
+                check_deadline()
+                try:
+                    value = np.asarray(evaluator(env), dtype=float)
+                except (ArithmeticError, TypeError, ValueError) as err:
+                    raise FormulaError(f"'{name}' could not be evaluated ({err}).") from None
+                env[name] = value
+                outputs[name] = np.broadcast_to(value, (size,)) if value.ndim == 0 else value
+        return outputs
+
+
+def compile_formulas(content):
+    content = content or {}
+    specs = parse_formula_specs(content)
+    constant_names = list((content.get("constants") or {}).keys())
+    return CompiledFormulas(specs, numeric_input_names(content), constant_names)
+
+
+@lru_cache(maxsize=64)
+def _compile_cached(spec_key):
+    spec = json.loads(spec_key)
+    return compile_formulas({
+        "formulas": spec["formulas"],
+        "inputs": spec["inputs"],
+        "constants": {name: {} for name in spec["constants"]},
+    })
+
+
+def get_compiled_formulas(content):
+    content = content or {}
+    spec_key = json.dumps({
+        "formulas": content.get("formulas") or [],
+        "inputs": content.get("inputs") or [],
+        "constants": sorted((content.get("constants") or {}).keys()),
+    }, sort_keys=True)
+    return _compile_cached(spec_key)
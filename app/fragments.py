@@ -0,0 +1,89 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from flask import current_app, g
+from markupsafe import Markup
+
+from app.mathrender import active_renderer
+
+
+FRAGMENTS = ("overview", "theory", "procedure", "observations", "simulation", "viva")
+
+
+def content_version(content):
+    payload = json.dumps(content or {}, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class FragmentCache:
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, experiment_id=None):
+        with self._lock:
+            if experiment_id is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[0] == experiment_id]:
+                del self._entries[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+cache = FragmentCache()
+
+
+def invalidate(experiment_id=None):
+    cache.invalidate(experiment_id)
+
+
+def _render(name, experiment):
+    outer_pending = g.get("math_pending", False)
+    g.math_pending = False
+    try:
+        template = current_app.jinja_env.get_template(f"experiment/_{name}.html")
+        html = Markup(template.render(experiment=experiment))
+        pending = g.math_pending
+    finally:
+        g.math_pending = outer_pending
+    return html, pending
+
+
+def render_fragment(name, experiment):
+    if not current_app.config.get("FRAGMENT_CACHE", True):
+        html, pending = _render(name, experiment)
+    else:
+        key = (*experiment.cache_key, experiment.slug, name, active_renderer())
+        entry = cache.get(key)
+        if entry is None:
+            entry = _render(name, experiment)
+            cache.put(key, entry)
+        html, pending = entry
+    if pending:
+        g.math_pending = True
+    return html
+
+
+def init_app(app):
+    app.config.setdefault("FRAGMENT_CACHE", not app.debug)
+    cache.maxsize = app.config.setdefault("FRAGMENT_CACHE_SIZE", 256)
+    app.add_template_global(render_fragment)
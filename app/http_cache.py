@@ -0,0 +1,201 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+
+import click
+from flask import current_app, make_response, request, send_from_directory, session
+from flask.cli import with_appcontext
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip is always available.
+    brotli = None
+
+
+COMPRESSIBLE_TYPES = {
+    "text/html", "text/css", "text/plain", "text/csv", "application/json",
+    "application/javascript", "text/javascript", "image/svg+xml",
+}
+STATIC_SUFFIXES = (".css", ".js", ".svg", ".json", ".html", ".txt")
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+ENCODINGS = {"br": ".br", "gzip": ".gz"}
+
+
+def _file_digest(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def static_version(filename):
+    path = os.path.join(current_app.static_folder, filename)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    versions = current_app.extensions.setdefault("static_versions", {})
+    key = (filename, stat.st_mtime_ns, stat.st_size)
+    if key not in versions:
+        versions[key] = _file_digest(path)[:12]
+    return versions[key]
+
+
+def build_id():
+    """Hash of the templates and static files, so a deploy changes every page ETag."""
+    if current_app.config.get("BUILD_ID"):
+        return current_app.config["BUILD_ID"]
+    cached = current_app.extensions.get("build_id")
+    if cached and not current_app.debug:
+        return cached
+    digest = hashlib.sha1()
+    folders = [current_app.template_folder and os.path.join(current_app.root_path, current_app.template_folder)]
+    folders.append(current_app.static_folder)
+    for folder in filter(None, folders):
+        for root, dirs, files in os.walk(folder):
+            dirs.sort()
+            for name in sorted(files):
+                if name.endswith((".gz", ".br")):
+                    continue
+                path = os.path.join(root, name)
+                digest.update(os.path.relpath(path, folder).encode("utf-8"))
+                digest.update(_file_digest(path).encode("ascii"))
+    current_app.extensions["build_id"] = digest.hexdigest()[:12]
+    return current_app.extensions["build_id"]
+
+
+def page_etag(*parts):
+    digest = hashlib.sha1(build_id().encode("ascii"))
+    for part in parts:
+        digest.update(b"\0" + str(part).encode("utf-8"))
+    return digest.hexdigest()[:24]
+
+
+def conditional_page(etag, render):
+    """Return 304 when the client already has ``etag``, otherwise call ``render``.
+
+    Pages carrying flashed messages are never cached because the flash is
+    consumed by the render.
+    """
+    if not current_app.config.get("HTTP_CACHE", True) or request.method != "GET" or _has_flashes():
+        return make_response(render())
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = make_response(render())
+    response.set_etag(etag, weak=True)
+    response.cache_control.no_cache = True
+    return response
+
+
+def _has_flashes():
+    # Peek without consuming: get_flashed_messages pops them from the session.
+    return bool(session.get("_flashes"))
+
+
+def _accepted_encoding(accept_encoding):
+    if brotli is not None and "br" in accept_encoding:
+        return "br"
+    if "gzip" in accept_encoding:
+        return "gzip"
+    return None
+
+
+def _compress(data, encoding):
+    if encoding == "br":
+        return brotli.compress(data, quality=5)
+    return gzip.compress(data, compresslevel=6)
+
+
+def compress_response(response):
+    if not current_app.config.get("COMPRESS_RESPONSES", True):
+        return response
+    if (
+        response.status_code != 200
+        or response.direct_passthrough
+        or response.is_streamed
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESSIBLE_TYPES
+    ):
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = _accepted_encoding(request.accept_encodings)
+    data = response.get_data()
+    if encoding is None or len(data) < current_app.config["COMPRESS_MIN_SIZE"]:
+        return response
+    response.set_data(_compress(data, encoding))
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def _is_fresh(compressed, original):
+    try:
+        return os.path.getmtime(compressed) >= os.path.getmtime(original)
+    except OSError:
+        return False
+
+
+def static_view(filename):
+    mimetype = mimetypes.guess_type(filename)[0]
+    encoding = _accepted_encoding(request.accept_encodings)
+    max_age = IMMUTABLE_MAX_AGE if request.args.get("v") else None
+    response = None
+    if encoding and filename.endswith(STATIC_SUFFIXES):
+        compressed = filename + ENCODINGS[encoding]
+        if _is_fresh(os.path.join(current_app.static_folder, compressed), os.path.join(current_app.static_folder, filename)):
+            response = send_from_directory(current_app.static_folder, compressed, mimetype=mimetype, max_age=max_age)
+            response.headers["Content-Encoding"] = encoding
+    if response is None:
+        response = send_from_directory(current_app.static_folder, filename, max_age=max_age)
+    response.vary.add("Accept-Encoding")
+    if max_age:
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+    return response
+
+
+def _add_static_version(endpoint, values):
+    if endpoint == "static" and "filename" in values and "v" not in values:
+        version = static_version(values["filename"])
+        if version:
+            values["v"] = version
+
+
+@click.command("compress-static")
+@with_appcontext
+def compress_static_command():
+    """Write .gz (and .br, when brotli is installed) next to text assets."""
+    min_size = current_app.config["COMPRESS_MIN_SIZE"]
+    written = 0
+    for root, _, files in os.walk(current_app.static_folder):
+        for name in files:
+            if not name.endswith(STATIC_SUFFIXES):
+                continue
+            path = os.path.join(root, name)
+            with open(path, "rb") as fh:
+                data = fh.read()
+            if len(data) < min_size:
+                continue
+            for encoding, suffix in ENCODINGS.items():
+                if encoding == "br" and brotli is None:
+                    continue
+                packed = brotli.compress(data, quality=11) if encoding == "br" else gzip.compress(data, compresslevel=9)
+                if len(packed) >= len(data):
+                    continue
+                with open(path + suffix, "wb") as fh:
+                    fh.write(packed)
+                written += 1
+    click.echo(f"Wrote {written} compressed static file(s).")
+
+
+def init_app(app):
+    app.config.setdefault("HTTP_CACHE", True)
+    app.config.setdefault("COMPRESS_RESPONSES", True)
+    app.config.setdefault("COMPRESS_MIN_SIZE", 1024)
+    if app.has_static_folder:
+        app.view_functions["static"] = static_view
+    app.url_defaults(_add_static_version)
+    app.after_request(compress_response)
+    app.cli.add_command(compress_static_command)
@@ -0,0 +1,103 @@
+import dataclasses
+import math
+
+import numpy as np
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib encoder is used instead
+    orjson = None
+
+
+def _default(o):
+    if isinstance(o, np.generic):
+        return o.item()
+    if isinstance(o, np.ndarray):
+        return o.tolist()
+    return DefaultJSONProvider.default(o)
+
+
+def round_floats(obj, digits=None):
+    """Copy of ``obj`` with NaN/inf as None and floats rounded to ``digits`` significant digits, if given."""
+    if isinstance(obj, float):
+        if not math.isfinite(obj):
+            return None
+        return float(f"{obj:.{digits}g}") if digits else obj
+    if isinstance(obj, dict):
+        return {key: round_floats(val, digits) for key, val in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [round_floats(val, digits) for val in obj]
+    if isinstance(obj, (np.ndarray, np.generic)):
+        return round_floats(obj.tolist(), digits)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return round_floats(dataclasses.asdict(obj), digits)
+    return obj
+
+
+class LabJSONProvider(DefaultJSONProvider):
+    """JSON provider that understands NumPy scalars/arrays and uses orjson when it is installed.
+
+    ``JSON_FLOAT_DIGITS`` rounds response floats to that many significant
+    digits; ``JSON_FAST = False`` forces the stdlib encoder.
+    """
+
+    default = staticmethod(_default)
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.float_digits = None
+        self.fast = orjson is not None
+
+    def _fast_options(self, indent=False):
+        options = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def _fast_dumps(self, obj, indent=False):
+        try:
+            return orjson.dumps(obj, default=self.default, option=self._fast_options(indent))
+        except (orjson.JSONEncodeError, TypeError):
+            # e.g. integers wider than 64 bits; the stdlib encoder copes with those.
+            return None
+
+    def _stdlib_dumps(self, obj, **kwargs):
+        # The stdlib encoder writes NaN/Infinity, which is not JSON; retry with them as null, like orjson.
+        try:
+            return super().dumps(obj, **{"allow_nan": False, **kwargs})
+        except ValueError:
+            return super().dumps(round_floats(obj), **kwargs)
+
+    def dumps(self, obj, **kwargs):
+        if self.float_digits is not None:
+            obj = round_floats(obj, self.float_digits)
+        if self.fast and not kwargs:
+            data = self._fast_dumps(obj)
+            if data is not None:
+                return data.decode("utf-8")
+        return self._stdlib_dumps(obj, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        if self.float_digits is not None:
+            obj = round_floats(obj, self.float_digits)
+        data = self._fast_dumps(obj, indent) if self.fast else None
+        if data is not None:
+            data += b"\n"
+        else:
+            dump_args = {"indent": 2} if indent else {"separators": (",", ":")}
+            data = f"{self._stdlib_dumps(obj, **dump_args)}\n"
+        return self._app.response_class(data, mimetype=self.mimetype)
+
+
+def init_app(app):
+    app.config.setdefault("JSON_FAST", orjson is not None)
+    app.config.setdefault("JSON_FLOAT_DIGITS", None)
+    provider = LabJSONProvider(app)
+    provider.fast = bool(app.config["JSON_FAST"]) and orjson is not None
+    provider.float_digits = app.config["JSON_FLOAT_DIGITS"]
+    app.json = provider
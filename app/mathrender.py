@@ -0,0 +1,141 @@
+import base64
+import html
+import io
+import re
+from functools import lru_cache
+
+from flask import current_app, g, has_app_context
+from markupsafe import Markup, escape
+
+from app.texlite import tex_to_html
+
+
+MATH_RE = re.compile(r"\$\$(.+?)\$\$|\\\[(.+?)\\\]|\$(.+?)\$|\\\((.+?)\\\)", re.S)
+
+
+@lru_cache(maxsize=None)
+def _backend_available(name):
+    try:
+        if name == "svg":
+            from matplotlib import mathtext  # noqa: F401
+        elif name == "mathml":
+            import latex2mathml.converter  # noqa: F401
+        elif name != "text":
+            return False
+    except ImportError:
+        return False
+    return True
+
+
+def active_renderer():
+    preferred = "auto"
+    if has_app_context():
+        preferred = str(g.get("math_renderer") or current_app.config.get("MATH_RENDERER", "auto")).lower()
+    if preferred == "auto":
+        # SVG first: WeasyPrint and xhtml2pdf cannot lay out MathML.
+        for name in ["svg", "mathml"]:
+            if _backend_available(name):
+                return name
+        return None
+    return preferred if _backend_available(preferred) else None
+
+
+def pdf_renderer():
+    """SVG math if matplotlib is installed, else plain HTML; never MathML, which the PDF engines can't lay out."""
+    return "svg" if _backend_available("svg") else "text"
+
+
+def _render_svg(tex, display):
+    from matplotlib.mathtext import math_to_image
+
+    buf = io.BytesIO()
+    math_to_image(f"${tex}$", buf, format="svg", dpi=72)
+    data = base64.b64encode(buf.getvalue()).decode("ascii")
+    css_class = "math-svg math-display" if display else "math-svg"
+    return f'<img class="{css_class}" alt="{escape(tex)}" src="data:image/svg+xml;base64,{data}">'
+
+
+def _render_mathml(tex, display):
+    import latex2mathml.converter
+
+    return latex2mathml.converter.convert(tex, display="block" if display else "inline")
+
+
+@lru_cache(maxsize=4096)
+def render_tex(tex, display, renderer):
+    # Keyed on the expression text itself, so repeated step templates and theory blocks render once.
+    try:
+        if renderer == "svg":
+            out = _render_svg(tex, display)
+        elif renderer == "mathml":
+            out = _render_mathml(tex, display)
+        elif renderer == "text":
+            out = f'<span class="math">{tex_to_html(tex)}</span>'
+        else:
+            return None
+    except Exception:
+        return None
+    if display and renderer in ["svg", "text"]:
+        return f'<div class="math-block">{out}</div>'
+    return out
+
+
+def prerender(text, renderer=None):
+    """Replace $$..$$, \\[..\\], $..$ and \\(..\\) segments with static markup.
+
+    Returns ``(markup, pending)``; ``pending`` is True when some segment could
+    not be rendered and was left for client-side MathJax.
+    """
+    text = "" if text is None else str(text)
+    renderer = renderer or active_renderer()
+    if not renderer:
+        return Markup(text), bool(MATH_RE.search(text))
+
+    pending = False
+
+    def replace(match):
+        nonlocal pending
+        display = match.group(1) is not None or match.group(2) is not None
+        source = next(group for group in match.groups() if group is not None)
+        out = render_tex(html.unescape(source).strip(), display, renderer)
+        if out is None:
+            pending = True
+            return match.group(0)
+        return out
+
+    return Markup(MATH_RE.sub(replace, text)), pending
+
+
+def prerender_steps(items, renderer=None):
+    renderer = renderer or active_renderer()
+    if not renderer:
+        return items, True
+    pending = False
+    out = []
+    for item in items or []:
+        if isinstance(item, dict) and "steps" in item:
+            steps, item_pending = prerender_steps(item["steps"], renderer)
+            item = {**item, "steps": steps}
+        else:
+            item, item_pending = prerender(item, renderer)
+            item = str(item)
+        pending = pending or item_pending
+        out.append(item)
+    return out, pending
+
+
+def math_filter(text):
+    rendered, pending = prerender(text)
+    if pending:
+        g.math_pending = True
+    return rendered
+
+
+def math_pending():
+    return g.get("math_pending", False) or active_renderer() is None
+
+
+def init_app(app):
+    app.config.setdefault("MATH_RENDERER", "auto")
+    app.add_template_filter(math_filter, "math")
+    app.add_template_global(math_pending)
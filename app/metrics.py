@@ -0,0 +1,158 @@
+import bisect
+import os
+import threading
+import time
+
+from flask import current_app, g, has_request_context, request
+
+
+# Bucket upper bounds in seconds: 0.1 ms up to ~65 s, each 1.5x the previous one.
+BUCKETS = tuple(0.0001 * 1.5 ** idx for idx in range(34))
+
+
+class LatencyHistogram:
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q):
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for idx, bucket_count in enumerate(self.counts):
+            if not bucket_count:
+                continue
+            if seen + bucket_count >= rank:
+                lower = BUCKETS[idx - 1] if idx > 0 else 0.0
+                upper = BUCKETS[idx] if idx < len(BUCKETS) else self.max
+                frac = (rank - seen) / bucket_count
+                return min(lower + frac * (upper - lower), self.max)
+            seen += bucket_count
+        return self.max
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+
+    def observe(self, endpoint, stage, seconds):
+        key = (endpoint, stage)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = LatencyHistogram()
+            hist.observe(seconds)
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
+
+    def snapshot(self):
+        with self._lock:
+            items = sorted(self._histograms.items())
+            rows = []
+            for (endpoint, stage), hist in items:
+                rows.append({
+                    "endpoint": endpoint,
+                    "stage": stage,
+                    "count": hist.count,
+                    "mean": hist.total / hist.count if hist.count else None,
+                    "p50": hist.percentile(0.50),
+                    "p95": hist.percentile(0.95),
+                    "p99": hist.percentile(0.99),
+                    "max": hist.max,
+                })
+        return rows
+
+    def prometheus_text(self):
+        name = "lab_stage_duration_seconds"
+        lines = [
+            f"# HELP {name} Time spent in each request stage.",
+            f"# TYPE {name} histogram",
+        ]
+        with self._lock:
+            for (endpoint, stage), hist in sorted(self._histograms.items()):
+                labels = f'endpoint="{endpoint}",stage="{stage}"'
+                cumulative = 0
+                for bound, bucket_count in zip(BUCKETS, hist.counts):
+                    cumulative += bucket_count
+                    lines.append(f'{name}_bucket{{{labels},le="{bound:.6g}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {hist.count}')
+                lines.append(f"{name}_sum{{{labels}}} {hist.total:.9g}")
+                lines.append(f"{name}_count{{{labels}}} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ("endpoint", "name", "start")
+
+    def __init__(self, endpoint, name):
+        self.endpoint = endpoint
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        registry.observe(self.endpoint, self.name, time.perf_counter() - self.start)
+        return False
+
+
+def metrics_enabled():
+    return bool(current_app.config.get("METRICS_ENABLED"))
+
+
+def stage(name):
+    if not current_app.config.get("METRICS_ENABLED"):
+        return NULL_STAGE
+    endpoint = (request.endpoint if has_request_context() else g.get("request_endpoint")) or "unknown"
+    return _Stage(endpoint, name)
+
+
+def init_app(app):
+    app.config.setdefault(
+        "METRICS_ENABLED",
+        os.getenv("LAB_METRICS", "").lower() in ["1", "true", "yes"],
+    )
+
+    @app.before_request
+    def start_request_timer():
+        if app.config.get("METRICS_ENABLED"):
+            g._metrics_start = time.perf_counter()
+
+    @app.teardown_request
+    def record_request_time(exc=None):
+        start = g.pop("_metrics_start", None)
+        if start is not None:
+            registry.observe(request.endpoint or "unknown", "total", time.perf_counter() - start)
@@ -1,5 +1,6 @@
 from datetime import datetime
 from .extensions import db
+import sqlalchemy as sa
 from sqlalchemy.types import JSON
 
 class Experiment(db.Model):
@@ -8,11 +9,39 @@ class Experiment(db.Model):
     title = db.Column(db.String(128), nullable=False)
     # Stores the full config: theory, procedure, formulas, constants, I/O schema
     content = db.Column(JSON, nullable=False) 
+    # Latest snapshot in experiment_version; both are maintained by app/versions.py on every flush
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    content_hash = db.Column(db.String(16), nullable=True)
+
+    @property
+    def cache_key(self):
+        # Changes whenever the content does, without hashing the content again
+        return (self.id, self.version, self.content_hash)
 
     def __repr__(self):
         return f'<Experiment {self.title}>'
 
+class ExperimentVersion(db.Model):
+    # Immutable copy of an experiment's content, one per edit
+    id = db.Column(db.Integer, primary_key=True)
+    experiment_id = db.Column(db.Integer, db.ForeignKey('experiment.id'), nullable=False)
+    version = db.Column(db.Integer, nullable=False)
+    content_hash = db.Column(db.String(16), nullable=False)
+    title = db.Column(db.String(128), nullable=False)
+    content = db.Column(JSON, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    experiment = db.relationship('Experiment', backref=db.backref('versions', lazy='dynamic', order_by='ExperimentVersion.version'))
+
+    __table_args__ = (db.UniqueConstraint('experiment_id', 'version'),)
+
+    def __repr__(self):
+        return f'<ExperimentVersion {self.experiment_id} v{self.version}>'
+
 class StudentRun(db.Model):
+    # AUTOINCREMENT, so ids of deleted or archived runs are never handed out again
+    __table_args__ = {"sqlite_autoincrement": True}
+
     id = db.Column(db.Integer, primary_key=True)
     experiment_id = db.Column(db.Integer, db.ForeignKey('experiment.id'), nullable=False)
     student_name = db.Column(db.String(64), nullable=False)
@@ -22,8 +51,108 @@ class StudentRun(db.Model):
     # Store raw input values and computed results for persistence
     inputs = db.Column(JSON, nullable=False)
     results = db.Column(JSON, nullable=False)
+    # File name of the raw thermocouple log under TIMESERIES_DIR (see app/timeseries.py)
+    timeseries = db.Column(db.String(255), nullable=True)
+    # The experiment snapshot the results were calculated against
+    experiment_version_id = db.Column(db.Integer, db.ForeignKey('experiment_version.id'), nullable=True)
+    # Client-chosen key so a resubmitted save returns the existing run instead of a copy
+    idempotency_key = db.Column(db.String(64), nullable=True, unique=True, index=True)
 
     experiment = db.relationship('Experiment', backref=db.backref('runs', lazy=True))
 
     def __repr__(self):
         return f'<StudentRun {self.student_name} - {self.experiment.slug}>'
+
+class ArchivedRun(db.Model):
+    # Where an archived StudentRun lives in its compressed archive file (see app/archive.py).
+    # The id is the original run id, so links to the run keep working.
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    experiment_id = db.Column(db.Integer, db.ForeignKey('experiment.id'), nullable=False)
+    student_name = db.Column(db.String(64), nullable=False)
+    usn = db.Column(db.String(32), nullable=False)
+    date = db.Column(db.DateTime)
+    archive = db.Column(db.String(128), nullable=False)
+    offset = db.Column(db.Integer, nullable=False)
+    length = db.Column(db.Integer, nullable=False)
+
+    def __repr__(self):
+        return f'<ArchivedRun {self.id} in {self.archive}>'
+
+# Columns added after the first release; create_all() does not alter existing tables.
+SCHEMA_UPGRADES = [
+    ("student_run", "timeseries", "VARCHAR(255)"),
+    ("student_run", "idempotency_key", "VARCHAR(64)"),
+    ("student_run", "experiment_version_id", "INTEGER REFERENCES experiment_version (id)"),
+    ("experiment", "version", "INTEGER NOT NULL DEFAULT 1"),
+    ("experiment", "content_hash", "VARCHAR(16)"),
+]
+
+# SQLite can't add a UNIQUE column, so uniqueness for upgraded tables comes from an index.
+SCHEMA_INDEXES = [
+    ("ix_student_run_idempotency_key", "student_run", "idempotency_key", True),
+]
+
+# Columns superseded by another one: (table, column, UPDATE that carries their data over before the drop).
+SCHEMA_FOLDS = [
+    # Runs that only recorded the content hash point at a snapshot with that hash, where there is one.
+    ("student_run", "content_version",
+     "UPDATE student_run SET experiment_version_id = (SELECT min(v.id) FROM experiment_version v "
+     "WHERE v.experiment_id = student_run.experiment_id AND v.content_hash = student_run.content_version) "
+     "WHERE experiment_version_id IS NULL AND content_version IS NOT NULL"),
+]
+
+# Tables that need AUTOINCREMENT, with the tables whose ids the new sequence must start after.
+AUTOINCREMENT_TABLES = [
+    ("student_run", ["archived_run"]),
+]
+
+
+def _rebuild_with_autoincrement(conn, table, reserved_from, tables):
+    """Copy an SQLite table created without AUTOINCREMENT into one created from the model."""
+    sql = conn.execute(sa.text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                       {"name": table.name}).scalar()
+    if sql is None or "AUTOINCREMENT" in sql.upper():
+        return
+    columns = ", ".join(col["name"] for col in sa.inspect(conn).get_columns(table.name) if col["name"] in table.c)
+    # A copy in the app metadata, so its foreign keys resolve; it is only used for the DDL.
+    new = table.to_metadata(db.metadata, name=f"{table.name}_rebuild")
+    try:
+        conn.execute(sa.schema.CreateTable(new))
+    finally:
+        db.metadata.remove(new)
+    conn.execute(sa.text(f"INSERT INTO {new.name} ({columns}) SELECT {columns} FROM {table.name}"))
+    conn.execute(sa.text(f"DROP TABLE {table.name}"))
+    # Legacy mode leaves other triggers' references to the table name alone while it is missing.
+    conn.execute(sa.text("PRAGMA legacy_alter_table = ON"))
+    conn.execute(sa.text(f"ALTER TABLE {new.name} RENAME TO {table.name}"))
+    conn.execute(sa.text("PRAGMA legacy_alter_table = OFF"))
+    for index in table.indexes:
+        index.create(conn, checkfirst=True)
+    seq = max(conn.execute(sa.text(f"SELECT coalesce(max(id), 0) FROM {name}")).scalar()
+              for name in [table.name, *reserved_from] if name in tables)
+    conn.execute(sa.text("DELETE FROM sqlite_sequence WHERE name = :name"), {"name": table.name})
+    conn.execute(sa.text("INSERT INTO sqlite_sequence (name, seq) VALUES (:name, :seq)"),
+                 {"name": table.name, "seq": seq})
+
+
+def upgrade_schema():
+    inspector = sa.inspect(db.engine)
+    tables = set(inspector.get_table_names())
+    with db.engine.begin() as conn:
+        for table, column, ddl in SCHEMA_UPGRADES:
+            if table not in tables:
+                continue
+            if column not in {col["name"] for col in inspector.get_columns(table)}:
+                conn.execute(sa.text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+        for table, column, fold in SCHEMA_FOLDS:
+            if table in tables and column in {col["name"] for col in inspector.get_columns(table)}:
+                conn.execute(sa.text(fold))
+                conn.execute(sa.text(f"ALTER TABLE {table} DROP COLUMN {column}"))
+        if db.engine.dialect.name == "sqlite":
+            for name, reserved_from in AUTOINCREMENT_TABLES:
+                if name in tables:
+                    _rebuild_with_autoincrement(conn, db.metadata.tables[name], reserved_from, tables)
+        for name, table, column, unique in SCHEMA_INDEXES:
+            if table in tables:
+                kind = "UNIQUE INDEX" if unique else "INDEX"
+                conn.execute(sa.text(f"CREATE {kind} IF NOT EXISTS {name} ON {table} ({column})"))
@@ -0,0 +1,198 @@
+import cProfile
+import json
+import os
+import pstats
+import re
+import sys
+import threading
+from collections import Counter
+from datetime import datetime
+
+from flask import g, request
+
+
+SAMPLE_INTERVAL = 0.005
+MAX_REQUESTS = 100
+
+
+class _StackSampler(threading.Thread):
+    def __init__(self, thread_id, counts, interval=None):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.counts = counts
+        self.interval = interval or SAMPLE_INTERVAL
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.counts[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+class RequestProfiler:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Only one request is profiled at a time; concurrent matches are left alone.
+        self._busy = threading.Lock()
+        self.directory = None
+        self.armed = None
+
+    def arm(self, rule, count):
+        count = max(1, min(int(count), MAX_REQUESTS))
+        with self._lock:
+            self.armed = {
+                "rule": rule,
+                "count": count,
+                "done": 0,
+                "started": datetime.utcnow().isoformat(timespec="seconds"),
+                "stats": None,
+                "samples": Counter(),
+            }
+
+    def disarm(self):
+        with self._lock:
+            self.armed = None
+
+    def status(self):
+        with self._lock:
+            if not self.armed:
+                return None
+            return {key: self.armed[key] for key in ["rule", "count", "done", "started"]}
+
+    def start(self, rule):
+        armed = self.armed
+        if not armed or armed["rule"] != rule:
+            return None
+        if not self._busy.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        samples = Counter()
+        sampler = _StackSampler(threading.get_ident(), samples)
+        sampler.start()
+        profile.enable()
+        # Captures from pool workers that ran calculations for this request (see ``follow``).
+        workers = []
+        return profile, sampler, samples, workers
+
+    def follow(self, capture):
+        """Profile the current worker thread on behalf of the request that owns ``capture``."""
+        profile = cProfile.Profile()
+        samples = Counter()
+        sampler = _StackSampler(threading.get_ident(), samples)
+        sampler.start()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+ allows one profiler at a time, and the request's already covers every thread.
+            profile = None
+        return profile, sampler, samples
+
+    def unfollow(self, capture, worker):
+        profile, sampler, samples = worker
+        if profile is not None:
+            profile.disable()
+        sampler.stop()
+        capture[3].append((profile, samples))
+
+    def finish(self, capture):
+        profile, sampler, samples, workers = capture
+        profile.disable()
+        sampler.stop()
+        try:
+            with self._lock:
+                armed = self.armed
+                if not armed:
+                    return None
+                if armed["stats"] is None:
+                    armed["stats"] = pstats.Stats(profile)
+                else:
+                    armed["stats"].add(profile)
+                armed["samples"].update(samples)
+                for worker_profile, worker_samples in workers:
+                    if worker_profile is not None:
+                        armed["stats"].add(worker_profile)
+                    armed["samples"].update(worker_samples)
+                armed["done"] += 1
+                if armed["done"] < armed["count"]:
+                    return None
+                self.armed = None
+            return self._save(armed)
+        finally:
+            self._busy.release()
+
+    def _save(self, armed):
+        os.makedirs(self.directory, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", armed["rule"]).strip("-") or "root"
+        capture_id = f"{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}-{slug}"
+        suffix = 1
+        while os.path.exists(os.path.join(self.directory, capture_id + ".json")):
+            suffix += 1
+            capture_id = f"{capture_id.rsplit('--', 1)[0]}--{suffix}"
+        base = os.path.join(self.directory, capture_id)
+
+        armed["stats"].dump_stats(base + ".pstats")
+        with open(base + ".collapsed", "w", encoding="utf-8") as fh:
+            for stack, hits in sorted(armed["samples"].items()):
+                fh.write(f"{stack} {hits}\n")
+        meta = {
+            "id": capture_id,
+            "rule": armed["rule"],
+            "requests": armed["done"],
+            "started": armed["started"],
+            "finished": datetime.utcnow().isoformat(timespec="seconds"),
+            "samples": sum(armed["samples"].values()),
+            "sample_interval_ms": SAMPLE_INTERVAL * 1000,
+        }
+        with open(base + ".json", "w", encoding="utf-8") as fh:
+            json.dump(meta, fh, indent=2)
+        return meta
+
+    def captures(self):
+        if not self.directory or not os.path.isdir(self.directory):
+            return []
+        items = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, name), encoding="utf-8") as fh:
+                    items.append(json.load(fh))
+            except (OSError, ValueError):
+                continue
+        return sorted(items, key=lambda item: item.get("id", ""), reverse=True)
+
+    def capture_path(self, capture_id, fmt):
+        if fmt not in ["pstats", "collapsed"] or not re.match(r"^[A-Za-z0-9-]+$", capture_id):
+            return None
+        path = os.path.join(self.directory, f"{capture_id}.{fmt}")
+        return path if os.path.isfile(path) else None
+
+
+profiler = RequestProfiler()
+
+
+def init_app(app):
+    profiler.directory = os.path.join(app.instance_path, "profiles")
+
+    @app.before_request
+    def start_profiling():
+        if profiler.armed and request.url_rule is not None:
+            capture = profiler.start(request.url_rule.rule)
+            if capture:
+                g._profile_capture = capture
+
+    @app.teardown_request
+    def stop_profiling(exc=None):
+        capture = g.pop("_profile_capture", None)
+        if capture is not None:
+            profiler.finish(capture)
@@ -0,0 +1,86 @@
+"""What a saved run keeps of its calculation.
+
+With ``RUN_STORAGE = "full"`` (the default) ``StudentRun.results`` holds the
+results, normalized inputs, warnings and trace. With ``"slim"`` it holds only
+the top-level scalar results and the warnings::
+
+    {"slim": true, "results": {"k_avg": 273.0, ...}, "warnings": [...]}
+
+Natural-convection results also keep each trial's ``h_exp``,
+``h_theoretical`` and ``nu_nusselt`` and the mean ``h`` values.
+
+Everything else is derivable from the stored canonical inputs and the
+experiment constants, so :func:`full_results` recalculates it the first time a
+view needs it and keeps it in an LRU. The recalculation uses the experiment
+snapshot the run was saved against (``experiment_version_id``), so later
+edits to the constants don't change old runs. Runs saved before snapshots
+existed use the current content.
+"""
+import numbers
+
+from flask import current_app
+
+from app.extensions import db
+from app.fragments import FragmentCache
+from app.models import ExperimentVersion
+from app.utils import calculate_experiment, mean_heat_transfer
+
+
+STORAGE_MODES = ("full", "slim")
+RESULT_PARTS = ("results", "normalized", "warnings", "trace")
+TRIAL_SCALARS = ("trial", "h_exp", "h_theoretical", "nu_nusselt")
+
+cache = FragmentCache()
+
+
+def key_scalars(results):
+    results = results or {}
+    scalars = {
+        key: val for key, val in results.items()
+        if isinstance(val, (numbers.Number, str)) and not isinstance(val, bool)
+    }
+    trials = results.get("trials")
+    if trials:
+        scalars["trials"] = [{key: trial.get(key) for key in TRIAL_SCALARS} for trial in trials]
+        scalars.update(mean_heat_transfer(trials))
+    return scalars
+
+
+def stored_results(calc_res, mode=None):
+    mode = mode or current_app.config["RUN_STORAGE"]
+    if mode == "slim":
+        return {"slim": True, "results": key_scalars(calc_res.get("results")), "warnings": calc_res.get("warnings", [])}
+    return {part: calc_res.get(part, [] if part == "warnings" else {}) for part in RESULT_PARTS}
+
+
+def full_results(run):
+    """Full stored results for a run record (see ``app.archive.load_run``), recalculating slim ones."""
+    results = run["results"] or {}
+    experiment = run["experiment"]
+    if not results.get("slim") or experiment is None:
+        return results
+    version_id = run.get("experiment_version_id")
+    key = (experiment.id, run["id"], version_id or experiment.cache_key)
+    full = cache.get(key)
+    if full is None:
+        snapshot = db.session.get(ExperimentVersion, version_id) if version_id else None
+        calc = calculate_experiment(experiment.slug, run["inputs"], content=snapshot.content if snapshot else None)
+        if "error" in calc:
+            return {**results, "error": calc["error"]}
+        # Through the JSON provider, so the cached copy matches what a full row would hold.
+        json = current_app.json
+        full = json.loads(json.dumps({part: calc.get(part) for part in RESULT_PARTS}))
+        full["recalculated"] = True
+        # None for runs saved before snapshots existed, which can only use the current content.
+        full["version"] = snapshot.version if snapshot else None
+        cache.put(key, full)
+    return full
+
+
+def init_app(app):
+    app.config.setdefault("RUN_STORAGE", "full")
+    app.config.setdefault("RUN_RESULTS_CACHE_SIZE", 256)
+    if app.config["RUN_STORAGE"] not in STORAGE_MODES:
+        raise ValueError(f"RUN_STORAGE must be one of {', '.join(STORAGE_MODES)}.")
+    cache.maxsize = app.config["RUN_RESULTS_CACHE_SIZE"]
+    cache.invalidate()
@@ -0,0 +1,181 @@
+"""Full-text search over saved runs (student name, USN, experiment title).
+
+On SQLite with FTS5 the runs are mirrored into the ``student_run_search``
+virtual table, kept in sync by triggers on ``student_run``, ``archived_run``
+and ``experiment``, so archived runs are still found. Prefix queries use its
+prefix index. Fuzzy queries first match each word against the index vocabulary
+(``student_run_search_vocab``) with difflib, then search for the close terms,
+so a typo such as "jhon" still finds "John". Other databases fall back to a ``LIKE`` scan.
+"""
+import difflib
+import re
+
+import click
+import sqlalchemy as sa
+from flask.cli import with_appcontext
+
+from app.extensions import db
+
+
+SEARCH_TABLE = "student_run_search"
+RUN_TABLES = ("student_run", "archived_run")
+VOCAB_TABLE = "student_run_search_vocab"
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+MODES = ("prefix", "fuzzy")
+FUZZY_CUTOFF = 0.7
+FUZZY_TERMS = 8
+
+DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+    "student_name, usn, title, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {VOCAB_TABLE} USING fts5vocab({SEARCH_TABLE}, 'row')",
+]
+
+def _run_triggers(table):
+    return {
+        f"{table}_search_insert": f"""CREATE TRIGGER {table}_search_insert AFTER INSERT ON {table} BEGIN
+            INSERT INTO {SEARCH_TABLE} (rowid, student_name, usn, title)
+            VALUES (new.id, new.student_name, new.usn, (SELECT title FROM experiment WHERE id = new.experiment_id));
+        END""",
+        f"{table}_search_update": f"""CREATE TRIGGER {table}_search_update
+            AFTER UPDATE OF student_name, usn, experiment_id ON {table} BEGIN
+            DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id;
+            INSERT INTO {SEARCH_TABLE} (rowid, student_name, usn, title)
+            VALUES (new.id, new.student_name, new.usn, (SELECT title FROM experiment WHERE id = new.experiment_id));
+        END""",
+        f"{table}_search_delete": f"""CREATE TRIGGER {table}_search_delete AFTER DELETE ON {table} BEGIN
+            DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id;
+        END""",
+    }
+
+
+# Archiving deletes a run from student_run and inserts it into archived_run, so it stays indexed.
+TRIGGERS = {**_run_triggers("student_run"), **_run_triggers("archived_run")}
+TRIGGERS["student_run_search_title"] = f"""CREATE TRIGGER student_run_search_title
+    AFTER UPDATE OF title ON experiment BEGIN
+    UPDATE {SEARCH_TABLE} SET title = new.title WHERE rowid IN (
+        SELECT id FROM student_run WHERE experiment_id = new.id
+        UNION ALL SELECT id FROM archived_run WHERE experiment_id = new.id);
+END"""
+
+REBUILD = [f"DELETE FROM {SEARCH_TABLE}"] + [
+    f"""INSERT INTO {SEARCH_TABLE} (rowid, student_name, usn, title)
+        SELECT r.id, r.student_name, r.usn, e.title FROM {table} r LEFT JOIN experiment e ON e.id = r.experiment_id"""
+    for table in RUN_TABLES
+]
+
+RESULT_COLUMNS = "r.id, r.student_name, r.usn, e.title, e.slug, r.date, r.archived"
+# Archived ids are never reused (AUTOINCREMENT), so the two tables never share an id.
+RUNS = ("(SELECT id, experiment_id, student_name, usn, date, 0 AS archived FROM student_run "
+        "UNION ALL SELECT id, experiment_id, student_name, usn, date, 1 FROM archived_run)")
+# Primary-key lookups into both tables, so FTS5 can still stop after ``limit`` rowids.
+FTS_RUN = ("SELECT s.rowid, coalesce(r.student_name, a.student_name), coalesce(r.usn, a.usn), e.title, e.slug, "
+           "coalesce(r.date, a.date), a.id IS NOT NULL "
+           f"FROM {SEARCH_TABLE} s LEFT JOIN student_run r ON r.id = s.rowid "
+           "LEFT JOIN archived_run a ON a.id = s.rowid "
+           "JOIN experiment e ON e.id = coalesce(r.experiment_id, a.experiment_id)")
+
+
+def fts_available(engine):
+    if engine.dialect.name != "sqlite":
+        return False
+    with engine.connect() as conn:
+        return bool(conn.execute(sa.text("SELECT sqlite_compileoption_used('ENABLE_FTS5')")).scalar())
+
+
+def install(engine):
+    """Create the search table and triggers if missing; index existing runs the first time."""
+    if not fts_available(engine):
+        return False
+    with engine.begin() as conn:
+        existed = conn.execute(sa.text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": SEARCH_TABLE}).first()
+        triggers = {row[0] for row in conn.execute(sa.text("SELECT name FROM sqlite_master WHERE type = 'trigger'"))}
+        for ddl in DDL:
+            conn.execute(sa.text(ddl))
+        # Triggers are recreated each time, so changed definitions reach existing databases.
+        for name, ddl in TRIGGERS.items():
+            conn.execute(sa.text(f"DROP TRIGGER IF EXISTS {name}"))
+            conn.execute(sa.text(ddl))
+        if not existed or "archived_run_search_insert" not in triggers:
+            for sql in REBUILD:
+                conn.execute(sa.text(sql))
+    return True
+
+
+def rebuild(engine):
+    with engine.begin() as conn:
+        for sql in REBUILD:
+            conn.execute(sa.text(sql))
+        conn.execute(sa.text(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('optimize')"))
+
+
+def query_words(text):
+    return [word.lower() for word in WORD_RE.findall(text or "")]
+
+
+def close_terms(conn, word):
+    """Indexed terms within a small edit distance of ``word``: same first letter, similar length."""
+    rows = conn.execute(sa.text(
+        f"SELECT term FROM {VOCAB_TABLE} WHERE term >= :lo AND term < :hi "
+        "AND length(term) BETWEEN :short AND :long"
+    ), {"lo": word[0], "hi": chr(ord(word[0]) + 1), "short": len(word) - 2, "long": len(word) + 2})
+    return difflib.get_close_matches(word, [row[0] for row in rows], n=FUZZY_TERMS, cutoff=FUZZY_CUTOFF)
+
+
+def match_expression(conn, words, mode):
+    parts = []
+    for word in words:
+        options = [f'"{word}"*']
+        if mode == "fuzzy":
+            options += [f'"{term}"' for term in close_terms(conn, word) if not term.startswith(word)]
+        parts.append(options[0] if len(options) == 1 else f"({' OR '.join(options)})")
+    return " AND ".join(parts)
+
+
+def _rows(result):
+    return [
+        {"id": row[0], "student_name": row[1], "usn": row[2], "experiment": row[3], "slug": row[4], "date": row[5],
+         "archived": bool(row[6])}
+        for row in result
+    ]
+
+
+def search(text, mode="prefix", limit=20):
+    """Runs matching every word of ``text``, newest first.
+
+    Ordering by rowid lets FTS5 stop after ``limit`` hits; bm25 ranking would
+    score every match, which is slow for words like an experiment title.
+    """
+    words = query_words(text)
+    if not words:
+        return []
+    engine = db.engine
+    with engine.connect() as conn:
+        if fts_available(engine):
+            sql = f"{FTS_RUN} WHERE {SEARCH_TABLE} MATCH :match ORDER BY s.rowid DESC LIMIT :limit"
+            return _rows(conn.execute(sa.text(sql), {"match": match_expression(conn, words, mode), "limit": limit}))
+        clauses, params = [], {"limit": limit}
+        for idx, word in enumerate(words):
+            params[f"w{idx}"] = f"%{word}%"
+            clauses.append(f"(lower(r.student_name) LIKE :w{idx} OR lower(r.usn) LIKE :w{idx} "
+                           f"OR lower(e.title) LIKE :w{idx})")
+        sql = (f"SELECT {RESULT_COLUMNS} FROM {RUNS} r JOIN experiment e ON e.id = r.experiment_id "
+               f"WHERE {' AND '.join(clauses)} ORDER BY r.id DESC LIMIT :limit")
+        return _rows(conn.execute(sa.text(sql), params))
+
+
+@click.command("rebuild-run-search")
+@with_appcontext
+def rebuild_run_search_command():
+    """Re-index every saved run for the admin run search."""
+    if not fts_available(db.engine):
+        click.echo("SQLite FTS5 is not available; run search uses LIKE queries instead.")
+        return
+    rebuild(db.engine)
+    click.echo("Run search index rebuilt.")
+
+
+def init_app(app):
+    app.config.setdefault("RUN_SEARCH_LIMIT", 50)
+    app.cli.add_command(rebuild_run_search_command)
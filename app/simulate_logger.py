@@ -0,0 +1,94 @@
+"""Simulated thermocouple data logger.
+
+Posts batches of readings to ``/api/stream/<stream>/ingest`` so the live
+panel on the experiment page can be used without hardware::
+
+    python -m app.simulate_logger --stream bench1 --rig rod
+"""
+import argparse
+import json
+import time
+import urllib.error
+import urllib.request
+
+import numpy as np
+
+
+# Steady-state temperatures (C) per channel; channels warm up from ambient
+# with a first-order lag, like the real rigs after switching the heater on.
+RIGS = {
+    "rod": {
+        "T1": 78.0, "T2": 71.5, "T3": 65.0, "T4": 58.5, "T5": 52.0,
+        "T6": 41.0, "T7": 38.5, "T8": 36.0, "T9": 33.5,
+        "T10": 26.0, "T11": 31.0, "T12": 30.0, "T13": 29.0,
+    },
+    "convection": {
+        "T1": 62.0, "T2": 66.5, "T3": 70.0, "T4": 73.0, "T5": 75.5, "T6": 77.0, "T7": 28.0,
+    },
+}
+
+
+class SimulatedLogger:
+    def __init__(self, rig="rod", ambient=27.0, tau=120.0, noise=0.15, seed=None):
+        self.targets = RIGS[rig]
+        self.names = list(self.targets)
+        self.steady = np.array([self.targets[name] for name in self.names])
+        self.ambient = ambient
+        self.tau = tau
+        self.noise = noise
+        self.rng = np.random.default_rng(seed)
+
+    def readings(self, elapsed):
+        elapsed = np.asarray(elapsed, dtype=float).reshape(-1, 1)
+        approach = 1.0 - np.exp(-elapsed / self.tau)
+        values = self.ambient + (self.steady - self.ambient) * approach
+        return values + self.rng.normal(0.0, self.noise, values.shape)
+
+    def batch(self, start, elapsed):
+        elapsed = np.asarray(elapsed, dtype=float)
+        values = self.readings(elapsed)
+        return {
+            "t": (start + elapsed).round(3).tolist(),
+            "channels": {name: values[:, idx].round(2).tolist() for idx, name in enumerate(self.names)},
+        }
+
+
+def post_batch(url, batch, token=None):
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["X-Logger-Token"] = token
+    req = urllib.request.Request(url, data=json.dumps(batch).encode("utf-8"), headers=headers, method="POST")
+    with urllib.request.urlopen(req, timeout=10) as resp:
+        return json.loads(resp.read())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:5000", help="Base URL of the lab app")
+    parser.add_argument("--stream", default="bench1", help="Stream (bench) id shown on the experiment page")
+    parser.add_argument("--rig", choices=sorted(RIGS), default="rod")
+    parser.add_argument("--rate", type=float, default=10.0, help="Samples per second per channel")
+    parser.add_argument("--batch-seconds", type=float, default=1.0, help="Seconds of readings per POST")
+    parser.add_argument("--tau", type=float, default=120.0, help="Warm-up time constant in seconds")
+    parser.add_argument("--duration", type=float, default=0.0, help="Stop after this many seconds (0 = run forever)")
+    parser.add_argument("--token", default=None, help="Value for STREAM_INGEST_TOKEN, if the app sets one")
+    args = parser.parse_args(argv)
+
+    logger = SimulatedLogger(args.rig, tau=args.tau)
+    url = f"{args.url.rstrip('/')}/api/stream/{args.stream}/ingest"
+    per_batch = max(1, int(round(args.rate * args.batch_seconds)))
+    start = time.time()
+    sent = 0.0
+    print(f"Sending {len(logger.names)} channels at {args.rate:g} Hz to {url}")
+    while not args.duration or sent < args.duration:
+        elapsed = sent + np.arange(per_batch) / args.rate
+        try:
+            post_batch(url, logger.batch(start, elapsed), args.token)
+        except (urllib.error.URLError, OSError) as e:
+            print(f"Send failed: {e}")
+        sent += per_batch / args.rate
+        time.sleep(max(0.0, start + sent - time.time()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,17 @@
+function typesetMath() {
+    if (window.MathJax && window.MathJax.typesetPromise) {
+        window.MathJax.typesetPromise();
+        return;
+    }
+    // MathJax is only loaded up front when the page itself had math the server could not render
+    if (!window.mathJaxSrc || document.getElementById('MathJax-script')) return;
+    const script = document.createElement('script');
+    script.id = 'MathJax-script';
+    script.async = true;
+    script.src = window.mathJaxSrc;
+    document.head.appendChild(script);
+}
+
 function calculateExperiment() {
     normalizeAllAirProps();
     const form = document.getElementById('calcForm');
@@ -5,23 +19,16 @@ function calculateExperiment() {
     const data = {};
     formData.forEach((value, key) => data[key] = value);
 
-    const inputs = {};
+    let inputs = {};
     for (const key in data) {
         if (key !== 'slug') inputs[key] = data[key];
     }
     if (data.slug === 'natural-convection-vertical-tube') {
-        inputs.observations = collectTrialsFromTable();
+        inputs = withoutTrialFields(inputs);
+        inputs.columns = collectTrialsFromTable();
     }
 
-    fetch('/api/calculate', {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({
-            slug: data.slug,
-            inputs: inputs
-        })
-    })
-        .then(response => response.json())
+    postCalculation(data.slug, inputs)
         .then(result => {
             if (result.success) {
                 document.getElementById('resultsArea').classList.remove('d-none');
@@ -54,9 +61,9 @@ function calculateExperiment() {
                 // Render Charts
                 renderCharts(result);
 
-                // Re-render MathJax for all updated content
-                if (window.MathJax && window.MathJax.typesetPromise) {
-                    window.MathJax.typesetPromise();
+                // Math is normally pre-rendered by the server; fall back to MathJax otherwise
+                if (result.math_pending !== false) {
+                    typesetMath();
                 }
 
                 // Switch tab
@@ -70,6 +77,63 @@ function calculateExperiment() {
         .catch(error => console.error('Error:', error));
 }
 
+// Inputs of the last successful calculation, so the next one only sends what changed
+let lastCalc = null;
+
+function trialsByNumber(columns) {
+    const trials = {};
+    if (!columns || !columns.trial) return trials;
+    columns.trial.forEach((trial, idx) => {
+        trials[trial] = {};
+        TRIAL_FIELDS.forEach(field => trials[trial][field] = columns[field][idx]);
+    });
+    return trials;
+}
+
+function calcDelta(slug, inputs) {
+    if (!lastCalc || lastCalc.slug !== slug || !lastCalc.token) return null;
+    const delta = { token: lastCalc.token, inputs: {}, trials: {} };
+    for (const key in inputs) {
+        if (key !== 'columns' && inputs[key] !== lastCalc.inputs[key]) delta.inputs[key] = inputs[key];
+    }
+    if (inputs.columns) {
+        const before = trialsByNumber(lastCalc.inputs.columns);
+        const now = trialsByNumber(inputs.columns);
+        for (const trial in now) {
+            const changed = {};
+            TRIAL_FIELDS.forEach(field => {
+                if (!(trial in before) || before[trial][field] !== now[trial][field]) changed[field] = now[trial][field];
+            });
+            if (Object.keys(changed).length) delta.trials[trial] = changed;
+        }
+        for (const trial in before) {
+            if (!(trial in now)) delta.trials[trial] = null;
+        }
+    }
+    return delta;
+}
+
+function postCalculation(slug, inputs) {
+    const delta = calcDelta(slug, inputs);
+    return fetch('/api/calculate', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(delta ? { slug: slug, delta: delta } : { slug: slug, inputs: inputs })
+    })
+        .then(response => {
+            // The server forgot our previous result (restart, eviction); send everything again
+            if (response.status === 409 && delta) {
+                lastCalc = null;
+                return postCalculation(slug, inputs);
+            }
+            return response.json();
+        })
+        .then(result => {
+            lastCalc = result.success ? { slug: slug, inputs: inputs, token: result.calc_token } : null;
+            return result;
+        });
+}
+
 function fmtVal(value) {
     if (value === null || value === undefined || isNaN(value)) return '-';
     const num = Number(value);
@@ -609,6 +673,20 @@ function renderCharts(result) {
     }
 
     if (compCanvas) compCanvas.style.display = 'none';
+    if (data.type === 'formula') {
+        myChart = new Chart(ctx, {
+            type: 'bar',
+            data: {
+                labels: data.labels || [],
+                datasets: [{
+                    label: 'Computed Values',
+                    data: data.values || [],
+                    backgroundColor: 'rgba(54, 162, 235, 0.6)'
+                }]
+            }
+        });
+        return;
+    }
     myChart = new Chart(ctx, {
         type: 'line',
         data: {
@@ -634,58 +712,119 @@ function renderCharts(result) {
     });
 }
 
+// Slider input events fire continuously; requests are debounced, the one in
+// flight is aborted when a newer position is sent, and responses that arrive
+// out of order are dropped by sequence number.
+const SIM_DEBOUNCE_MS = 120;
+let simTimer = null;
+let simController = null;
+let simSeq = 0;
+let simRenderedSeq = 0;
+
 function updateSim() {
     const slugInput = document.querySelector('input[name="slug"]');
     const slug = slugInput ? slugInput.value : 'therm-conductivity-metal-rod';
 
+    if (slug === 'natural-convection-vertical-tube') {
+        document.getElementById('simQVal').innerText = document.getElementById('simQ').value;
+        document.getElementById('simDeltaTVal').innerText = document.getElementById('simDeltaT').value;
+    } else if (!document.getElementById('simSweepInput')) {
+        document.getElementById('simFlowVal').innerText = document.getElementById('simFlow').value;
+        document.getElementById('simHeatVal').innerText = document.getElementById('simHeat').value;
+    }
+
+    clearTimeout(simTimer);
+    simTimer = setTimeout(() => runSim(slug), SIM_DEBOUNCE_MS);
+}
+
+function postSim(payload, render) {
+    if (simController) simController.abort();
+    simController = new AbortController();
+    const seq = ++simSeq;
+
+    fetch('/api/simulate', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(payload),
+        signal: simController.signal
+    })
+        .then(res => res.json())
+        .then(data => {
+            if (seq < simRenderedSeq) return;
+            simRenderedSeq = seq;
+            render(data);
+        })
+        .catch(error => {
+            if (error.name !== 'AbortError') console.error('Simulation error:', error);
+        });
+}
+
+function runSim(slug) {
     if (slug === 'natural-convection-vertical-tube') {
         const q = parseFloat(document.getElementById('simQ').value || 100);
         const deltaT = parseFloat(document.getElementById('simDeltaT').value || 30);
         const dTube = parseFloat(document.getElementById('simDTube').value || 0.038);
         const lTube = parseFloat(document.getElementById('simLTube').value || 0.5);
 
-        document.getElementById('simQVal').innerText = q;
-        document.getElementById('simDeltaTVal').innerText = deltaT;
+        postSim({ slug: slug, q: q, delta_t: deltaT, d_tube: dTube, l_tube: lTube }, data => {
+            renderSimChart(data.q, data.h, 'Power (W)', 'h (W/m^2K)');
+        });
+        return;
+    }
 
-        fetch('/api/simulate', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ slug: slug, q: q, delta_t: deltaT, d_tube: dTube, l_tube: lTube })
-        })
-            .then(res => res.json())
-            .then(data => {
-                renderSimChart(data.q, data.h, 'Power (W)', 'h (W/m^2K)');
-            });
+    const sweepInput = document.getElementById('simSweepInput');
+    if (sweepInput) {
+        const form = document.getElementById('calcForm');
+        const inputs = {};
+        new FormData(form).forEach((value, key) => {
+            if (key !== 'slug') inputs[key] = value;
+        });
+        const output = document.getElementById('simSweepOutput').value;
+
+        postSim({
+            slug: slug,
+            inputs: inputs,
+            sweep: {
+                input: sweepInput.value,
+                min: document.getElementById('simSweepMin').value,
+                max: document.getElementById('simSweepMax').value,
+                points: 20
+            }
+        }, data => {
+            if (!data.outputs) return;
+            const unit = data.units && data.units[output] ? ` (${data.units[output]})` : '';
+            renderSimChart(data.x, data.outputs[output] || [], sweepInput.value, output + unit);
+        });
         return;
     }
 
     const flow = document.getElementById('simFlow').value;
     const heat = document.getElementById('simHeat').value;
 
-    document.getElementById('simFlowVal').innerText = flow;
-    document.getElementById('simHeatVal').innerText = heat;
-
-    fetch('/api/simulate', {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ slug: slug, flow: flow, watts: heat })
-    })
-        .then(res => res.json())
-        .then(data => {
-            renderSimChart(data.x, data.temps, 'Distance (m)', 'Temp C');
-        });
+    postSim({ slug: slug, flow: flow, watts: heat }, data => {
+        renderSimChart(data.x, data.temps, 'Distance (m)', 'Temp C');
+    });
 }
 
 let simChart = null;
 function renderSimChart(labels, data, xLabel, yLabel) {
-    const ctx = document.getElementById('simChart').getContext('2d');
-    if (simChart) simChart.destroy();
-
     const lbls = labels.map(x => {
         if (typeof x === 'number') return x.toFixed(2);
         return x;
     });
 
+    if (simChart) {
+        // Update in place instead of rebuilding the chart on every slider step.
+        simChart.data.labels = lbls;
+        simChart.data.datasets[0].data = data;
+        simChart.data.datasets[0].label = yLabel || 'Simulated';
+        simChart.options.scales.y.title.text = yLabel || 'Value';
+        simChart.options.scales.x.title.text = xLabel || 'X';
+        simChart.update('none');
+        return;
+    }
+
+    const ctx = document.getElementById('simChart').getContext('2d');
     simChart = new Chart(ctx, {
         type: 'line',
         data: {
@@ -708,34 +847,235 @@ function renderSimChart(labels, data, xLabel, yLabel) {
     });
 }
 
+let liveSource = null;
+let liveLatest = {};
+
+function setLiveStatus(text) {
+    document.getElementById('liveStatus').innerText = text;
+}
+
+function toggleLiveStream() {
+    const button = document.getElementById('liveConnectBtn');
+    if (liveSource) {
+        liveSource.close();
+        liveSource = null;
+        button.innerText = 'Connect';
+        setLiveStatus('Not connected');
+        return;
+    }
+    const streamId = document.getElementById('liveStreamId').value.trim();
+    if (!streamId) return;
+    liveSource = new EventSource(`/api/stream/${encodeURIComponent(streamId)}/events`);
+    button.innerText = 'Disconnect';
+    setLiveStatus('Waiting for data...');
+    liveSource.addEventListener('reading', event => {
+        const snapshot = JSON.parse(event.data);
+        liveLatest = snapshot.channels || {};
+        renderLiveChannels();
+        renderSteadyState(snapshot.steady);
+    });
+    // EventSource reconnects on its own; just reflect the state.
+    liveSource.onerror = () => setLiveStatus('Reconnecting...');
+}
+
+function renderSteadyState(steady) {
+    const badge = document.getElementById('liveSteadyBadge');
+    badge.classList.remove('d-none', 'bg-warning', 'text-dark', 'bg-success');
+    badge.classList.add(...(steady ? ['bg-success'] : ['bg-warning', 'text-dark']));
+    badge.innerText = steady ? 'Steady state' : 'Not steady';
+    document.getElementById('liveSteadyBtn').disabled = !steady;
+}
+
+function fillFromSteady() {
+    const streamId = document.getElementById('liveStreamId').value.trim();
+    const slug = document.querySelector('input[name="slug"]').value;
+    fetch(`/api/stream/${encodeURIComponent(streamId)}/steady?slug=${encodeURIComponent(slug)}`)
+        .then(res => res.json())
+        .then(status => {
+            if (!status.inputs) {
+                setLiveStatus('No steady-state snapshot yet');
+                return;
+            }
+            const form = document.getElementById('calcForm');
+            let values = status.inputs;
+            let prefix = '';
+            if (values.observations) {
+                const rows = form.querySelectorAll('#trialTable tbody tr');
+                const lastName = rows.length ? rows[rows.length - 1].querySelector('input').name : '';
+                prefix = lastName.replace(/[^_]+$/, '');
+                values = values.observations[0];
+            }
+            let filled = 0;
+            Object.keys(values).forEach(key => {
+                const input = form.querySelector(`input[name="${prefix}${key}"]`);
+                if (!input) return;
+                input.value = values[key];
+                filled += 1;
+            });
+            setLiveStatus(`Filled ${filled} field(s) with steady-state averages`);
+        })
+        .catch(error => console.error('Error:', error));
+}
+
+function channelNumber(name) {
+    const match = /^T(\d+)$/i.exec(name);
+    return match ? parseInt(match[1], 10) : null;
+}
+
+function renderLiveChannels() {
+    const container = document.getElementById('liveChannels');
+    const names = Object.keys(liveLatest).sort((a, b) => (channelNumber(a) || 0) - (channelNumber(b) || 0));
+    container.innerHTML = names.map(name => {
+        const value = liveLatest[name].value;
+        const text = value === null || Number.isNaN(value) ? '--' : value.toFixed(2);
+        return `<span class="badge bg-secondary fs-6">${name}: ${text}</span>`;
+    }).join('');
+    const newest = Math.max(...names.map(name => liveLatest[name].t));
+    setLiveStatus(names.length ? `Updated ${new Date(newest * 1000).toLocaleTimeString()}` : 'Waiting for data...');
+    document.getElementById('liveFillBtn').disabled = names.length === 0;
+}
+
+function liveTargetInput(number) {
+    const form = document.getElementById('calcForm');
+    const trialRows = form.querySelectorAll('#trialTable tbody tr');
+    if (trialRows.length) {
+        // Natural convection: readings go into the last trial row.
+        return trialRows[trialRows.length - 1].querySelector(`input[name$="_t${number}"]`);
+    }
+    const byName = form.querySelector(`input[name="t${number}"]`);
+    if (byName) return byName;
+    // Fields such as "Water Inlet T10" are matched by the channel in their label.
+    for (const row of form.querySelectorAll('.field-row')) {
+        const label = row.querySelector('label');
+        if (label && new RegExp(`\\bT${number}\\b`).test(label.innerText)) {
+            return row.querySelector('input');
+        }
+    }
+    return null;
+}
+
+function fillFromLive() {
+    let filled = 0;
+    Object.keys(liveLatest).forEach(name => {
+        const number = channelNumber(name);
+        const value = liveLatest[name].value;
+        if (number === null || value === null || Number.isNaN(value)) return;
+        const input = liveTargetInput(number);
+        if (!input) return;
+        input.value = value.toFixed(2);
+        filled += 1;
+    });
+    setLiveStatus(`Filled ${filled} field(s) from the logger`);
+}
+
+// Saves waiting to reach the server; kept in localStorage so they survive going offline or reloading
+const SAVE_QUEUE_KEY = 'labSaveQueue';
+const SAVE_BATCH_SIZE = 20;
+let saveFlush = null;
+
+function loadSaveQueue() {
+    try {
+        return JSON.parse(localStorage.getItem(SAVE_QUEUE_KEY)) || [];
+    } catch (e) {
+        return [];
+    }
+}
+
+function storeSaveQueue(queue) {
+    try {
+        localStorage.setItem(SAVE_QUEUE_KEY, JSON.stringify(queue));
+    } catch (e) {
+        console.error('Could not keep pending saves:', e);
+    }
+}
+
+// A fresh key per Save click, kept with the queued run so retried uploads of it are stored only once
+function newIdempotencyKey() {
+    if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+    // randomUUID needs a secure context; the lab PCs may open the app over plain http
+    return Array.from(crypto.getRandomValues(new Uint8Array(16)), b => b.toString(16).padStart(2, '0')).join('');
+}
+
+function queueSave(item) {
+    const queue = loadSaveQueue();
+    if (!queue.some(queued => queued.idempotency_key === item.idempotency_key)) queue.push(item);
+    storeSaveQueue(queue);
+}
+
+// Upload queued saves in batches; resolves to {idempotency_key: result} for the saves the server answered
+function flushSaveQueue() {
+    if (saveFlush) return saveFlush.then(() => flushSaveQueue());
+    const answered = {};
+    const sendBatch = size => {
+        const batch = loadSaveQueue().slice(0, size);
+        if (!batch.length || !navigator.onLine) return answered;
+        const settle = results => {
+            const done = new Set();
+            results.forEach((result, idx) => {
+                // Keep runs the server couldn't take right now (busy, timed out) for the next flush
+                if (!result.success && result.status >= 500) return;
+                done.add(batch[idx].idempotency_key);
+                answered[batch[idx].idempotency_key] = result;
+            });
+            storeSaveQueue(loadSaveQueue().filter(item => !done.has(item.idempotency_key)));
+            return done.size ? sendBatch(SAVE_BATCH_SIZE) : answered;
+        };
+        return fetch('/api/save_runs', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ runs: batch })
+        })
+            .then(response => response.json().then(reply => {
+                if (reply.success) return settle(reply.results);
+                if (response.status === 413 && batch.length > 1) return sendBatch(Math.ceil(batch.length / 2));
+                if (response.status >= 400 && response.status < 500 && response.status !== 429) {
+                    // The server will never accept this batch as sent
+                    return settle(batch.map(() => ({ success: false, error: reply.error, status: response.status })));
+                }
+                throw new Error(reply.error);
+            }));
+    };
+    saveFlush = Promise.resolve()
+        .then(() => sendBatch(SAVE_BATCH_SIZE))
+        .catch(error => {
+            console.error('Saving queued runs failed:', error);
+            return answered;
+        })
+        .finally(() => { saveFlush = null; });
+    return saveFlush;
+}
+
 function saveRun() {
     normalizeAllAirProps();
     const form = document.getElementById('calcForm');
     const formData = new FormData(form);
-    const data = {};
+    let data = {};
     formData.forEach((value, key) => data[key] = value);
 
     if (data.slug === 'natural-convection-vertical-tube') {
-        data.observations = collectTrialsFromTable();
+        data = withoutTrialFields(data);
+        data.columns = collectTrialsFromTable();
     }
 
-    fetch('/api/save_run', {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({
-            slug: data.slug,
-            formData: data
-        })
-    })
-        .then(response => response.json())
-        .then(result => {
-            if (result.success) {
-                alert('Run saved successfully! Run ID: ' + result.id);
-            } else {
-                alert('Error saving run: ' + result.error);
-            }
-        })
-        .catch(error => console.error('Error:', error));
+    const item = {
+        slug: data.slug,
+        formData: data,
+        // Store the live logger history with the run when connected
+        stream_id: liveSource ? document.getElementById('liveStreamId').value.trim() : null
+    };
+    item.idempotency_key = newIdempotencyKey();
+    queueSave(item);
+
+    flushSaveQueue().then(answered => {
+        const result = answered[item.idempotency_key];
+        if (!result) {
+            alert('The run could not be uploaded right now. It is kept on this device and will be uploaded automatically.');
+        } else if (result.success) {
+            alert((result.duplicate ? 'Run already saved. Run ID: ' : 'Run saved successfully! Run ID: ') + result.id + (result.timeseries ? ' (with logger data)' : ''));
+        } else {
+            alert('Error saving run: ' + result.error);
+        }
+    });
 }
 
 function generatePDF() {
@@ -776,7 +1116,7 @@ function generatePDF() {
     if (slug === 'natural-convection-vertical-tube') {
         const obsInput = document.createElement('input');
         obsInput.type = 'hidden';
-        obsInput.name = 'observations';
+        obsInput.name = 'columns';
         obsInput.value = JSON.stringify(collectTrialsFromTable());
         pdfForm.appendChild(obsInput);
     }
@@ -803,32 +1143,33 @@ function updateAirPropsVisibility() {
     });
 }
 
+// Trials are sent column-wise ({trial: [...], v: [...], ..., t7: [...]}) so the server
+// can load each field straight into an array.
+const TRIAL_FIELDS = ['v', 'i', 't1', 't2', 't3', 't4', 't5', 't6', 't7'];
+
 function collectTrialsFromTable() {
+    const columns = { trial: [] };
+    TRIAL_FIELDS.forEach(field => columns[field] = []);
     const tbody = document.getElementById('trialTableBody');
-    if (!tbody) return [];
-    const rows = Array.from(tbody.querySelectorAll('tr'));
-    return rows.map((row, idx) => {
+    if (!tbody) return columns;
+    tbody.querySelectorAll('tr').forEach((row, idx) => {
         const trial = parseInt(row.dataset.trial || (idx + 1), 10);
-        const getVal = (name) => {
-            const input = row.querySelector(`input[name="${name}"]`);
-            if (!input) return null;
-            if (input.value === '') return null;
-            const num = parseFloat(input.value);
-            return Number.isNaN(num) ? null : num;
-        };
-        return {
-            trial: trial,
-            v: getVal(`trial_${trial}_v`),
-            i: getVal(`trial_${trial}_i`),
-            t1: getVal(`trial_${trial}_t1`),
-            t2: getVal(`trial_${trial}_t2`),
-            t3: getVal(`trial_${trial}_t3`),
-            t4: getVal(`trial_${trial}_t4`),
-            t5: getVal(`trial_${trial}_t5`),
-            t6: getVal(`trial_${trial}_t6`),
-            t7: getVal(`trial_${trial}_t7`)
-        };
+        columns.trial.push(trial);
+        TRIAL_FIELDS.forEach(field => {
+            const input = row.querySelector(`input[name="trial_${trial}_${field}"]`);
+            const num = input && input.value !== '' ? parseFloat(input.value) : NaN;
+            columns[field].push(Number.isNaN(num) ? null : num);
+        });
     });
+    return columns;
+}
+
+function withoutTrialFields(data) {
+    const out = {};
+    for (const key in data) {
+        if (!key.startsWith('trial_')) out[key] = data[key];
+    }
+    return out;
 }
 
 function addTrialRow() {
@@ -867,6 +1208,8 @@ document.addEventListener('DOMContentLoaded', () => {
         updateAirPropsVisibility();
     }
     initAirPropsInputs();
+    window.addEventListener('online', flushSaveQueue);
+    if (loadSaveQueue().length) flushSaveQueue();
     if (document.getElementById('simChart')) {
         updateSim();
     }
@@ -0,0 +1,165 @@
+import math
+import re
+from collections import deque
+
+
+CHANNEL_NUMBER_RE = re.compile(r"^T(\d+)$", re.IGNORECASE)
+
+# Thermocouple channel -> calculator input for the rod rig. T10/T11 are the water inlet/outlet.
+THERM_CHANNEL_INPUTS = {10: "t_wi", 11: "t_wo"}
+
+
+class RollingStats:
+    """Mean, variance and least-squares slope of (t, y) over a sliding time window.
+
+    Running sums are updated in O(1) per sample; they are rebuilt from the
+    window once as many samples have been evicted as it holds, which keeps
+    the amortized cost O(1) and stops floating-point drift from accumulating.
+    """
+
+    __slots__ = ("window", "samples", "t_ref", "n", "sx", "sy", "sxx", "sxy", "syy", "evicted")
+
+    def __init__(self, window):
+        self.window = window
+        self.samples = deque()
+        self.t_ref = None
+        self.evicted = 0
+        self._zero()
+
+    def _zero(self):
+        self.n = 0
+        self.sx = self.sy = self.sxx = self.sxy = self.syy = 0.0
+
+    def _add(self, x, y, sign):
+        self.n += sign
+        self.sx += sign * x
+        self.sy += sign * y
+        self.sxx += sign * x * x
+        self.sxy += sign * x * y
+        self.syy += sign * y * y
+
+    def _rebuild(self):
+        # Re-centre times on the oldest sample so the sums stay well conditioned.
+        self.t_ref = self.samples[0][0] if self.samples else None
+        self._zero()
+        for t, y in self.samples:
+            self._add(t - self.t_ref, y, 1)
+        self.evicted = 0
+
+    def push(self, t, y):
+        if not math.isfinite(y):
+            return
+        if self.t_ref is None:
+            self.t_ref = t
+        self.samples.append((t, y))
+        self._add(t - self.t_ref, y, 1)
+        cutoff = t - self.window
+        while self.samples and self.samples[0][0] < cutoff:
+            old_t, old_y = self.samples.popleft()
+            self._add(old_t - self.t_ref, old_y, -1)
+            self.evicted += 1
+        if self.evicted >= len(self.samples):
+            self._rebuild()
+
+    @property
+    def span(self):
+        return self.samples[-1][0] - self.samples[0][0] if self.samples else 0.0
+
+    @property
+    def mean(self):
+        return self.sy / self.n if self.n else None
+
+    @property
+    def variance(self):
+        if self.n < 2:
+            return None
+        return max(0.0, (self.syy - self.sy * self.sy / self.n) / (self.n - 1))
+
+    @property
+    def slope(self):
+        if self.n < 2:
+            return None
+        denom = self.n * self.sxx - self.sx * self.sx
+        if denom <= 0:
+            return None
+        return (self.n * self.sxy - self.sx * self.sy) / denom
+
+
+class SteadyStateDetector:
+    def __init__(self, window=120.0, max_drift=0.2, max_std=0.5, min_samples=10):
+        self.window = window
+        self.max_drift = max_drift  # C per minute
+        self.max_std = max_std
+        self.min_samples = min_samples
+        self.channels = {}
+        self.steady_since = None
+        self.snapshot = None
+
+    def update(self, times, columns):
+        for name, values in columns.items():
+            stats = self.channels.get(name)
+            if stats is None:
+                stats = self.channels[name] = RollingStats(self.window)
+            for t, y in zip(times, values):
+                stats.push(float(t), float(y))
+        self._check(float(times[-1]) if len(times) else None)
+
+    def channel_status(self, stats):
+        std = math.sqrt(stats.variance) if stats.variance is not None else None
+        drift = stats.slope * 60.0 if stats.slope is not None else None
+        steady = (
+            stats.n >= self.min_samples
+            and stats.span >= 0.9 * self.window
+            and drift is not None and abs(drift) <= self.max_drift
+            and std is not None and std <= self.max_std
+        )
+        return {
+            "mean": stats.mean,
+            "std": std,
+            "drift_per_min": drift,
+            "count": stats.n,
+            "steady": steady,
+        }
+
+    def _check(self, now):
+        statuses = {name: self.channel_status(stats) for name, stats in self.channels.items()}
+        steady = bool(statuses) and all(item["steady"] for item in statuses.values())
+        if not steady:
+            self.steady_since = None
+            return
+        if self.steady_since is None:
+            self.steady_since = now
+            # Averages over the window at the moment every channel settled.
+            self.snapshot = {
+                "t": now,
+                "means": {name: item["mean"] for name, item in statuses.items()},
+            }
+
+    def status(self):
+        channels = {name: self.channel_status(stats) for name, stats in self.channels.items()}
+        return {
+            "steady": self.steady_since is not None,
+            "steady_since": self.steady_since,
+            "window": self.window,
+            "max_drift": self.max_drift,
+            "max_std": self.max_std,
+            "channels": channels,
+            "snapshot": self.snapshot,
+        }
+
+
+def steady_inputs(slug, means):
+    """Map averaged channel readings onto the calculator input format for ``slug``."""
+    by_number = {}
+    for name, value in (means or {}).items():
+        match = CHANNEL_NUMBER_RE.match(str(name))
+        if match and value is not None:
+            by_number[int(match.group(1))] = round(float(value), 2)
+
+    if slug == "natural-convection-vertical-tube":
+        trial = {"trial": 1}
+        trial.update({f"t{num}": by_number[num] for num in range(1, 8) if num in by_number})
+        return {"observations": [trial]}
+    if slug == "therm-conductivity-metal-rod":
+        return {THERM_CHANNEL_INPUTS.get(num, f"t{num}"): value for num, value in sorted(by_number.items())}
+    return {f"t{num}": value for num, value in sorted(by_number.items())}
@@ -0,0 +1,232 @@
+import re
+import threading
+import time
+
+import numpy as np
+
+from app.steady_state import SteadyStateDetector
+
+
+STREAM_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+CHANNEL_RE = re.compile(r"^[A-Za-z0-9_]{1,32}$")
+
+
+class StreamError(ValueError):
+    pass
+
+
+class BatchTooLarge(StreamError):
+    pass
+
+
+class RingBuffer:
+    """Fixed-size (time, value) history for one channel, stored in preallocated arrays."""
+
+    __slots__ = ("times", "values", "capacity", "head", "count")
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.times = np.full(capacity, np.nan)
+        self.values = np.full(capacity, np.nan)
+        self.head = 0
+        self.count = 0
+
+    def extend(self, times, values):
+        n = len(values)
+        if n == 0:
+            return
+        if n >= self.capacity:
+            times, values = times[-self.capacity:], values[-self.capacity:]
+            n = self.capacity
+        end = self.head + n
+        if end <= self.capacity:
+            self.times[self.head:end] = times
+            self.values[self.head:end] = values
+        else:
+            split = self.capacity - self.head
+            self.times[self.head:] = times[:split]
+            self.values[self.head:] = values[:split]
+            self.times[:n - split] = times[split:]
+            self.values[:n - split] = values[split:]
+        self.head = end % self.capacity
+        self.count = min(self.capacity, self.count + n)
+
+    def latest(self):
+        if not self.count:
+            return None
+        idx = self.head - 1
+        return float(self.times[idx]), float(self.values[idx])
+
+    def snapshot(self, n=None):
+        n = self.count if n is None else min(n, self.count)
+        idx = (self.head - n + np.arange(n)) % self.capacity
+        return self.times[idx], self.values[idx]
+
+
+class _Stream:
+    __slots__ = ("buffers", "seq", "updated", "detector")
+
+    def __init__(self, detector):
+        self.buffers = {}
+        self.seq = 0
+        self.updated = 0.0
+        self.detector = detector
+
+
+def parse_batch(payload, max_samples):
+    """Validate a columnar batch: ``{"t": [...], "channels": {"T1": [...], ...}}``."""
+    if not isinstance(payload, dict):
+        raise StreamError("Expected a JSON object with 't' and 'channels'.")
+    channels = payload.get("channels")
+    if not isinstance(channels, dict) or not channels:
+        raise StreamError("'channels' must map channel names to lists of readings.")
+    try:
+        times = np.asarray(payload.get("t"), dtype=float).reshape(-1)
+    except (TypeError, ValueError):
+        raise StreamError("'t' must be a list of timestamps in seconds.")
+    if times.size == 0:
+        raise StreamError("'t' must be a list of timestamps in seconds.")
+    if times.size * len(channels) > max_samples:
+        raise BatchTooLarge(f"Batch too large; send at most {max_samples} readings per request.")
+
+    columns = {}
+    for name, values in channels.items():
+        if not CHANNEL_RE.match(str(name)):
+            raise StreamError(f"Invalid channel name '{name}'.")
+        try:
+            column = np.asarray(values, dtype=float).reshape(-1)
+        except (TypeError, ValueError):
+            raise StreamError(f"Channel '{name}' must be a list of numbers.")
+        if column.size != times.size:
+            raise StreamError(f"Channel '{name}' has {column.size} readings for {times.size} timestamps.")
+        columns[str(name)] = column
+    return times, columns
+
+
+class StreamHub:
+    def __init__(self, capacity=4096, max_channels=32, max_streams=64, steady=None):
+        self.capacity = capacity
+        self.max_channels = max_channels
+        self.max_streams = max_streams
+        self.steady = steady or {}
+        self._streams = {}
+        self._cond = threading.Condition()
+
+    def configure(self, capacity, max_channels, max_streams, steady=None):
+        with self._cond:
+            self.capacity = capacity
+            self.max_channels = max_channels
+            self.max_streams = max_streams
+            self.steady = steady or {}
+            self._streams.clear()
+
+    def ingest(self, stream_id, times, columns):
+        with self._cond:
+            stream = self._streams.get(stream_id)
+            if stream is None:
+                if len(self._streams) >= self.max_streams:
+                    idle = min(self._streams, key=lambda key: self._streams[key].updated)
+                    del self._streams[idle]
+                stream = self._streams[stream_id] = _Stream(SteadyStateDetector(**self.steady))
+            if len(set(stream.buffers) | set(columns)) > self.max_channels:
+                raise StreamError(f"At most {self.max_channels} channels per stream.")
+            for name, values in columns.items():
+                buffer = stream.buffers.get(name)
+                if buffer is None:
+                    buffer = stream.buffers[name] = RingBuffer(self.capacity)
+                buffer.extend(times, values)
+            stream.detector.update(times, columns)
+            stream.seq += 1
+            stream.updated = time.time()
+            self._cond.notify_all()
+            return stream.seq
+
+    def latest(self, stream_id):
+        with self._cond:
+            stream = self._streams.get(stream_id)
+            if stream is None:
+                return None
+            channels = {}
+            for name, buffer in stream.buffers.items():
+                point = buffer.latest()
+                if point is not None:
+                    # NaN marks a missing reading; JSON has no NaN, so send null.
+                    channels[name] = {"t": point[0], "value": point[1] if np.isfinite(point[1]) else None}
+            return {"seq": stream.seq, "channels": channels, "steady": stream.detector.steady_since is not None}
+
+    def steady_status(self, stream_id):
+        with self._cond:
+            stream = self._streams.get(stream_id)
+            return stream.detector.status() if stream else None
+
+    def history(self, stream_id, channel, n=None):
+        with self._cond:
+            stream = self._streams.get(stream_id)
+            buffer = stream.buffers.get(channel) if stream else None
+            if buffer is None:
+                return None
+            times, values = buffer.snapshot(n)
+            return times.copy(), values.copy()
+
+    def export(self, stream_id):
+        """Buffered history of every channel on one shared, sorted time axis.
+
+        Channels are aligned by timestamp; a channel with no reading at some time
+        gets NaN there. Only the last ``capacity`` samples of each channel are
+        still buffered, so longer captures have to be uploaded separately.
+        """
+        with self._cond:
+            stream = self._streams.get(stream_id)
+            if stream is None or not stream.buffers:
+                return None
+            snapshots = {name: buffer.snapshot() for name, buffer in stream.buffers.items()}
+        times = np.unique(np.concatenate([buffer_times for buffer_times, _ in snapshots.values()]))
+        columns = {}
+        for name, (buffer_times, values) in snapshots.items():
+            column = np.full(times.size, np.nan)
+            column[np.searchsorted(times, buffer_times)] = values
+            columns[name] = column
+        return times, columns
+
+    def wait(self, stream_id, seq, timeout):
+        """Block until the stream has a batch newer than ``seq``; returns the current seq."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq(stream_id) != seq, timeout=timeout)
+            return self._seq(stream_id)
+
+    def _seq(self, stream_id):
+        stream = self._streams.get(stream_id)
+        return stream.seq if stream else 0
+
+    def clear(self):
+        with self._cond:
+            self._streams.clear()
+
+
+hub = StreamHub()
+
+
+def init_app(app):
+    app.config.setdefault("STREAM_BUFFER_SIZE", 4096)
+    app.config.setdefault("STREAM_MAX_CHANNELS", 32)
+    app.config.setdefault("STREAM_MAX_STREAMS", 64)
+    app.config.setdefault("STREAM_MAX_BATCH", 20000)
+    app.config.setdefault("STREAM_PUSH_INTERVAL", 0.25)
+    app.config.setdefault("STREAM_KEEPALIVE", 15.0)
+    app.config.setdefault("STREAM_MAX_SECONDS", 300.0)
+    app.config.setdefault("STREAM_INGEST_TOKEN", None)
+    app.config.setdefault("STEADY_WINDOW", 120.0)
+    app.config.setdefault("STEADY_MAX_DRIFT", 0.2)
+    app.config.setdefault("STEADY_MAX_STD", 0.5)
+    app.config.setdefault("STEADY_MIN_SAMPLES", 10)
+    hub.configure(
+        app.config["STREAM_BUFFER_SIZE"],
+        app.config["STREAM_MAX_CHANNELS"],
+        app.config["STREAM_MAX_STREAMS"],
+        steady={
+            "window": app.config["STEADY_WINDOW"],
+            "max_drift": app.config["STEADY_MAX_DRIFT"],
+            "max_std": app.config["STEADY_MAX_STD"],
+            "min_samples": app.config["STEADY_MIN_SAMPLES"],
+        },
+    )
@@ -0,0 +1,168 @@
+import re
+
+
+TOKEN_RE = re.compile(r"\\[A-Za-z]+|\\.|\s+|.", re.S)
+
+SYMBOLS = {
+    "alpha": "&alpha;", "beta": "&beta;", "gamma": "&gamma;", "delta": "&delta;",
+    "epsilon": "&epsilon;", "varepsilon": "&epsilon;", "eta": "&eta;", "theta": "&theta;",
+    "lambda": "&lambda;", "mu": "&mu;", "nu": "&nu;", "pi": "&pi;", "rho": "&rho;",
+    "sigma": "&sigma;", "tau": "&tau;", "phi": "&phi;", "varphi": "&phi;", "omega": "&omega;",
+    "Gamma": "&Gamma;", "Delta": "&Delta;", "Theta": "&Theta;", "Lambda": "&Lambda;",
+    "Sigma": "&Sigma;", "Phi": "&Phi;", "Omega": "&Omega;",
+    "times": "&times;", "cdot": "&middot;", "cdots": "&middot;&middot;&middot;", "ldots": "&hellip;",
+    "dots": "&hellip;", "approx": "&asymp;", "sim": "~", "le": "&le;", "leq": "&le;", "ge": "&ge;",
+    "geq": "&ge;", "ne": "&ne;", "neq": "&ne;", "pm": "&plusmn;", "infty": "&infin;",
+    "rightarrow": "&rarr;", "to": "&rarr;", "leftarrow": "&larr;", "Rightarrow": "&rArr;",
+    "partial": "&part;", "nabla": "&nabla;", "circ": "&deg;", "propto": "&prop;",
+    "quad": "&emsp;", "qquad": "&emsp;&emsp;",
+}
+
+FUNCTION_NAMES = {"ln", "log", "exp", "sin", "cos", "tan", "min", "max"}
+
+TEXT_COMMANDS = {"text", "mathrm", "textrm", "operatorname", "mathit", "textit", "mathbf", "textbf"}
+
+ACCENTS = {"dot": "&#775;", "ddot": "&#776;", "bar": "&#772;", "overline": "&#772;", "hat": "&#770;", "vec": "&#8407;", "tilde": "&#771;"}
+
+SPACES = {"\\,": " ", "\\;": " ", "\\:": " ", "\\ ": " ", "\\!": "", "~": " "}
+
+ESCAPES = {"\\_": "_", "\\{": "{", "\\}": "}", "\\%": "%", "\\$": "$", "\\&": "&amp;", "\\#": "#", "\\\\": "<br>"}
+
+
+def _html_text(text):
+    return text.replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _is_wrapped(html):
+    if not (html.startswith("(") and html.endswith(")")):
+        return False
+    depth = 0
+    for idx, ch in enumerate(html):
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+            if depth == 0:
+                return idx == len(html) - 1
+    return False
+
+
+def _needs_parens(html):
+    return any(ch in html for ch in " +-/") and not _is_wrapped(html)
+
+
+class _Parser:
+    def __init__(self, tex):
+        self.tokens = TOKEN_RE.findall(tex)
+        self.pos = 0
+
+    def next(self):
+        tok = self.tokens[self.pos] if self.pos < len(self.tokens) else None
+        self.pos += 1
+        return tok
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def skip_space(self):
+        while self.peek() is not None and self.peek().isspace():
+            self.pos += 1
+
+    def raw_group(self):
+        # Text-mode argument: keep the characters as written.
+        self.skip_space()
+        if self.peek() != "{":
+            tok = self.next()
+            return _html_text(tok or "")
+        self.pos += 1
+        depth = 1
+        parts = []
+        while self.peek() is not None:
+            tok = self.next()
+            if tok == "{":
+                depth += 1
+            elif tok == "}":
+                depth -= 1
+                if depth == 0:
+                    break
+            parts.append(ESCAPES.get(tok, SPACES.get(tok, tok)))
+        return _html_text("".join(parts))
+
+    def argument(self):
+        self.skip_space()
+        tok = self.peek()
+        if tok is None:
+            return ""
+        if tok == "{":
+            self.pos += 1
+            return self.sequence(closing=True)
+        return self.atom()
+
+    def atom(self):
+        tok = self.next()
+        if tok is None:
+            return ""
+        if tok == "{":
+            return self.sequence(closing=True)
+        if tok == "}":
+            return ""
+        if tok in SPACES:
+            return SPACES[tok]
+        if tok in ESCAPES:
+            return ESCAPES[tok]
+        if tok.startswith("\\") and len(tok) > 1:
+            return self.command(tok[1:])
+        if tok in "^_":
+            return ""
+        if tok.isspace():
+            return " "
+        return _html_text(tok)
+
+    def command(self, name):
+        if name in SYMBOLS:
+            return SYMBOLS[name]
+        if name in FUNCTION_NAMES:
+            return name
+        if name in TEXT_COMMANDS:
+            return self.raw_group()
+        if name in ("frac", "dfrac", "tfrac"):
+            num = self.argument()
+            den = self.argument()
+            num = f"({num})" if _needs_parens(num) else num
+            den = f"({den})" if _needs_parens(den) else den
+            return f"{num}/{den}"
+        if name == "sqrt":
+            return f"&radic;({self.argument()})"
+        if name in ACCENTS:
+            return f"{self.argument()}{ACCENTS[name]}"
+        if name in ("left", "right", "big", "Big", "bigl", "bigr", "displaystyle"):
+            return ""
+        return name
+
+    def sequence(self, closing=False):
+        out = []
+        while True:
+            tok = self.peek()
+            if tok is None:
+                break
+            if tok == "}":
+                self.pos += 1
+                if closing:
+                    break
+                continue
+            if tok in ("^", "_"):
+                self.pos += 1
+                tag = "sup" if tok == "^" else "sub"
+                out.append(f"<{tag}>{self.argument()}</{tag}>")
+                continue
+            if tok.isspace():
+                self.pos += 1
+                if out and not out[-1].endswith(" "):
+                    out.append(" ")
+                continue
+            out.append(self.atom())
+        return "".join(out)
+
+
+def tex_to_html(tex):
+    return _Parser(tex).sequence().strip()
@@ -0,0 +1,149 @@
+"""Compact on-disk storage for raw run logs.
+
+A ``.lts`` file is a small header followed by one contiguous float32 row per
+channel, with row 0 holding sample times as offsets from ``t0``::
+
+    magic "LABTS\\x01" | version u16 | channels u16 | samples u64 | t0 f64 | names_len u32
+    channel names (JSON) padded to DATA_ALIGN
+    float32[(channels + 1) * samples]
+
+Files are opened with ``np.memmap``, so reading a time window only touches
+the pages holding that window.
+"""
+import json
+import os
+import re
+import struct
+
+import numpy as np
+from flask import current_app
+
+
+MAGIC = b"LABTS\x01"
+VERSION = 1
+HEADER = struct.Struct("<6sHHQdI")
+DATA_ALIGN = 64
+FILE_RE = re.compile(r"^[A-Za-z0-9_-]+\.lts$")
+
+
+class TimeSeriesError(ValueError):
+    pass
+
+
+def write_series(path, times, columns):
+    times = np.asarray(times, dtype=np.float64).reshape(-1)
+    names = list(columns)
+    if not names:
+        raise TimeSeriesError("No channels to store.")
+    if not np.all(np.isfinite(times)):
+        raise TimeSeriesError("Timestamps must be finite numbers.")
+    # TimeSeries.span() binary-searches the time row, so samples are stored in time order.
+    order = np.argsort(times, kind="stable") if np.any(np.diff(times) < 0) else slice(None)
+    times = times[order]
+    t0 = float(times[0]) if times.size else 0.0
+    data = np.empty((len(names) + 1, times.size), dtype="<f4")
+    data[0] = times - t0
+    for row, name in enumerate(names, start=1):
+        column = np.asarray(columns[name], dtype=np.float64).reshape(-1)
+        if column.size != times.size:
+            raise TimeSeriesError(f"Channel '{name}' has {column.size} samples for {times.size} timestamps.")
+        data[row] = column[order]
+
+    names_blob = json.dumps(names).encode("utf-8")
+    head = HEADER.pack(MAGIC, VERSION, len(names), times.size, t0, len(names_blob)) + names_blob
+    head += b"\0" * (-len(head) % DATA_ALIGN)
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(head)
+        fh.write(data.tobytes())
+    os.replace(tmp, path)
+    return os.path.getsize(path)
+
+
+class TimeSeries:
+    def __init__(self, path):
+        with open(path, "rb") as fh:
+            raw = fh.read(HEADER.size)
+            if len(raw) < HEADER.size:
+                raise TimeSeriesError("Truncated time-series header.")
+            magic, version, n_channels, n_samples, t0, names_len = HEADER.unpack(raw)
+            if magic != MAGIC or version != VERSION:
+                raise TimeSeriesError("Not a lab time-series file.")
+            self.channels = json.loads(fh.read(names_len).decode("utf-8"))
+        offset = HEADER.size + names_len
+        offset += -offset % DATA_ALIGN
+        if os.path.getsize(path) < offset + 4 * (n_channels + 1) * n_samples:
+            raise TimeSeriesError("Truncated time-series data.")
+        self.t0 = t0
+        self.n_samples = n_samples
+        self.index = {name: row for row, name in enumerate(self.channels, start=1)}
+        if n_samples:
+            self.data = np.memmap(path, dtype="<f4", mode="r", offset=offset, shape=(n_channels + 1, n_samples))
+        else:
+            self.data = np.empty((n_channels + 1, 0), dtype="<f4")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        mm = getattr(self.data, "_mmap", None)
+        self.data = None
+        if mm is not None:
+            mm.close()
+
+    def span(self, start=None, end=None):
+        """Sample index range for absolute times [start, end]; a binary search over the time row."""
+        offsets = self.data[0]
+        lo = 0 if start is None else int(np.searchsorted(offsets, start - self.t0, side="left"))
+        hi = self.n_samples if end is None else int(np.searchsorted(offsets, end - self.t0, side="right"))
+        return lo, max(lo, hi)
+
+    def window(self, start=None, end=None, channels=None, max_points=None):
+        lo, hi = self.span(start, end)
+        step = 1
+        if max_points and hi - lo > max_points:
+            step = -(-(hi - lo) // max_points)
+        names = list(channels) if channels else list(self.channels)
+        missing = [name for name in names if name not in self.index]
+        if missing:
+            raise TimeSeriesError(f"Unknown channel(s): {', '.join(missing)}")
+        times = self.data[0, lo:hi:step].astype(np.float64) + self.t0
+        return times, {name: np.array(self.data[self.index[name], lo:hi:step]) for name in names}
+
+
+def storage_dir():
+    folder = current_app.config["TIMESERIES_DIR"]
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def run_series_path(filename):
+    if not filename or not FILE_RE.match(filename):
+        raise TimeSeriesError("Invalid time-series file name.")
+    return os.path.join(storage_dir(), filename)
+
+
+def save_run_series(run_id, times, columns):
+    filename = f"run-{run_id}.lts"
+    write_series(run_series_path(filename), times, columns)
+    return filename
+
+
+def discard_run_series(filename):
+    try:
+        os.remove(run_series_path(filename))
+    except OSError:
+        pass
+
+
+def open_run_series(filename):
+    return TimeSeries(run_series_path(filename))
+
+
+def init_app(app):
+    app.config.setdefault("TIMESERIES_DIR", os.path.join(app.instance_path, "timeseries"))
+    app.config.setdefault("TIMESERIES_MAX_SAMPLES", 2_000_000)
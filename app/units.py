@@ -0,0 +1,90 @@
+from typing import NamedTuple
+
+import numpy as np
+
+
+class Unit(NamedTuple):
+    symbol: str
+    dimension: str
+    factor: float
+    offset: float = 0.0
+
+
+# SI value = value * factor + offset. SI bases: m, m^3/s, kg/s, kg/m^3, J/kgK, K.
+_UNIT_TABLE = [
+    # symbol, dimension, factor, offset, aliases
+    ("m", "length", 1.0, 0.0, ["meter", "meters", "metre", "metres"]),
+    ("cm", "length", 1e-2, 0.0, ["centimeter", "centimeters", "centimetre", "centimetres"]),
+    ("mm", "length", 1e-3, 0.0, ["millimeter", "millimeters", "millimetre", "millimetres"]),
+    ("L/min", "volumetric_flow", 1e-3 / 60.0, 0.0, ["liter/min", "liters/min", "litre/min", "litres/min", "lpm"]),
+    ("mL/min", "volumetric_flow", 1e-6 / 60.0, 0.0, ["milliliter/min", "milliliters/min", "millilitre/min", "millilitres/min"]),
+    ("cc/min", "volumetric_flow", 1e-6 / 60.0, 0.0, []),
+    ("m^3/s", "volumetric_flow", 1.0, 0.0, ["m3/s"]),
+    ("kg/s", "mass_flow", 1.0, 0.0, ["kg/sec"]),
+    ("kg/min", "mass_flow", 1.0 / 60.0, 0.0, []),
+    ("kg/m^3", "density", 1.0, 0.0, ["kg/m3"]),
+    ("g/cm^3", "density", 1000.0, 0.0, ["g/cm3", "g/cc"]),
+    ("J/kgK", "specific_heat", 1.0, 0.0, ["j/kg-k", "j/kg.k"]),
+    ("kJ/kgK", "specific_heat", 1000.0, 0.0, ["kj/kg-k", "kj/kg.k"]),
+    ("K", "temperature", 1.0, 0.0, ["kelvin"]),
+    ("C", "temperature", 1.0, 273.15, ["degc", "°c", "celsius"]),
+    ("F", "temperature", 5.0 / 9.0, 273.15 - 32.0 * 5.0 / 9.0, ["degf", "°f", "fahrenheit"]),
+]
+
+UNITS = {}
+ALIASES = {}
+for _symbol, _dimension, _factor, _offset, _aliases in _UNIT_TABLE:
+    UNITS[_symbol] = Unit(_symbol, _dimension, _factor, _offset)
+    for _alias in [_symbol] + _aliases:
+        ALIASES[_alias.lower()] = _symbol
+
+
+class UnitError(ValueError):
+    pass
+
+
+def canonical_unit(unit, default):
+    # Unknown spellings are passed through unchanged so callers can report them.
+    if not unit:
+        return default
+    return ALIASES.get(str(unit).strip().lower(), unit)
+
+
+def lookup(unit, dimension=None):
+    info = UNITS.get(canonical_unit(unit, ""))
+    if info is None or (dimension and info.dimension != dimension):
+        return None
+    return info
+
+
+def si_value(value, unit, dimension):
+    info = lookup(unit, dimension)
+    if info is None:
+        return value
+    return value * info.factor + info.offset
+
+
+def convert(value, from_unit, to_unit):
+    src = lookup(from_unit)
+    dst = lookup(to_unit)
+    if src is None or dst is None:
+        raise UnitError(f"Cannot convert '{from_unit}' to '{to_unit}'.")
+    if src.dimension != dst.dimension:
+        raise UnitError(f"Cannot convert {src.dimension} '{from_unit}' to {dst.dimension} '{to_unit}'.")
+    return ((value * src.factor + src.offset) - dst.offset) / dst.factor
+
+
+def convert_many(values, units, dimension):
+    """Convert a batch of quantities of one dimension to SI in a single vectorized step.
+
+    Units that are unknown for ``dimension`` are left unscaled, matching how the
+    calculators have always treated unrecognised unit strings.
+    """
+    factors = np.ones(len(units))
+    offsets = np.zeros(len(units))
+    for idx, unit in enumerate(units):
+        info = lookup(unit, dimension)
+        if info is not None:
+            factors[idx] = info.factor
+            offsets[idx] = info.offset
+    return np.asarray(values, dtype=float) * factors + offsets
@@ -1,7 +1,14 @@
 import re
 import json
+from collections.abc import Mapping
+from dataclasses import dataclass, fields
+from functools import lru_cache
 import numpy as np
-from app.models import Experiment
+from app.admission import check_deadline
+from app.models import Experiment, ExperimentVersion
+from app.formulas import get_compiled_formulas, latex_name
+from app.mathrender import prerender
+from app.units import UNITS, canonical_unit, convert_many, lookup, si_value
 
 
 AIR_PROPS_TABLE = [
@@ -36,12 +43,20 @@ def interpolate_property(temp_k, key):
 
 
 def get_air_properties_auto(temp_k):
-    rho = interpolate_property(temp_k, "rho")
-    cp = interpolate_property(temp_k, "cp")
-    k_air = interpolate_property(temp_k, "k")
-    mu = interpolate_property(temp_k, "mu")
-    pr = interpolate_property(temp_k, "pr")
-    nu = mu / rho if rho else 0.0
+    """Air properties at ``temp_k`` (K), clamped to the table; ``temp_k`` may be an array of film temperatures."""
+    if isinstance(temp_k, np.ndarray):
+        temps = [row["T"] for row in AIR_PROPS_TABLE]
+        rho, cp, k_air, mu, pr = (
+            np.interp(temp_k, temps, [row[key] for row in AIR_PROPS_TABLE]) for key in ("rho", "cp", "k", "mu", "pr")
+        )
+        nu = mu / rho
+    else:
+        rho = interpolate_property(temp_k, "rho")
+        cp = interpolate_property(temp_k, "cp")
+        k_air = interpolate_property(temp_k, "k")
+        mu = interpolate_property(temp_k, "mu")
+        pr = interpolate_property(temp_k, "pr")
+        nu = mu / rho if rho else 0.0
     return {
         "rho": rho,
         "cp": cp,
@@ -81,6 +96,154 @@ def parse_numeric(value):
     return 0.0
 
 
+OBSERVATION_FIELDS = ("v", "i", "t1", "t2", "t3", "t4", "t5", "t6", "t7")
+OBSERVATION_ALIASES = {"voltage": "v", "current": "i", "ta": "t7"}
+TRIAL_FIELD_RE = re.compile(r"^trial_(\d+)_(v|i|t[1-7])$", re.IGNORECASE)
+
+
+def _is_blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _observation_column(values):
+    try:
+        return np.asarray(values, dtype=float).reshape(-1)
+    except (TypeError, ValueError):
+        # Slow path for blanks and notations like "1.9x10^-5"; blanks stay missing (NaN).
+        return np.array([np.nan if _is_blank(val) else parse_numeric(val) for val in values], dtype=float)
+
+
+def observation_columns(columns):
+    """Trials given column-wise, e.g. ``{"v": [...], "i": [...], "t1": [...], ..., "t7": [...]}``.
+
+    Returns the trial numbers and a ``(len(OBSERVATION_FIELDS), trials)`` array of readings, NaN where missing.
+    """
+    if isinstance(columns, str):
+        try:
+            columns = json.loads(columns)
+        except ValueError:
+            raise ValueError("Observation columns are not valid JSON.")
+    if not isinstance(columns, dict):
+        raise ValueError("Observation columns must map field names to lists.")
+
+    named = {}
+    for key, values in columns.items():
+        field = str(key).lower()
+        field = OBSERVATION_ALIASES.get(field, field)
+        if field not in OBSERVATION_FIELDS and field != "trial":
+            continue
+        if not isinstance(values, list):
+            raise ValueError(f"Observation column '{key}' must be a list.")
+        named[field] = values
+    lengths = {len(values) for values in named.values()}
+    if len(lengths) > 1:
+        raise ValueError("Observation columns must all have the same number of trials.")
+    count = lengths.pop() if lengths else 0
+
+    matrix = np.full((len(OBSERVATION_FIELDS), count), np.nan)
+    for row, field in enumerate(OBSERVATION_FIELDS):
+        if field in named:
+            matrix[row] = _observation_column(named[field])
+    trial_ids = _observation_column(named["trial"]) if "trial" in named else np.arange(1, count + 1, dtype=float)
+    trial_ids = np.where(np.isfinite(trial_ids), trial_ids, np.arange(1, count + 1))
+    return [int(trial) for trial in trial_ids.tolist()], matrix
+
+
+def observation_matrix(observations):
+    """``observation_columns`` output for trials given as dicts (see ``parse_natural_convection_observations``)."""
+    trial_ids = [int(parse_numeric(trial.get("trial", 1))) for trial in observations]
+    matrix = np.array([
+        [
+            np.nan if _is_blank(val) else parse_numeric(val)
+            for val in (trial.get(field, trial.get("ta") if field == "t7" else None) for field in OBSERVATION_FIELDS)
+        ]
+        for trial in observations
+    ], dtype=float).reshape(-1, len(OBSERVATION_FIELDS)).T
+    return trial_ids, matrix
+
+
+def parse_observation_columns(columns):
+    """Column-wise trials as a list of dicts, with None for missing readings."""
+    trial_ids, matrix = observation_columns(columns)
+    return [
+        {"trial": trial, **{field: (None if val != val else val) for field, val in zip(OBSERVATION_FIELDS, row)}}
+        for trial, row in zip(trial_ids, matrix.T.tolist())
+    ]
+
+
+def parse_natural_convection_observations(payload):
+    """Trials as a list of dicts, from ``columns``, an ``observations`` list/JSON string or ``trial_<n>_<field>`` keys."""
+    if isinstance(payload, dict) and payload.get("columns") is not None:
+        return parse_observation_columns(payload["columns"])
+    if isinstance(payload, dict) and "observations" in payload:
+        obs = payload.get("observations")
+        if isinstance(obs, str):
+            try:
+                obs = json.loads(obs)
+            except Exception:
+                obs = []
+        if isinstance(obs, list):
+            normalized = []
+            for item in obs:
+                if not isinstance(item, dict):
+                    continue
+                lower = {str(k).lower(): v for k, v in item.items()}
+                normalized.append({
+                    "trial": lower.get("trial", item.get("trial", 1)),
+                    "v": lower.get("v", item.get("v", item.get("voltage"))),
+                    "i": lower.get("i", item.get("i", item.get("current"))),
+                    "t1": lower.get("t1", item.get("t1")),
+                    "t2": lower.get("t2", item.get("t2")),
+                    "t3": lower.get("t3", item.get("t3")),
+                    "t4": lower.get("t4", item.get("t4")),
+                    "t5": lower.get("t5", item.get("t5")),
+                    "t6": lower.get("t6", item.get("t6")),
+                    "t7": lower.get("t7", item.get("t7", lower.get("ta", item.get("ta")))),
+                })
+            return normalized
+
+    trials = {}
+    if isinstance(payload, dict):
+        for key, val in payload.items():
+            match = TRIAL_FIELD_RE.match(str(key))
+            if not match:
+                continue
+            idx = int(match.group(1))
+            field = match.group(2).lower()
+            trials.setdefault(idx, {})[field] = parse_numeric(val)
+    if trials:
+        return [
+            {"trial": idx, **data}
+            for idx, data in sorted(trials.items())
+        ]
+
+    if any(k in payload for k in ["v", "i", "t1", "t2", "t3", "t4", "t5", "t6", "t7"]):
+        return [{
+            "trial": 1,
+            "v": parse_numeric(payload.get("v", payload.get("voltage", payload.get("V", 0.0)))),
+            "i": parse_numeric(payload.get("i", payload.get("current", payload.get("I", 0.0)))),
+            "t1": parse_numeric(payload.get("t1", 0.0)),
+            "t2": parse_numeric(payload.get("t2", 0.0)),
+            "t3": parse_numeric(payload.get("t3", 0.0)),
+            "t4": parse_numeric(payload.get("t4", 0.0)),
+            "t5": parse_numeric(payload.get("t5", 0.0)),
+            "t6": parse_numeric(payload.get("t6", 0.0)),
+            "t7": parse_numeric(payload.get("t7", payload.get("ta", payload.get("Ta", 0.0)))),
+        }]
+    return []
+
+
+LENGTH_FIELDS = [
+    ("d_rod", "rod_diameter_unit", 0.0),
+    ("l1", "l1_unit", 0.0),
+    ("l2", "l2_unit", 0.0),
+    ("l3", "l3_unit", 0.0),
+    ("ri", "ri_unit", 0.0),
+    ("ro", "ro_unit", 0.0),
+    ("dx", "dx_unit", 0.06),
+]
+
+
 def normalize_inputs(raw_inputs, consts):
     raw_inputs = raw_inputs or {}
     consts = consts or {}
@@ -88,12 +251,6 @@ def normalize_inputs(raw_inputs, consts):
     warnings = []
     suspects = set()
 
-    def normalize_unit(unit, mapping, default):
-        if not unit:
-            return default
-        key = str(unit).strip().lower()
-        return mapping.get(key, unit)
-
     def get_num(key, default=0.0):
         return parse_numeric(raw_inputs.get(key, default))
 
@@ -105,36 +262,6 @@ def normalize_inputs(raw_inputs, consts):
         item = consts.get(key, {})
         return item.get("unit", default)
 
-    length_unit_map = {
-        "m": "m",
-        "meter": "m",
-        "meters": "m",
-        "metre": "m",
-        "metres": "m",
-        "mm": "mm",
-        "millimeter": "mm",
-        "millimeters": "mm",
-        "millimetre": "mm",
-        "millimetres": "mm",
-    }
-
-    flow_unit_map = {
-        "l/min": "L/min",
-        "liter/min": "L/min",
-        "liters/min": "L/min",
-        "litre/min": "L/min",
-        "litres/min": "L/min",
-        "ml/min": "mL/min",
-        "milliliter/min": "mL/min",
-        "milliliters/min": "mL/min",
-        "millilitre/min": "mL/min",
-        "millilitres/min": "mL/min",
-        "cc/min": "cc/min",
-        "kg/s": "kg/s",
-        "kg/sec": "kg/s",
-        "kg/min": "kg/min",
-    }
-
     # Flow rate inputs
     flow_value = get_num("flow_rate_value", raw_inputs.get("vol_flow", raw_inputs.get("flow", 0.0)))
     flow_unit = raw_inputs.get("flow_rate_unit")
@@ -143,79 +270,50 @@ def normalize_inputs(raw_inputs, consts):
             flow_unit = "cc/min"
         else:
             flow_unit = "L/min"
-    flow_unit = normalize_unit(flow_unit, flow_unit_map, "L/min")
+    flow_unit = canonical_unit(flow_unit, "L/min")
 
     # Fluid properties
-    rho = get_num("rho", get_const_num("rho", 1000.0))
-    rho_unit = normalize_unit(raw_inputs.get("rho_unit", get_const_unit("rho", "kg/m^3")), {
-        "kg/m3": "kg/m^3",
-        "kg/m^3": "kg/m^3",
-    }, "kg/m^3")
-
-    cpw = get_num("cpw", get_const_num("cpw", 4180.0))
-    cpw_unit = normalize_unit(raw_inputs.get("cpw_unit", get_const_unit("cpw", "J/kgK")), {
-        "j/kgk": "J/kgK",
-        "j/kg-k": "J/kgK",
-        "kj/kgk": "kJ/kgK",
-        "kj/kg-k": "kJ/kgK",
-    }, "J/kgK")
-    if cpw_unit == "kJ/kgK":
-        cpw *= 1000.0
+    rho_unit = canonical_unit(raw_inputs.get("rho_unit", get_const_unit("rho", "kg/m^3")), "kg/m^3")
+    rho = si_value(get_num("rho", get_const_num("rho", 1000.0)), rho_unit, "density")
+
+    cpw_unit = canonical_unit(raw_inputs.get("cpw_unit", get_const_unit("cpw", "J/kgK")), "J/kgK")
+    cpw = si_value(get_num("cpw", get_const_num("cpw", 4180.0)), cpw_unit, "specific_heat")
     if cpw and cpw < 1000:
         warnings.append("Cp value is very low; check if kJ/kgK was entered without unit conversion.")
         suspects.add("cpw")
 
     kins = get_num("kins", get_const_num("kins", 0.0))
 
-    def get_length(name, default_val=0.0, unit_key=None):
-        val = get_num(name, get_const_num(name, default_val))
-        unit = raw_inputs.get(unit_key or f"{name}_unit", get_const_unit(name, "m"))
-        unit = normalize_unit(unit, length_unit_map, "m")
-        return val, unit
-
-    d_rod_val, d_rod_unit = get_length("d_rod", get_const_num("d_rod", 0.0), "rod_diameter_unit")
-    l1_val, l1_unit = get_length("l1", get_const_num("l1", 0.0), "l1_unit")
-    l2_val, l2_unit = get_length("l2", get_const_num("l2", 0.0), "l2_unit")
-    l3_val, l3_unit = get_length("l3", get_const_num("l3", 0.0), "l3_unit")
-    ri_val, ri_unit = get_length("ri", get_const_num("ri", 0.0), "ri_unit")
-    ro_val, ro_unit = get_length("ro", get_const_num("ro", 0.0), "ro_unit")
-    dx_val, dx_unit = get_length("dx", get_const_num("dx", 0.06), "dx_unit")
-
-    def to_m(val, unit):
-        return val / 1000.0 if unit == "mm" else val
-
-    d_rod = to_m(d_rod_val, d_rod_unit)
-    l1 = to_m(l1_val, l1_unit)
-    l2 = to_m(l2_val, l2_unit)
-    l3 = to_m(l3_val, l3_unit)
-    ri = to_m(ri_val, ri_unit)
-    ro = to_m(ro_val, ro_unit)
-    dx = to_m(dx_val, dx_unit)
+    length_vals = []
+    length_units = []
+    for name, unit_key, default_val in LENGTH_FIELDS:
+        length_vals.append(get_num(name, get_const_num(name, default_val)))
+        length_units.append(canonical_unit(raw_inputs.get(unit_key, get_const_unit(name, "m")), "m"))
+    d_rod_val, l1_val, l2_val, l3_val, ri_val, ro_val, dx_val = length_vals
+    d_rod_unit, l1_unit, l2_unit, l3_unit, ri_unit, ro_unit, dx_unit = length_units
+    d_rod, l1, l2, l3, ri, ro, dx = convert_many(length_vals, length_units, "length").tolist()
 
     # Temperature inputs (C, deltaT is K-equivalent)
     t_wi = get_num("t_wi", 0.0)
     t_wo = get_num("t_wo", 0.0)
-    t_rod = [get_num(f"t{i}", 0.0) for i in range(1, 6)]
-    t_ins = {i: get_num(f"t{i}", 0.0) for i in [6, 7, 8, 9, 12, 13]}
+    # Stored runs keep these as t_rod/t_ins (see raw below); read that form too so they can be recalculated.
+    rod_saved = raw_inputs.get("t_rod") if isinstance(raw_inputs.get("t_rod"), list) else []
+    ins_saved = raw_inputs.get("t_ins") if isinstance(raw_inputs.get("t_ins"), dict) else {}
+    t_rod = [get_num(f"t{i}", rod_saved[i - 1] if i <= len(rod_saved) else 0.0) for i in range(1, 6)]
+    t_ins = {i: get_num(f"t{i}", ins_saved.get(str(i), ins_saved.get(i, 0.0))) for i in [6, 7, 8, 9, 12, 13]}
 
     # Flow conversion
-    vdot_m3s = 0.0
-    m_dot = 0.0
-    flow_lmin = 0.0
-    if flow_unit in ["L/min", "mL/min", "cc/min"]:
-        factor = 1e-3 if flow_unit == "L/min" else 1e-6
-        vdot_m3s = (flow_value * factor) / 60.0
-        m_dot = rho * vdot_m3s
-        flow_lmin = flow_value if flow_unit == "L/min" else flow_value / 1000.0
-    elif flow_unit in ["kg/s", "kg/min"]:
-        m_dot = flow_value if flow_unit == "kg/s" else flow_value / 60.0
-        vdot_m3s = (m_dot / rho) if rho else 0.0
-        flow_lmin = (vdot_m3s * 60.0) / 1e-3 if rho else 0.0
-    else:
+    flow = lookup(flow_unit)
+    if flow is None or flow.dimension not in ["volumetric_flow", "mass_flow"]:
         warnings.append(f"Unknown flow unit '{flow_unit}'. Assuming L/min.")
-        vdot_m3s = (flow_value * 1e-3) / 60.0
+        flow = UNITS["L/min"]
+    if flow.dimension == "volumetric_flow":
+        vdot_m3s = flow_value * flow.factor
         m_dot = rho * vdot_m3s
-        flow_lmin = flow_value
+    else:
+        m_dot = flow_value * flow.factor
+        vdot_m3s = (m_dot / rho) if rho else 0.0
+    flow_lmin = vdot_m3s / UNITS["L/min"].factor
 
     # Geometry sanity checks
     geom_checks = {
@@ -349,45 +447,25 @@ def build_therm_conductivity_steps(calc_data):
     return steps
 
 
+@lru_cache(maxsize=64)
+def _format_theory_cached(text):
+    return str(prerender(text, renderer="text")[0])
+
+
 def format_theory_html(text):
+    # Keyed on the theory text itself, so each experiment content version is rendered once.
     if not text:
         return ""
-    s = str(text)
-
-    # Basic LaTeX -> readable HTML conversions for print
-    s = s.replace("\\_", "_")
-    s = s.replace("\\pi", "&pi;")
-    s = s.replace("\\ln", "ln")
-    s = s.replace("\\cdot", "&times;")
+    return _format_theory_cached(str(text))
 
-    def frac(match):
-        return f"({match.group(1)}/{match.group(2)})"
 
-    s = re.sub(r"\\frac\{([^{}]+)\}\{([^{}]+)\}", frac, s)
-
-    # Subscripts/superscripts in common patterns
-    s = re.sub(r"([A-Za-z])_\{([^{}]+)\}", r"\1<sub>\2</sub>", s)
-    s = re.sub(r"([A-Za-z0-9])\^\{([^{}]+)\}", r"\1<sup>\2</sup>", s)
-    s = re.sub(r"([A-Za-z])_([A-Za-z0-9]+)", r"\1<sub>\2</sub>", s)
-    s = re.sub(r"([A-Za-z0-9])\^([A-Za-z0-9]+)", r"\1<sup>\2</sup>", s)
-
-    # Remove remaining backslashes from LaTeX commands
-    s = s.replace("\\", "")
-
-    # Convert block and inline math to styled containers
-    s = re.sub(r"\$\$(.+?)\$\$", lambda m: f'<div class="math-block">{m.group(1).strip()}</div>', s, flags=re.S)
-    s = re.sub(r"\$(.+?)\$", lambda m: f'<span class="math">{m.group(1).strip()}</span>', s, flags=re.S)
-
-    return s
-
-
-def calculate_therm_conductivity(slug, inputs):
+def calculate_therm_conductivity(slug, inputs, content=None):
     # Fetch Constants
     exp = Experiment.query.filter_by(slug=slug).first()
     if not exp:
         return {"error": "Experiment not found"}
 
-    consts = exp.content.get("constants", {})
+    consts = (exp.content if content is None else content).get("constants", {})
 
     norm_pack = normalize_inputs(inputs, consts)
     normalized = norm_pack["normalized"]
@@ -484,21 +562,97 @@ def calculate_therm_conductivity(slug, inputs):
     }
 
 
-def calculate_natural_convection(slug, inputs):
+@dataclass(slots=True, eq=False)
+class TrialResult(Mapping):
+    """One natural-convection trial result.
+
+    Reads like the per-trial dict it replaces (``res["q"]``, ``res.get("h_exp")``,
+    ``trial.h_exp`` in templates) but holds its fields in slots. JSON providers
+    serialize it as a dataclass, so it is only turned into a dict at the edge.
+    """
+
+    trial: int
+    v: float
+    i: float
+    temps: list
+    ta: float
+    ts: float = None
+    delta_t: float = None
+    tf: float = None
+    beta: float = None
+    q: float = None
+    rho: float = None
+    cp: float = None
+    k_air: float = None
+    mu: float = None
+    nu_kin: float = None
+    pr: float = None
+    gr: float = None
+    ra: float = None
+    nu_nusselt: float = None
+    h_exp: float = None
+    h_theoretical: float = None
+    area_s: float = None
+    corr_c: float = None
+    corr_n: float = None
+    corr_range: str = None
+    props_source: str = None
+
+    def __getitem__(self, key):
+        if key not in _TRIAL_RESULT_KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in _TRIAL_RESULT_KEYS else default
+
+    def __iter__(self):
+        return iter(TRIAL_RESULT_FIELDS)
+
+    def __len__(self):
+        return len(TRIAL_RESULT_FIELDS)
+
+    def observation(self):
+        temps = list(self.temps) + [0.0] * (6 - len(self.temps))
+        return {
+            "v": self.v, "i": self.i,
+            "t1": temps[0], "t2": temps[1], "t3": temps[2], "t4": temps[3], "t5": temps[4], "t6": temps[5],
+            "t7": self.ta, "trial": self.trial,
+        }
+
+
+TRIAL_RESULT_FIELDS = tuple(field.name for field in fields(TrialResult))
+_TRIAL_RESULT_KEYS = frozenset(TRIAL_RESULT_FIELDS)
+
+
+def mean_heat_transfer(trials):
+    """Mean experimental and theoretical h over the trials that produced a value."""
+    valid_exp = [item.get("h_exp") for item in trials if item.get("h_exp")]
+    valid_theory = [item.get("h_theoretical") for item in trials if item.get("h_theoretical")]
+    return {
+        "mean_h_exp": sum(valid_exp) / len(valid_exp) if valid_exp else None,
+        "mean_h_theoretical": sum(valid_theory) / len(valid_theory) if valid_theory else None,
+    }
+
+
+def calculate_natural_convection(slug, inputs, trial_cache=None, content=None):
     inputs = inputs or {}
     exp = Experiment.query.filter_by(slug=slug).first()
     if not exp:
         return {"error": "Experiment not found"}
 
-    consts = exp.content.get("constants", {})
+    consts = (exp.content if content is None else content).get("constants", {})
     warnings = []
 
     def get_const_num(key, default=0.0):
         item = consts.get(key, {})
         return parse_numeric(item.get("value", default))
 
-    d_tube = get_const_num("d_tube", 0.038)
-    l_tube = get_const_num("L_tube", 0.5)
+    def get_const_length(key, default):
+        return si_value(get_const_num(key, default), consts.get(key, {}).get("unit", "m"), "length")
+
+    d_tube = get_const_length("d_tube", 0.038)
+    l_tube = get_const_length("L_tube", 0.5)
     g = get_const_num("g", 9.81)
 
     area_s = np.pi * d_tube * l_tube if d_tube and l_tube else 0.0
@@ -538,17 +692,14 @@ def calculate_natural_convection(slug, inputs):
             warnings.append("Manual properties are incomplete; auto values will be used for missing fields.")
 
     def resolve_air_properties(tf):
+        """Air properties for an array of film temperatures, and whether any came from the table."""
         auto_props = get_air_properties_auto(tf)
         if not manual_mode:
-            return {
-                "rho": auto_props["rho"],
-                "cp": auto_props["cp"],
-                "k_air": auto_props["k_air"],
-                "mu": auto_props["mu"],
-                "nu": auto_props["nu"],
-                "pr": auto_props["pr"],
-                "used_auto": True,
-            }
+            return auto_props, True
+
+        def given(val):
+            # Table values are arrays and never zero.
+            return isinstance(val, np.ndarray) or bool(val)
 
         rho_use = rho
         cp_use = cp
@@ -557,31 +708,31 @@ def calculate_natural_convection(slug, inputs):
         nu_use = nu
         used_auto = False
 
-        if not rho_use and mu_use and nu_use:
+        if not given(rho_use) and given(mu_use) and given(nu_use):
             rho_use = mu_use / nu_use
-        if not rho_use:
+        if not given(rho_use):
             rho_use = auto_props["rho"]
             used_auto = True
-        if not cp_use:
+        if not given(cp_use):
             cp_use = auto_props["cp"]
             used_auto = True
-        if not k_use:
+        if not given(k_use):
             k_use = auto_props["k_air"]
             used_auto = True
 
-        if not mu_use and nu_use and rho_use:
+        if not given(mu_use) and given(nu_use):
             mu_use = nu_use * rho_use
-        if not nu_use and mu_use and rho_use:
+        if not given(nu_use) and given(mu_use):
             nu_use = mu_use / rho_use
-        if not mu_use and not nu_use:
+        if not given(mu_use) and not given(nu_use):
             mu_use = auto_props["mu"]
             nu_use = auto_props["nu"]
             used_auto = True
 
         pr_use = pr
-        if not pr_use and cp_use and mu_use and k_use:
+        if not given(pr_use) and given(cp_use) and given(mu_use) and given(k_use):
             pr_use = (cp_use * mu_use) / k_use
-        if not pr_use:
+        if not given(pr_use):
             pr_use = auto_props["pr"]
             used_auto = True
 
@@ -592,247 +743,117 @@ def calculate_natural_convection(slug, inputs):
             "mu": mu_use,
             "nu": nu_use,
             "pr": pr_use,
-            "used_auto": used_auto,
-        }
-    def parse_observations(payload):
-        if isinstance(payload, dict) and "observations" in payload:
-            obs = payload.get("observations")
-            if isinstance(obs, str):
-                try:
-                    obs = json.loads(obs)
-                except Exception:
-                    obs = []
-            if isinstance(obs, list):
-                normalized = []
-                for item in obs:
-                    if not isinstance(item, dict):
-                        continue
-                    lower = {str(k).lower(): v for k, v in item.items()}
-                    normalized.append({
-                        "trial": lower.get("trial", item.get("trial", 1)),
-                        "v": lower.get("v", item.get("v", item.get("voltage"))),
-                        "i": lower.get("i", item.get("i", item.get("current"))),
-                        "t1": lower.get("t1", item.get("t1")),
-                        "t2": lower.get("t2", item.get("t2")),
-                        "t3": lower.get("t3", item.get("t3")),
-                        "t4": lower.get("t4", item.get("t4")),
-                        "t5": lower.get("t5", item.get("t5")),
-                        "t6": lower.get("t6", item.get("t6")),
-                        "t7": lower.get("t7", item.get("t7", lower.get("ta", item.get("ta")))),
-                    })
-                return normalized
-
-        trial_re = re.compile(r"^trial_(\\d+)_(v|i|t[1-7])$", re.IGNORECASE)
-        trials = {}
-        if isinstance(payload, dict):
-            for key, val in payload.items():
-                match = trial_re.match(str(key))
-                if not match:
-                    continue
-                idx = int(match.group(1))
-                field = match.group(2).lower()
-                trials.setdefault(idx, {})[field] = parse_numeric(val)
-        if trials:
-            return [
-                {"trial": idx, **data}
-                for idx, data in sorted(trials.items())
-            ]
-
-        if any(k in payload for k in ["v", "i", "t1", "t2", "t3", "t4", "t5", "t6", "t7"]):
-            return [{
-                "trial": 1,
-                "v": parse_numeric(payload.get("v", payload.get("voltage", payload.get("V", 0.0)))),
-                "i": parse_numeric(payload.get("i", payload.get("current", payload.get("I", 0.0)))),
-                "t1": parse_numeric(payload.get("t1", 0.0)),
-                "t2": parse_numeric(payload.get("t2", 0.0)),
-                "t3": parse_numeric(payload.get("t3", 0.0)),
-                "t4": parse_numeric(payload.get("t4", 0.0)),
-                "t5": parse_numeric(payload.get("t5", 0.0)),
-                "t6": parse_numeric(payload.get("t6", 0.0)),
-                "t7": parse_numeric(payload.get("t7", payload.get("ta", payload.get("Ta", 0.0)))),
-            }]
-        return []
-
-    def compute_trial(trial):
-        trial_warnings = []
-        raw_v = trial.get("v")
-        raw_i = trial.get("i")
-        raw_temps = [trial.get(f"t{idx}") for idx in range(1, 7)]
-        raw_ta = trial.get("t7", trial.get("ta"))
-
-        def is_missing(val):
-            return val is None or (isinstance(val, str) and val.strip() == "")
-
-        v = parse_numeric(raw_v)
-        i = parse_numeric(raw_i)
-        temps = [parse_numeric(val) for val in raw_temps]
-        ta = parse_numeric(raw_ta)
-
-        if any(is_missing(val) for val in raw_temps) or is_missing(raw_ta):
-            trial_warnings.append("Missing temperature inputs for this trial.")
-            return {
-                "trial": int(trial.get("trial", 1)),
-                "v": v,
-                "i": i,
-                "temps": [None] * 6,
-                "ta": ta,
-                "ts": None,
-                "delta_t": None,
-                "tf": None,
-                "beta": None,
-                "q": v * i,
-                "rho": rho,
-                "cp": cp,
-                "k_air": k_air,
-                "mu": mu,
-                "nu_kin": nu,
-                "pr": pr,
-                "gr": None,
-                "ra": None,
-                "nu_nusselt": None,
-                "h_exp": None,
-                "h_theoretical": None,
-                "area_s": area_s,
-                "corr_c": None,
-                "corr_n": None,
-                "corr_range": None,
-                "props_source": props_source,
-            }, trial_warnings
-
-        ts = sum(temps) / 6.0 if temps else 0.0
-        delta_t = ts - ta
-
-        if v <= 0 or i <= 0:
-            trial_warnings.append("Voltage or current is non-positive. Check readings.")
-        if delta_t <= 0:
-            trial_warnings.append("Surface temperature is not above ambient; deltaT is non-positive.")
-
+        }, used_auto
+
+    def compute_trials(trial_ids, matrix):
+        """(result, warnings) per trial; every trial is computed at once on the rows of ``matrix``."""
+        check_deadline()
+        v = np.nan_to_num(matrix[0], nan=0.0)
+        i = np.nan_to_num(matrix[1], nan=0.0)
+        temps = matrix[2:8]
+        ta = np.nan_to_num(matrix[8], nan=0.0)
+        missing = np.isnan(temps).any(axis=0) | np.isnan(matrix[8])
         q = v * i
-        tf = ((ts + ta) / 2.0) + 273.15
-        beta = 1.0 / tf if tf else 0.0
-
-        props = resolve_air_properties(tf)
-        rho_use = props["rho"]
-        cp_use = props["cp"]
-        k_use = props["k_air"]
-        mu_use = props["mu"]
-        nu_use = props["nu"]
-        pr_use = props["pr"]
-
-        if props.get("used_auto") and (tf < AIR_PROPS_TABLE[0]["T"] or tf > AIR_PROPS_TABLE[-1]["T"]):
-            trial_warnings.append("Film temperature is outside auto-property table range; values were clamped.")
-        if manual_mode and props.get("used_auto"):
-            trial_warnings.append("Manual air properties were incomplete; auto values were used for missing entries.")
-
-        if delta_t <= 0:
-            return {
-                "trial": int(trial.get("trial", 1)),
-                "v": v,
-                "i": i,
-                "temps": temps,
-                "ta": ta,
-                "ts": ts,
-                "delta_t": delta_t,
-                "tf": tf,
-                "beta": beta,
-                "q": q,
-                "rho": rho_use,
-                "cp": cp_use,
-                "k_air": k_use,
-                "mu": mu_use,
-                "nu_kin": nu_use,
-                "pr": pr_use,
-                "gr": None,
-                "ra": None,
-                "nu_nusselt": None,
-                "h_exp": None,
-                "h_theoretical": None,
-                "area_s": area_s,
-                "corr_c": None,
-                "corr_n": None,
-                "corr_range": None,
-                "props_source": props_source,
-            }, trial_warnings
-
-        gr = (l_tube ** 3) * beta * g * delta_t * (rho_use ** 2) / (mu_use ** 2) if mu_use else 0.0
-        ra = gr * pr_use
-
-        corr_c = 0.56
-        corr_n = 0.25
-        corr_range = "1e4-1e8"
-        if ra >= 1e8:
-            corr_c = 0.13
-            corr_n = 1.0 / 3.0
-            corr_range = "1e8-1e12"
-
-        if ra < 1e4 or ra > 1e12:
-            trial_warnings.append("Rayleigh number is outside correlation ranges; using nearest correlation.")
-
-        nu_corr = corr_c * (ra ** corr_n) if ra > 0 else 0.0
-        h_correlation = (nu_corr * k_use) / l_tube if l_tube else 0.0
-        h_from_power = q / (area_s * delta_t) if area_s and delta_t else 0.0
-
-        result = {
-            "trial": int(trial.get("trial", 1)),
-            "v": v,
-            "i": i,
-            "temps": temps,
-            "ta": ta,
-            "ts": ts,
-            "delta_t": delta_t,
-            "tf": tf,
-            "beta": beta,
-            "q": q,
-            "rho": rho_use,
-            "cp": cp_use,
-            "k_air": k_use,
-            "mu": mu_use,
-            "nu_kin": nu_use,
-            "pr": pr_use,
-            "gr": gr,
-            "ra": ra,
-            "nu_nusselt": nu_corr,
-            "h_exp": h_from_power if h_from_power else None,
-            "h_theoretical": h_correlation if h_correlation else None,
-            "area_s": area_s,
-            "corr_c": corr_c,
-            "corr_n": corr_n,
-            "corr_range": corr_range,
-            "props_source": props_source,
-        }
 
-        return result, trial_warnings
+        with np.errstate(all="ignore"):
+            ts = temps.sum(axis=0) / 6.0
+            delta_t = ts - ta
+            tf = ((ts + ta) / 2.0) + 273.15
+            beta = np.where(tf != 0, 1.0 / tf, 0.0)
+            props, used_auto = resolve_air_properties(tf)
+            props = {key: np.broadcast_to(np.asarray(val, dtype=float), tf.shape) for key, val in props.items()}
+            mu_sq = props["mu"] ** 2
+            gr = np.where(mu_sq != 0, (l_tube ** 3) * beta * g * delta_t * (props["rho"] ** 2) / mu_sq, 0.0)
+            ra = gr * props["pr"]
+            high = ra >= 1e8
+            corr_c = np.where(high, 0.13, 0.56)
+            corr_n = np.where(high, 1.0 / 3.0, 0.25)
+            nu_corr = np.where(ra > 0, corr_c * ra ** corr_n, 0.0)
+            h_correlation = nu_corr * props["k_air"] / l_tube if l_tube else np.zeros_like(ra)
+            h_from_power = q / (area_s * delta_t) if area_s else np.zeros_like(ra)
+        out_of_table = (tf < AIR_PROPS_TABLE[0]["T"]) | (tf > AIR_PROPS_TABLE[-1]["T"])
+
+        cols = [arr.tolist() for arr in (
+            v, i, ta, q, ts, delta_t, tf, beta, props["rho"], props["cp"], props["k_air"], props["mu"],
+            props["nu"], props["pr"], gr, ra, nu_corr, h_correlation, h_from_power, corr_c, corr_n,
+        )]
+        entries = []
+        for idx, (trial_no, temp_row, row) in enumerate(zip(trial_ids, temps.T.tolist(), zip(*cols))):
+            (v_i, i_i, ta_i, q_i, ts_i, dt_i, tf_i, beta_i, rho_i, cp_i, k_i, mu_i,
+             nu_i, pr_i, gr_i, ra_i, nu_corr_i, h_corr_i, h_power_i, corr_c_i, corr_n_i) = row
+            trial_warnings = []
+            if missing[idx]:
+                trial_warnings.append("Missing temperature inputs for this trial.")
+                entries.append((TrialResult(
+                    trial_no, v_i, i_i, [None] * 6, ta_i, q=q_i,
+                    rho=rho, cp=cp, k_air=k_air, mu=mu, nu_kin=nu, pr=pr,
+                    area_s=area_s, props_source=props_source,
+                ), trial_warnings))
+                continue
+
+            if v_i <= 0 or i_i <= 0:
+                trial_warnings.append("Voltage or current is non-positive. Check readings.")
+            if dt_i <= 0:
+                trial_warnings.append("Surface temperature is not above ambient; deltaT is non-positive.")
+            if used_auto and out_of_table[idx]:
+                trial_warnings.append("Film temperature is outside auto-property table range; values were clamped.")
+            if manual_mode and used_auto:
+                trial_warnings.append("Manual air properties were incomplete; auto values were used for missing entries.")
+
+            result = TrialResult(
+                trial_no, v_i, i_i, temp_row, ta_i, ts=ts_i, delta_t=dt_i, tf=tf_i, beta=beta_i, q=q_i,
+                rho=rho_i, cp=cp_i, k_air=k_i, mu=mu_i, nu_kin=nu_i, pr=pr_i,
+                area_s=area_s, props_source=props_source,
+            )
+            if dt_i > 0:
+                if ra_i < 1e4 or ra_i > 1e12:
+                    trial_warnings.append("Rayleigh number is outside correlation ranges; using nearest correlation.")
+                result.gr = gr_i
+                result.ra = ra_i
+                result.nu_nusselt = nu_corr_i
+                result.h_exp = h_power_i if h_power_i else None
+                result.h_theoretical = h_corr_i if h_corr_i else None
+                result.corr_c = corr_c_i
+                result.corr_n = corr_n_i
+                result.corr_range = "1e8-1e12" if ra_i >= 1e8 else "1e4-1e8"
+            entries.append((result, trial_warnings))
+        return entries
 
-    observations = parse_observations(inputs)
-    if not observations:
+    try:
+        if isinstance(inputs, dict) and inputs.get("columns") is not None:
+            trial_ids, matrix = observation_columns(inputs["columns"])
+        else:
+            trial_ids, matrix = observation_matrix(parse_natural_convection_observations(inputs))
+    except ValueError as e:
+        return {"error": str(e)}
+    if not trial_ids:
         return {"error": "No observation trials provided."}
 
+    # trial_cache maps (settings, readings) to an earlier (result, warnings) pair; only
+    # trials whose readings or the shared settings changed are recomputed.
+    settings_key = (props_source, rho, cp, k_air, mu, nu, pr, d_tube, l_tube, g)
+    keys = [
+        (settings_key, (trial_no, *(None if val != val else val for val in row)))
+        for trial_no, row in zip(trial_ids, matrix.T.tolist())
+    ]
+    entries = [trial_cache.get(key) if trial_cache is not None else None for key in keys]
+    todo = [idx for idx, entry in enumerate(entries) if entry is None]
+    if todo:
+        computed = compute_trials([trial_ids[idx] for idx in todo], matrix[:, todo])
+        for idx, entry in zip(todo, computed):
+            entries[idx] = entry
     trials = []
     all_warnings = list(warnings)
-    for trial in observations:
-        result, trial_warnings = compute_trial(trial)
-        if trial_warnings:
-            for w in trial_warnings:
-                all_warnings.append(f"Trial {result['trial']}: {w}")
-        trials.append({
-            "trial": result["trial"],
-            "inputs": {
-                "v": result["v"],
-                "i": result["i"],
-                "t1": result["temps"][0] if len(result["temps"]) > 0 else 0.0,
-                "t2": result["temps"][1] if len(result["temps"]) > 1 else 0.0,
-                "t3": result["temps"][2] if len(result["temps"]) > 2 else 0.0,
-                "t4": result["temps"][3] if len(result["temps"]) > 3 else 0.0,
-                "t5": result["temps"][4] if len(result["temps"]) > 4 else 0.0,
-                "t6": result["temps"][5] if len(result["temps"]) > 5 else 0.0,
-                "t7": result["ta"],
-            },
-            "results": result,
-            "warnings": trial_warnings,
-        })
+    for result, trial_warnings in entries:
+        for w in trial_warnings:
+            all_warnings.append(f"Trial {result.trial}: {w}")
+        trials.append(result)
+    if trial_cache is not None:
+        trial_cache.clear()
+        trial_cache.update(zip(keys, entries))
 
     raw_inputs = {
-        "observations": [{**trial["inputs"], "trial": trial["trial"]} for trial in trials],
+        "observations": [trial.observation() for trial in trials],
         "air_props_mode": props_source,
         "rho_air": rho,
         "cp_air": cp,
@@ -843,7 +864,7 @@ def calculate_natural_convection(slug, inputs):
     }
 
     results = {
-        "trials": [trial["results"] for trial in trials],
+        "trials": trials,
         "props_source": props_source,
         "area_s": area_s,
     }
@@ -864,107 +885,147 @@ def calculate_natural_convection(slug, inputs):
     }
 
 
-def build_natural_convection_steps(calc_data):
-    def build_steps_for_trial(res):
-        return [
-            f"1. Energy input: $$Q = V \\times I = {fmt_num(res['q'])}\\ \\text{{W}}$$",
-            f"2. Average surface temperature: $$T_s = \\frac{{T_1+\\cdots+T_6}}{{6}} = {fmt_num(res['ts'])}^\\circ\\text{{C}}$$",
-            f"3. Temperature difference: $$\\Delta T = T_s - T_a = {fmt_num(res['delta_t'])}\\ \\text{{K}}$$",
-            f"4. Film temperature: $$T_f = \\frac{{T_s+T_a}}{{2}} + 273.15 = {fmt_num(res['tf'])}\\ \\text{{K}}$$",
-            f"5. Volumetric coefficient: $$\\beta = \\frac{{1}}{{T_f}} = {fmt_num(res['beta'])}\\ \\text{{K}}^{{-1}}$$",
-            f"6. Grashof number: $$Gr = L^3 \\beta g \\Delta T \\left(\\frac{{\\rho^2}}{{\\mu^2}}\\right) = {fmt_num(res['gr'])}$$",
-            f"7. Rayleigh number: $$Ra = Gr \\times Pr = {fmt_num(res['ra'])}$$",
-            f"8. Correlation: $$Nu = C(Ra)^n = {fmt_num(res['nu_nusselt'])}$$ "
-            f"$\\text{{(}}C={res['corr_c']},\\ n={fmt_num(res['corr_n'])},\\ \\text{{range}}\\ {res['corr_range']}\\text{{)}}$",
-            f"9. h from correlation: $$h = \\frac{{Nu\\,k}}{{L}} = {fmt_num(res['h_theoretical'])}\\ \\text{{W/m}}^2\\text{{K}}$$",
-            f"10. h from power balance: $$h = \\frac{{Q}}{{A_s \\Delta T}} = {fmt_num(res['h_exp'])}\\ \\text{{W/m}}^2\\text{{K}}$$",
-        ]
+NATURAL_CONVECTION_STEP_FIELDS = (
+    "q", "ts", "delta_t", "tf", "beta", "gr", "ra", "nu_nusselt",
+    "corr_c", "corr_n", "corr_range", "h_theoretical", "h_exp",
+)
+NATURAL_CONVECTION_EXPLAIN_FIELDS = (
+    "trial", "q", "ts", "ta", "delta_t", "ra", "h_exp", "h_theoretical", "corr_c", "corr_n",
+)
+
 
+@lru_cache(maxsize=4096)
+def _natural_convection_trial_steps(values):
+    res = dict(zip(NATURAL_CONVECTION_STEP_FIELDS, values))
+    return (
+        f"1. Energy input: $$Q = V \\times I = {fmt_num(res['q'])}\\ \\text{{W}}$$",
+        f"2. Average surface temperature: $$T_s = \\frac{{T_1+\\cdots+T_6}}{{6}} = {fmt_num(res['ts'])}^\\circ\\text{{C}}$$",
+        f"3. Temperature difference: $$\\Delta T = T_s - T_a = {fmt_num(res['delta_t'])}\\ \\text{{K}}$$",
+        f"4. Film temperature: $$T_f = \\frac{{T_s+T_a}}{{2}} + 273.15 = {fmt_num(res['tf'])}\\ \\text{{K}}$$",
+        f"5. Volumetric coefficient: $$\\beta = \\frac{{1}}{{T_f}} = {fmt_num(res['beta'])}\\ \\text{{K}}^{{-1}}$$",
+        f"6. Grashof number: $$Gr = L^3 \\beta g \\Delta T \\left(\\frac{{\\rho^2}}{{\\mu^2}}\\right) = {fmt_num(res['gr'])}$$",
+        f"7. Rayleigh number: $$Ra = Gr \\times Pr = {fmt_num(res['ra'])}$$",
+        f"8. Correlation: $$Nu = C(Ra)^n = {fmt_num(res['nu_nusselt'])}$$ "
+        f"$\\text{{(}}C={res['corr_c']},\\ n={fmt_num(res['corr_n'])},\\ \\text{{range}}\\ {res['corr_range']}\\text{{)}}$",
+        f"9. h from correlation: $$h = \\frac{{Nu\\,k}}{{L}} = {fmt_num(res['h_theoretical'])}\\ \\text{{W/m}}^2\\text{{K}}$$",
+        f"10. h from power balance: $$h = \\frac{{Q}}{{A_s \\Delta T}} = {fmt_num(res['h_exp'])}\\ \\text{{W/m}}^2\\text{{K}}$$",
+    )
+
+
+def natural_convection_trial_steps(res):
+    # Memoized on the values the steps show, so unchanged trials are not re-formatted.
+    return list(_natural_convection_trial_steps(tuple(res.get(key) for key in NATURAL_CONVECTION_STEP_FIELDS)))
+
+
+def build_natural_convection_steps(calc_data):
     results = calc_data.get("results", {})
     trials = results.get("trials", [])
     if not trials and isinstance(results, dict) and "q" in results:
-        return build_steps_for_trial(results)
-    return [{"trial": res.get("trial", idx + 1), "steps": build_steps_for_trial(res)} for idx, res in enumerate(trials)]
+        return natural_convection_trial_steps(results)
+    return [{"trial": res.get("trial", idx + 1), "steps": natural_convection_trial_steps(res)} for idx, res in enumerate(trials)]
+
+
+def _classify_ra(ra):
+    if ra is None:
+        return "Rayleigh number not available."
+    if ra < 1e4:
+        return "very weak natural convection (correlation may not apply)"
+    if ra < 1e8:
+        return "laminar natural convection on a vertical surface (using C=0.56, n=0.25)"
+    if ra < 1e12:
+        return "turbulent natural convection (using C=0.13, n=1/3)"
+    return "outside standard range; result is an extrapolation"
+
+
+def _fmt_or_dash(val):
+    return fmt_num(val) if val is not None else "-"
+
+
+def _deviation_info(h_exp, h_theoretical):
+    if h_exp is None or h_theoretical in (None, 0):
+        return None, "Deviation not available (theoretical value missing or zero)."
+    dev = abs(h_exp - h_theoretical) / h_theoretical * 100.0
+    if dev <= 20:
+        label = "good agreement"
+    elif dev <= 50:
+        label = "moderate mismatch (common in teaching labs)"
+    else:
+        label = "large mismatch; likely heat losses or measurement/property errors"
+    return dev, label
+
+
+@lru_cache(maxsize=4096)
+def _natural_convection_trial_explanation(values):
+    trial = dict(zip(NATURAL_CONVECTION_EXPLAIN_FIELDS, values))
+    trial_id = trial["trial"]
+    q = trial.get("q")
+    ts = trial.get("ts")
+    ta = trial.get("ta")
+    delta_t = trial.get("delta_t")
+    ra = trial.get("ra")
+    h_exp = trial.get("h_exp")
+    h_theoretical = trial.get("h_theoretical")
+    corr_c = trial.get("corr_c")
+    corr_n = trial.get("corr_n")
+
+    if h_exp is not None and h_theoretical not in (None, 0):
+        dev_text = fmt_num(abs(h_exp - h_theoretical) / h_theoretical * 100.0)
+    else:
+        dev_text = "N/A"
+    conclusion = (
+        f"The experimental heat transfer coefficient was $h_{{exp}} = {_fmt_or_dash(h_exp)}\\ \\text{{W/m}}^2\\text{{K}}$ and the theoretical value predicted by correlation was $h_{{theoretical}} = {_fmt_or_dash(h_theoretical)}\\ \\text{{W/m}}^2\\text{{K}}$ for Trial {trial_id}. "
+        f"The deviation was {dev_text}%, mainly due to steady-state errors, property mismatch, or heat losses.<br>"
+    )
+
+    dev, dev_label = _deviation_info(h_exp, h_theoretical)
+    ra_class = _classify_ra(ra)
+
+    if ts is None or ta is None or delta_t is None:
+        block = (
+            f"<b>Trial {trial_id}</b><br>"
+            "Some required temperatures are missing, so calculations could not be completed for this trial.<br>"
+        )
+        return block, conclusion
+
+    block = [
+        f"<b>Trial {trial_id}</b><br>",
+        f"$Q = V \\times I = {_fmt_or_dash(q)}\\ \\text{{W}}$. This is the electrical power supplied to the heater; higher $Q$ generally raises tube surface temperature.<br>",
+        f"$T_s = {_fmt_or_dash(ts)}^\\circ\\text{{C}},\\ T_a = {_fmt_or_dash(ta)}^\\circ\\text{{C}},\\ \\Delta T = {_fmt_or_dash(delta_t)}\\ \\text{{K}}$. "
+        "The temperature difference $\\Delta T$ is the driving force for natural convection; larger $\\Delta T$ usually increases convection strength.<br>",
+        f"$Ra = {_fmt_or_dash(ra)}$. This indicates the strength of natural convection (buoyancy vs viscosity/thermal diffusion). Regime: {ra_class}.<br>",
+        f"Correlation used: $C = {_fmt_or_dash(corr_c)},\\ n = {_fmt_or_dash(corr_n)}$.<br>",
+        f"$h_{{exp}} = {_fmt_or_dash(h_exp)}\\ \\text{{W/m}}^2\\text{{K}}$ (from power balance), "
+        f"$h_{{theoretical}} = {_fmt_or_dash(h_theoretical)}\\ \\text{{W/m}}^2\\text{{K}}$ (from correlation).<br>",
+    ]
+
+    if dev is None:
+        block.append(f"{dev_label}<br>")
+    else:
+        block.append(f"Deviation = {fmt_num(dev)}%. Interpretation: {dev_label}.<br>")
+        if dev > 50:
+            block.append("<ul>")
+            block.append("<li>Steady state reached?</li>")
+            block.append("<li>T7 truly ambient?</li>")
+            block.append("<li>Radiation losses ignored</li>")
+            block.append("<li>Air properties ($k$, $\\mu$, $Pr$) at film temperature</li>")
+            block.append("<li>Instrument calibration</li>")
+            block.append("</ul>")
+
+    return "".join(block), conclusion
+
+
+def natural_convection_trial_explanation(trial):
+    """``(explanation block, lab record conclusion line)`` for one trial, memoized on its values."""
+    return _natural_convection_trial_explanation(tuple(
+        trial.get(key, 1) if key == "trial" else trial.get(key) for key in NATURAL_CONVECTION_EXPLAIN_FIELDS
+    ))
 
 
 def build_natural_convection_explanations(calc_data):
     results = calc_data.get("results", {})
     trials = results.get("trials", [])
-    explanation_blocks = []
-
-    def classify_ra(ra):
-        if ra is None:
-            return "Rayleigh number not available."
-        if ra < 1e4:
-            return "very weak natural convection (correlation may not apply)"
-        if ra < 1e8:
-            return "laminar natural convection on a vertical surface (using C=0.56, n=0.25)"
-        if ra < 1e12:
-            return "turbulent natural convection (using C=0.13, n=1/3)"
-        return "outside standard range; result is an extrapolation"
-
-    def fmt_or_dash(val):
-        return fmt_num(val) if val is not None else "-"
-
-    def deviation_info(h_exp, h_theoretical):
-        if h_exp is None or h_theoretical in (None, 0):
-            return None, "Deviation not available (theoretical value missing or zero)."
-        dev = abs(h_exp - h_theoretical) / h_theoretical * 100.0
-        if dev <= 20:
-            label = "good agreement"
-        elif dev <= 50:
-            label = "moderate mismatch (common in teaching labs)"
-        else:
-            label = "large mismatch; likely heat losses or measurement/property errors"
-        return dev, label
-
-    for trial in trials:
-        trial_id = trial.get("trial", 1)
-        q = trial.get("q")
-        ts = trial.get("ts")
-        ta = trial.get("ta")
-        delta_t = trial.get("delta_t")
-        ra = trial.get("ra")
-        h_exp = trial.get("h_exp")
-        h_theoretical = trial.get("h_theoretical")
-        corr_c = trial.get("corr_c")
-        corr_n = trial.get("corr_n")
-
-        dev, dev_label = deviation_info(h_exp, h_theoretical)
-        ra_class = classify_ra(ra)
-
-        if ts is None or ta is None or delta_t is None:
-            explanation_blocks.append(
-                f"<b>Trial {trial_id}</b><br>"
-                "Some required temperatures are missing, so calculations could not be completed for this trial.<br>"
-            )
-            continue
-
-        block = [
-            f"<b>Trial {trial_id}</b><br>",
-            f"$Q = V \\times I = {fmt_or_dash(q)}\\ \\text{{W}}$. This is the electrical power supplied to the heater; higher $Q$ generally raises tube surface temperature.<br>",
-            f"$T_s = {fmt_or_dash(ts)}^\\circ\\text{{C}},\\ T_a = {fmt_or_dash(ta)}^\\circ\\text{{C}},\\ \\Delta T = {fmt_or_dash(delta_t)}\\ \\text{{K}}$. "
-            "The temperature difference $\\Delta T$ is the driving force for natural convection; larger $\\Delta T$ usually increases convection strength.<br>",
-            f"$Ra = {fmt_or_dash(ra)}$. This indicates the strength of natural convection (buoyancy vs viscosity/thermal diffusion). Regime: {ra_class}.<br>",
-            f"Correlation used: $C = {fmt_or_dash(corr_c)},\\ n = {fmt_or_dash(corr_n)}$.<br>",
-            f"$h_{{exp}} = {fmt_or_dash(h_exp)}\\ \\text{{W/m}}^2\\text{{K}}$ (from power balance), "
-            f"$h_{{theoretical}} = {fmt_or_dash(h_theoretical)}\\ \\text{{W/m}}^2\\text{{K}}$ (from correlation).<br>",
-        ]
-
-        if dev is None:
-            block.append(f"{dev_label}<br>")
-        else:
-            block.append(f"Deviation = {fmt_num(dev)}%. Interpretation: {dev_label}.<br>")
-            if dev > 50:
-                block.append("<ul>")
-                block.append("<li>Steady state reached?</li>")
-                block.append("<li>T7 truly ambient?</li>")
-                block.append("<li>Radiation losses ignored</li>")
-                block.append("<li>Air properties ($k$, $\mu$, $Pr$) at film temperature</li>")
-                block.append("<li>Instrument calibration</li>")
-                block.append("</ul>")
-
-        explanation_blocks.append("".join(block))
+    pieces = [natural_convection_trial_explanation(trial) for trial in trials]
+    explanation_blocks = [block for block, _ in pieces]
 
     # Final explanation
     valid_trials = [t for t in trials if t.get("h_exp") is not None and t.get("h_theoretical") not in (None, 0)]
@@ -1001,25 +1062,194 @@ def build_natural_convection_explanations(calc_data):
 
     if trials:
         final_lines.append("<br><b>Lab record conclusion (template):</b><br>")
-        for trial in trials:
-            h_exp = trial.get("h_exp")
-            h_theoretical = trial.get("h_theoretical")
-            if h_exp is not None and h_theoretical not in (None, 0):
-                dev_pct = abs(h_exp - h_theoretical) / h_theoretical * 100.0
-                dev_text = fmt_num(dev_pct)
-            else:
-                dev_text = "N/A"
-            final_lines.append(
-                f"The experimental heat transfer coefficient was $h_{{exp}} = {fmt_or_dash(h_exp)}\\ \\text{{W/m}}^2\\text{{K}}$ and the theoretical value predicted by correlation was $h_{{theoretical}} = {fmt_or_dash(h_theoretical)}\\ \\text{{W/m}}^2\\text{{K}}$ for Trial {trial.get('trial', 1)}. "
-                f"The deviation was {dev_text}%, mainly due to steady-state errors, property mismatch, or heat losses.<br>"
-            )
+        final_lines.extend(conclusion for _, conclusion in pieces)
 
     return explanation_blocks, "".join(final_lines)
 
 
-def calculate_experiment(slug, inputs):
+def formula_constant_values(consts):
+    values = {}
+    for key, item in (consts or {}).items():
+        values[key] = parse_numeric(item.get("value", 0.0) if isinstance(item, dict) else item)
+    return values
+
+
+def calculate_formula_experiment(slug, inputs, content=None):
+    inputs = inputs or {}
+    exp = Experiment.query.filter_by(slug=slug).first()
+    content = exp.content if exp and content is None else content
+    if not exp or not (content or {}).get("formulas"):
+        return {"error": "Unknown slug"}
+
+    consts = content.get("constants", {})
+    compiled = get_compiled_formulas(content)
+    warnings = []
+
+    runs = inputs.get("runs")
+    batch = isinstance(runs, list)
+    rows = [row for row in runs if isinstance(row, dict)] if batch else [inputs]
+    if not rows:
+        return {"error": "No runs provided."}
+
+    columns = {}
+    for name in compiled.input_names:
+        values = [row.get(name) for row in rows]
+        missing = sum(1 for val in values if val is None or (isinstance(val, str) and not val.strip()))
+        if missing:
+            warnings.append(f"Input '{name}' is missing in {missing} run(s); using 0.")
+        columns[name] = np.array([parse_numeric(val) for val in values], dtype=float)
+
+    outputs = compiled.evaluate(columns, formula_constant_values(consts))
+
+    for name, values in outputs.items():
+        bad = int(np.count_nonzero(~np.isfinite(values)))
+        if bad:
+            warnings.append(f"'{name}' is undefined (division by zero or invalid input) in {bad} run(s).")
+
+    def to_scalar(val):
+        val = float(val)
+        return val if np.isfinite(val) else None
+
+    if batch:
+        normalized = {name: col.tolist() for name, col in columns.items()}
+        results = {
+            "runs": [
+                {name: to_scalar(outputs[name][idx]) for name in compiled.names}
+                for idx in range(len(rows))
+            ],
+        }
+        raw_inputs = {"runs": rows}
+    else:
+        normalized = {name: float(col[0]) for name, col in columns.items()}
+        results = {name: to_scalar(outputs[name][0]) for name in compiled.names}
+        raw_inputs = normalized
+
+    return {
+        "raw_inputs": raw_inputs,
+        "normalized": normalized,
+        "results": results,
+        "trace": results,
+        "warnings": warnings,
+        "constants": consts,
+        "formulas": [{**spec, "latex": compiled.latex[spec["name"]]} for spec in compiled.specs],
+        "batch": batch,
+    }
+
+
+def build_formula_steps(calc_data):
+    if calc_data.get("batch"):
+        return []
+    results = calc_data.get("results", {})
+    steps = []
+    for idx, spec in enumerate(calc_data.get("formulas", []), start=1):
+        name = spec["name"]
+        value = results.get(name)
+        value_text = fmt_num(value) if value is not None else "\\text{undefined}"
+        unit = f"\\ \\text{{{spec['unit']}}}" if spec.get("unit") else ""
+        steps.append(f"{idx}. {spec['label']}: $${latex_name(name)} = {spec['latex']} = {value_text}{unit}$$")
+    return steps
+
+
+SIM_DIGITS = 4
+
+
+def quantize(value, digits=SIM_DIGITS):
+    value = parse_numeric(value)
+    if not np.isfinite(value):
+        return value
+    return float(f"{value:.{digits}g}")
+
+
+@lru_cache(maxsize=1024)
+def simulate_natural_convection(q, delta_t, d_tube, l_tube):
+    area_s = np.pi * d_tube * l_tube if d_tube and l_tube else 0.0
+
+    q_min = max(10.0, q * 0.4)
+    q_max = max(q_min + 10.0, q * 1.6)
+    qs = np.linspace(q_min, q_max, 10)
+    hs = [val / (area_s * delta_t) if area_s and delta_t else 0.0 for val in qs]
+    return {
+        "q": qs.tolist(),
+        "h": hs,
+        "delta_t": delta_t,
+    }
+
+
+@lru_cache(maxsize=1024)
+def simulate_therm_conductivity(flow, watts):
+    k_copper = 385
+    d = 0.035
+    area = np.pi * d**2 / 4
+    length = 0.3
+
+    q_eff = watts * 0.9
+    gradient = q_eff / (k_copper * area) if area else 0.0
+    t_cold = 25 + (watts / (flow * 4180 / 60 * 10)) if flow else 25
+    t_hot = t_cold + gradient * length
+
+    x = np.linspace(0, length, 10)
+    temps = t_hot - gradient * x
+    return {
+        "x": x.tolist(),
+        "temps": temps.tolist()
+    }
+
+
+@lru_cache(maxsize=1024)
+def _simulate_formula_cached(cache_key, name, lo, hi, points, columns):
+    # Experiment.cache_key names an immutable snapshot, so its content is only read on a miss.
+    experiment_id, version, _ = cache_key
+    content = ExperimentVersion.query.filter_by(experiment_id=experiment_id, version=version).one().content
+    compiled = get_compiled_formulas(content)
+    columns = dict(columns)
+    xs = np.linspace(lo, hi, points)
+    columns[name] = xs
+    outputs = compiled.evaluate(columns, formula_constant_values(content.get("constants", {})))
+
+    return {
+        "input": name,
+        "x": xs.tolist(),
+        "outputs": {
+            key: [float(v) if np.isfinite(v) else None for v in values]
+            for key, values in outputs.items()
+        },
+        "units": {spec["name"]: spec["unit"] for spec in compiled.specs},
+    }
+
+
+def simulate_formula_experiment(slug, inputs, sweep):
+    exp = Experiment.query.filter_by(slug=slug).first()
+    if not exp or not (exp.content or {}).get("formulas"):
+        return {"error": "Unknown slug"}
+
+    compiled = get_compiled_formulas(exp.content)
+    inputs = inputs or {}
+    sweep = sweep or {}
+    if not isinstance(inputs, dict) or not isinstance(sweep, dict):
+        raise ValueError("Inputs and sweep must be JSON objects.")
+    name = sweep.get("input") or (compiled.input_names[0] if compiled.input_names else None)
+    if name not in compiled.input_names:
+        raise ValueError(f"Cannot sweep '{name}'; choose one of the experiment inputs.")
+
+    try:
+        lo = quantize(sweep.get("min", 0.0))
+        hi = quantize(sweep.get("max", lo + 1.0))
+        points = int(parse_numeric(sweep.get("points", 10))) or 10
+    except (OverflowError, ValueError):
+        lo = hi = float("nan")
+    if not (np.isfinite(lo) and np.isfinite(hi)):
+        raise ValueError("Sweep min, max and points must be finite numbers.")
+    points = max(2, min(points, 200))
+
+    # Inputs are quantized so nearby slider positions share one cached sweep.
+    columns = tuple(sorted((key, quantize(inputs.get(key))) for key in compiled.input_names if key != name))
+    return _simulate_formula_cached(exp.cache_key, name, lo, hi, points, columns)
+
+
+def calculate_experiment(slug, inputs, trial_cache=None, content=None):
+    """``content`` overrides the experiment's current content, e.g. an older snapshot for a saved run."""
     if slug == "therm-conductivity-metal-rod":
-        return calculate_therm_conductivity(slug, inputs)
+        return calculate_therm_conductivity(slug, inputs, content)
     if slug == "natural-convection-vertical-tube":
-        return calculate_natural_convection(slug, inputs)
-    return {"error": "Unknown slug"}
+        return calculate_natural_convection(slug, inputs, trial_cache, content)
+    return calculate_formula_experiment(slug, inputs, content)
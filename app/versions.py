@@ -0,0 +1,108 @@
+"""Immutable snapshots of experiment content.
+
+Whenever a flush changes an experiment's content, a new ``experiment_version``
+row is written with the next version number and the content hash, and the
+experiment's ``version``/``content_hash`` columns are bumped to match. Caches
+key on ``Experiment.cache_key`` instead of re-hashing the content, and saved
+runs point at the snapshot they were calculated with, so they can be
+recalculated against the same constants later.
+
+Only assignments to ``Experiment.content`` are seen; mutating the JSON value
+in place does not mark the row dirty.
+
+Snapshots are never removed, so an experiment that has any, or any saved or
+archived runs, cannot be deleted.
+"""
+import copy
+
+import sqlalchemy as sa
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.fragments import content_version
+from app.models import ArchivedRun, Experiment, ExperimentVersion, StudentRun
+
+
+class ImmutableVersion(RuntimeError):
+    pass
+
+
+class ExperimentInUse(RuntimeError):
+    pass
+
+
+def _snapshot(session, experiment, digest):
+    if experiment.content_hash is not None:
+        experiment.version = (experiment.version or 1) + 1
+    elif experiment.version is None:
+        experiment.version = 1
+    experiment.content_hash = digest
+    session.add(ExperimentVersion(
+        experiment=experiment,
+        version=experiment.version,
+        content_hash=digest,
+        title=experiment.title,
+        content=copy.deepcopy(experiment.content),
+    ))
+
+
+@event.listens_for(Session, "before_flush")
+def _snapshot_changed_content(session, flush_context, instances):
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Experiment):
+            digest = content_version(obj.content)
+            if digest != obj.content_hash:
+                _snapshot(session, obj, digest)
+
+
+@event.listens_for(ExperimentVersion, "before_update")
+def _refuse_update(mapper, connection, target):
+    raise ImmutableVersion("Experiment versions are immutable; edit the experiment instead.")
+
+
+@event.listens_for(Session, "before_flush")
+def _refuse_delete_in_use(session, flush_context, instances):
+    for obj in session.deleted:
+        if isinstance(obj, Experiment) and _in_use(session, obj.id):
+            raise ExperimentInUse(f"Experiment {obj.slug!r} has saved versions or runs and cannot be deleted.")
+
+
+def _in_use(session, experiment_id):
+    return any(
+        session.query(model.id).filter_by(experiment_id=experiment_id).first() is not None
+        for model in (ExperimentVersion, StudentRun, ArchivedRun)
+    )
+
+
+# Bulk deletes skip ORM events, so SQLite refuses them itself.
+DELETE_GUARD = """CREATE TRIGGER IF NOT EXISTS experiment_delete_guard BEFORE DELETE ON experiment
+    WHEN EXISTS (SELECT 1 FROM experiment_version WHERE experiment_id = old.id)
+        OR EXISTS (SELECT 1 FROM student_run WHERE experiment_id = old.id)
+        OR EXISTS (SELECT 1 FROM archived_run WHERE experiment_id = old.id) BEGIN
+    SELECT RAISE(ABORT, 'experiment has saved versions or runs and cannot be deleted');
+END"""
+
+
+def install(engine):
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as conn:
+        # Earlier builds deleted an experiment's snapshots along with it.
+        conn.execute(sa.text("DROP TRIGGER IF EXISTS experiment_version_delete"))
+        conn.execute(sa.text(DELETE_GUARD))
+
+
+def snapshot_id(experiment):
+    return (db.session.query(ExperimentVersion.id)
+            .filter_by(experiment_id=experiment.id, version=experiment.version)
+            .scalar())
+
+
+def backfill():
+    """Give experiments saved before versioning their first snapshot."""
+    pending = Experiment.query.filter(Experiment.content_hash.is_(None)).all()
+    for experiment in pending:
+        _snapshot(db.session, experiment, content_version(experiment.content))
+    if pending:
+        db.session.commit()
@@ -0,0 +1,267 @@
+"""Benchmarks for the calculation, normalization and rendering hot paths.
+
+Usage:
+    python -m benchmarks.bench                          # run everything, print a table
+    python -m benchmarks.bench --quick                  # smaller fixtures for a fast check
+    python -m benchmarks.bench --output baseline.json   # save machine-readable results
+    python -m benchmarks.bench --compare baseline.json  # exit 1 if anything regressed
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+
+from app.json_provider import LabJSONProvider, orjson
+from app.models import Experiment
+from app.utils import (
+    _format_theory_cached,
+    build_natural_convection_steps,
+    build_therm_conductivity_steps,
+    calculate_experiment,
+    calculate_natural_convection,
+    calculate_therm_conductivity,
+    format_theory_html,
+    simulate_formula_experiment,
+    normalize_inputs,
+    parse_numeric,
+)
+from seed import NATURAL_CONVECTION_CONTENT, THERM_CONDUCTIVITY_CONTENT
+from tests import fixtures
+from tests.fixtures import make_app
+
+
+FULL_SIZES = {"trials": [1, 10, 1000], "runs": [1, 100, 10000]}
+QUICK_SIZES = {"trials": [1, 10], "runs": [1, 100]}
+NUMERIC_SAMPLES = [42, 3.14, "0.15", " 27.1 ", "1.918e-5", "1.918x10^-5", "1*10^-6", "10^-3", "", None, "n/a"]
+
+
+def build_cases(app, sizes):
+    from flask import render_template
+    from app.blueprints.main import report_context
+
+    cases = {}
+    consts = THERM_CONDUCTIVITY_CONTENT["constants"]
+
+    cases["parse_numeric/float"] = lambda: parse_numeric(27.1)
+    cases["parse_numeric/sci_string"] = lambda: parse_numeric("1.918x10^-5")
+    mixed = (NUMERIC_SAMPLES * (10000 // len(NUMERIC_SAMPLES) + 1))[:10000]
+    cases[f"parse_numeric/mixed_{len(mixed)}"] = lambda: [parse_numeric(val) for val in mixed]
+
+    cases["normalize_inputs/therm"] = lambda: normalize_inputs(fixtures.THERM_INPUTS, consts)
+
+    for count in sizes["runs"]:
+        def therm_batch(count=count):
+            for _ in range(count):
+                calculate_therm_conductivity(fixtures.THERM_SLUG, fixtures.THERM_INPUTS)
+        cases[f"calculate_therm_conductivity/runs_{count}"] = therm_batch
+
+        runs = {"runs": fixtures.formula_runs(count)}
+        cases[f"calculate_formula_experiment/runs_{count}"] = (
+            lambda runs=runs: calculate_experiment(fixtures.FORMULA_SLUG, runs)
+        )
+
+    for count in sizes["trials"]:
+        inputs = fixtures.convection_inputs(count)
+        cases[f"calculate_natural_convection/trials_{count}"] = (
+            lambda inputs=inputs: calculate_natural_convection(fixtures.CONVECTION_SLUG, inputs)
+        )
+        calc = calculate_natural_convection(fixtures.CONVECTION_SLUG, inputs)
+        cases[f"build_natural_convection_steps/trials_{count}"] = (
+            lambda calc=calc: build_natural_convection_steps(calc)
+        )
+
+    therm_calc = calculate_therm_conductivity(fixtures.THERM_SLUG, fixtures.THERM_INPUTS)
+    cases["build_therm_conductivity_steps"] = lambda: build_therm_conductivity_steps(therm_calc)
+
+    def theory_case(text):
+        # Cleared on every call, so the case times the tokenizer and renderer rather than a cache hit.
+        def render():
+            _format_theory_cached.cache_clear()
+            return format_theory_html(text)
+        return render
+
+    cases["format_theory_html/therm"] = theory_case(THERM_CONDUCTIVITY_CONTENT["theory"])
+    cases["format_theory_html/natural_convection"] = theory_case(NATURAL_CONVECTION_CONTENT["theory"])
+
+    def report_case(slug, inputs, form):
+        experiment = Experiment.query.filter_by(slug=slug).first()
+        calc = calculate_experiment(slug, inputs)
+        context = report_context(experiment, {**fixtures.STUDENT, **inputs}, calc)
+
+        def render():
+            with app.test_request_context(f"/experiment/{slug}/report", method="POST", data=form):
+                return render_template("report.html", **context)
+        return render
+
+    # JSON encoding of the larger API payloads, stdlib encoder vs orjson (when installed).
+    payloads = {
+        f"formula_runs_{max(sizes['runs'])}": calculate_experiment(
+            fixtures.FORMULA_SLUG, {"runs": fixtures.formula_runs(max(sizes["runs"]))}),
+        f"natural_convection_trials_{max(sizes['trials'])}": calculate_natural_convection(
+            fixtures.CONVECTION_SLUG, fixtures.convection_inputs(max(sizes["trials"]))),
+        "simulate_sweep_200": simulate_formula_experiment(
+            fixtures.FORMULA_SLUG, {}, {"input": "v", "min": 10, "max": 100, "points": 200}),
+    }
+    encoders = {"stdlib": LabJSONProvider(app)}
+    encoders["stdlib"].fast = False
+    if orjson is not None:
+        encoders["fast"] = LabJSONProvider(app)
+    for label, payload in payloads.items():
+        for encoder_name, provider in encoders.items():
+            cases[f"json_response/{encoder_name}/{label}"] = (
+                lambda provider=provider, payload=payload: provider.response(payload)
+            )
+
+    cases["render_report/therm"] = report_case(fixtures.THERM_SLUG, fixtures.THERM_INPUTS, fixtures.THERM_INPUTS)
+    for count in [count for count in sizes["trials"] if count <= 10]:
+        inputs = fixtures.convection_inputs(count)
+        form = {"air_props_mode": "auto", "observations": json.dumps(inputs["observations"])}
+        cases[f"render_report/natural_convection_trials_{count}"] = report_case(fixtures.CONVECTION_SLUG, inputs, form)
+
+    return cases
+
+
+def time_case(fn, repeat, min_time):
+    fn()
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or loops >= 100000:
+            break
+        loops = max(loops * 2, int(loops * min_time / max(elapsed, 1e-9)))
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        samples.append((time.perf_counter() - start) / loops)
+    return samples, loops
+
+
+def peak_memory(fn):
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def run(cases, repeat, min_time, pattern=None):
+    results = {}
+    for name, fn in cases.items():
+        if pattern and pattern not in name:
+            continue
+        samples, loops = time_case(fn, repeat, min_time)
+        results[name] = {
+            "median_s": statistics.median(samples),
+            "min_s": min(samples),
+            "mean_s": statistics.fmean(samples),
+            "stdev_s": statistics.pstdev(samples),
+            "loops": loops,
+            "repeat": repeat,
+            "peak_bytes": peak_memory(fn),
+        }
+        print(f"{name:<55} {fmt_time(results[name]['median_s']):>10} {fmt_bytes(results[name]['peak_bytes']):>10}",
+              file=sys.stderr)
+    return results
+
+
+def compare(results, baseline, threshold, mem_threshold):
+    regressions = []
+    rows = []
+    for name, current in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        # The fastest sample is the least noisy estimate on a shared machine.
+        ratio = current["min_s"] / base["min_s"] if base["min_s"] else 1.0
+        mem_ratio = current["peak_bytes"] / base["peak_bytes"] if base["peak_bytes"] else 1.0
+        status = "ok"
+        if ratio > 1.0 + threshold:
+            status = "SLOWER"
+            regressions.append(name)
+        elif mem_ratio > 1.0 + mem_threshold:
+            status = "MORE MEMORY"
+            regressions.append(name)
+        rows.append((name, ratio, mem_ratio, status))
+
+    for name, ratio, mem_ratio, status in rows:
+        print(f"{name:<55} time x{ratio:5.2f}  mem x{mem_ratio:5.2f}  {status}")
+    return regressions
+
+
+def fmt_time(seconds):
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f} us"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds:.2f} s"
+
+
+def fmt_bytes(size):
+    if size < 1024:
+        return f"{size} B"
+    if size < 1024 ** 2:
+        return f"{size / 1024:.1f} KiB"
+    return f"{size / 1024 ** 2:.1f} MiB"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="use the small fixture sizes only")
+    parser.add_argument("--filter", help="only run cases whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.05, help="minimum seconds per timed sample")
+    parser.add_argument("--output", help="write results JSON to this file")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown before failing (0.25 = 25%%)")
+    parser.add_argument("--mem-threshold", type=float, default=0.5, help="allowed peak memory growth before failing")
+    args = parser.parse_args(argv)
+
+    app = make_app()
+    with app.app_context():
+        cases = build_cases(app, QUICK_SIZES if args.quick else FULL_SIZES)
+        results = run(cases, args.repeat, args.min_time, args.filter)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "quick": args.quick,
+        },
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        regressions = compare(results, baseline, args.threshold, args.mem_threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) regressed: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""Seeded in-memory app and sample inputs shared by the tests and ``benchmarks.bench``."""
+import numpy as np
+
+from app import create_app
+from app.extensions import db
+from app.models import Experiment
+from seed import NATURAL_CONVECTION_CONTENT, THERM_CONDUCTIVITY_CONTENT
+
+
+THERM_SLUG = "therm-conductivity-metal-rod"
+CONVECTION_SLUG = "natural-convection-vertical-tube"
+FORMULA_SLUG = "bench-natural-convection-formulas"
+
+STUDENT = {
+    "student_name": "Bench Student",
+    "usn": "1XX00ME000",
+    "date": "2026-01-15",
+    "instructor": "Prof. Bench",
+}
+
+THERM_INPUTS = {
+    "flow_rate_value": "0.15",
+    "flow_rate_unit": "L/min",
+    "t_wi": "24.5",
+    "t_wo": "27.1",
+    "t1": "88.2",
+    "t2": "79.4",
+    "t3": "70.9",
+    "t4": "62.3",
+    "t5": "54.0",
+    "t6": "41.2",
+    "t7": "33.5",
+    "t8": "44.8",
+    "t9": "35.1",
+    "t12": "48.6",
+    "t13": "36.2",
+    "cpw": "4178",
+    "cpw_unit": "J/kgK",
+    "rho": "1000",
+    "rho_unit": "kg/m^3",
+    "rod_diameter_unit": "m",
+    "l1_unit": "m",
+    "l2_unit": "m",
+    "l3_unit": "m",
+    "ri_unit": "m",
+    "ro_unit": "m",
+    "dx_unit": "m",
+}
+
+# Natural convection rewritten as declarative formulas, used for the vectorized batch path.
+FORMULA_CONTENT = {
+    "inputs": [{"name": name} for name in ["v", "i", "t1", "t2", "t3", "t4", "t5", "t6", "ta"]],
+    "constants": {
+        "d_tube": {"value": 0.038, "unit": "m", "desc": "Tube Diameter"},
+        "L_tube": {"value": 0.5, "unit": "m", "desc": "Tube Length"},
+        "g": {"value": 9.81, "unit": "m/s^2", "desc": "Acceleration due to gravity"},
+        "k_air": {"value": 0.02662, "unit": "W/mK", "desc": "Air conductivity"},
+        "nu_air": {"value": 1.702e-5, "unit": "m^2/s", "desc": "Kinematic viscosity"},
+        "pr_air": {"value": 0.7255, "unit": "-", "desc": "Prandtl number"},
+    },
+    "formulas": [
+        {"name": "q", "expr": "v * i", "unit": "W"},
+        {"name": "ts", "expr": "(t1 + t2 + t3 + t4 + t5 + t6) / 6", "unit": "C"},
+        {"name": "delta_t", "expr": "ts - ta", "unit": "K"},
+        {"name": "tf", "expr": "(ts + ta) / 2 + 273.15", "unit": "K"},
+        {"name": "gr", "expr": "g * (1 / tf) * delta_t * L_tube^3 / nu_air^2"},
+        {"name": "ra", "expr": "gr * pr_air"},
+        {"name": "nu_nusselt", "expr": "where(ra < 1e8, 0.56 * ra^0.25, 0.13 * ra^(1/3))"},
+        {"name": "h_theoretical", "expr": "nu_nusselt * k_air / L_tube", "unit": "W/m^2K"},
+        {"name": "h_exp", "expr": "q / (pi * d_tube * L_tube * delta_t)", "unit": "W/m^2K"},
+    ],
+}
+
+
+def convection_trials(count, seed=0):
+    rng = np.random.default_rng(seed)
+    trials = []
+    for idx in range(count):
+        base = 55.0 + rng.uniform(0, 20)
+        temps = base + np.linspace(6, -6, 6) + rng.normal(0, 0.5, 6)
+        trial = {
+            "trial": idx + 1,
+            "v": round(float(rng.uniform(60, 100)), 2),
+            "i": round(float(rng.uniform(1.0, 2.0)), 3),
+            "t7": round(float(rng.uniform(26, 32)), 2),
+        }
+        for pos, temp in enumerate(temps, start=1):
+            trial[f"t{pos}"] = round(float(temp), 2)
+        trials.append(trial)
+    return trials
+
+
+def convection_inputs(count):
+    return {"air_props_mode": "auto", "observations": convection_trials(count)}
+
+
+def formula_runs(count):
+    runs = []
+    for trial in convection_trials(count):
+        run = {key: trial[key] for key in ["v", "i", "t1", "t2", "t3", "t4", "t5", "t6"]}
+        run["ta"] = trial["t7"]
+        runs.append(run)
+    return runs
+
+
+def make_app(config=None):
+    """An in-memory app seeded with the three test experiments; ``config`` adds to the test config."""
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://", "TESTING": True, **(config or {})})
+    with app.app_context():
+        db.create_all()
+        for slug, title, content in [
+            (THERM_SLUG, "Thermal Conductivity", THERM_CONDUCTIVITY_CONTENT),
+            (CONVECTION_SLUG, "Natural Convection", NATURAL_CONVECTION_CONTENT),
+            (FORMULA_SLUG, "Natural Convection (formulas)", FORMULA_CONTENT),
+        ]:
+            db.session.add(Experiment(slug=slug, title=title, content=content))
+        db.session.commit()
+    return app
@@ -0,0 +1,118 @@
+import threading
+import time
+import unittest
+
+from app.admission import BudgetExceeded, check_deadline, count_trials, pool
+from app.metrics import registry, stage
+from tests import fixtures
+from tests.fixtures import make_app
+
+
+def convection_inputs(trials):
+    row = {"v": 80, "i": 0.5, "t1": 60, "t2": 62, "t3": 64, "t4": 66, "t5": 68, "t6": 70, "t7": 28}
+    return {"observations": [{**row, "trial": idx + 1} for idx in range(trials)]}
+
+
+class TestAdmission(unittest.TestCase):
+    def setUp(self):
+        self.app = make_app()
+        self.client = self.app.test_client()
+
+    def test_counts_trials_in_every_input_shape(self):
+        self.assertEqual(count_trials(convection_inputs(3)), 3)
+        self.assertEqual(count_trials({"observations": '[{"v": 1}, {"v": 2}]'}), 2)
+        self.assertEqual(count_trials({"runs": [{}] * 4}), 4)
+        self.assertEqual(count_trials({"columns": {"v": [1, 2, 3], "t1": [4, 5, 6]}}), 3)
+        self.assertEqual(count_trials({"trial_1_v": 1, "trial_1_i": 2, "trial_2_v": 3}), 2)
+        self.assertEqual(count_trials(fixtures.THERM_INPUTS), 1)
+
+    def test_rejects_oversized_requests(self):
+        self.app.config["CALC_MAX_PAYLOAD"] = 2048
+        resp = self.client.post("/api/calculate", json={"slug": fixtures.CONVECTION_SLUG, "inputs": convection_inputs(40)})
+        self.assertEqual(resp.status_code, 413)
+
+        self.app.config["CALC_MAX_PAYLOAD"] = 256 * 1024
+        self.app.config["CALC_MAX_TRIALS"] = 5
+        resp = self.client.post("/api/calculate", json={"slug": fixtures.CONVECTION_SLUG, "inputs": convection_inputs(6)})
+        self.assertEqual(resp.status_code, 413)
+        self.assertIn("at most 5", resp.json["error"])
+        ok = self.client.post("/api/calculate", json={"slug": fixtures.CONVECTION_SLUG, "inputs": convection_inputs(5)})
+        self.assertEqual(ok.status_code, 200)
+        self.assertEqual(len(ok.json["trials"]), 5)
+
+        resp = self.client.post("/api/simulate", json={"slug": fixtures.FORMULA_SLUG, "sweep": {"points": 5000}})
+        self.assertEqual(resp.status_code, 413)
+
+    def test_simulate_separates_bad_sweeps_from_unknown_slugs(self):
+        resp = self.client.post("/api/simulate", json={"slug": fixtures.FORMULA_SLUG, "sweep": {"input": "nope"}})
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("Cannot sweep", resp.json["error"])
+        resp = self.client.post("/api/simulate", json={"slug": fixtures.FORMULA_SLUG, "sweep": [1, 2]})
+        self.assertEqual(resp.status_code, 400)
+        resp = self.client.post("/api/simulate", json={"slug": fixtures.FORMULA_SLUG, "sweep": {"points": "inf"}})
+        self.assertEqual(resp.status_code, 400)
+        resp = self.client.post("/api/simulate", json={"slug": "no-such-experiment"})
+        self.assertEqual(resp.status_code, 404)
+
+    def test_busy_pool_refuses_quickly(self):
+        self.app.config.update(CALC_WORKERS=1, CALC_QUEUE=0)
+        pool.configure(1, 0)
+        release = threading.Event()
+        started = threading.Event()
+
+        def hold():
+            started.set()
+            release.wait(5)
+
+        def occupy():
+            with self.app.app_context():
+                pool.run(hold, timeout=5)
+
+        worker = threading.Thread(target=occupy)
+        worker.start()
+        try:
+            started.wait(5)
+            begin = time.perf_counter()
+            resp = self.client.post("/api/calculate", json={"slug": fixtures.THERM_SLUG, "inputs": fixtures.THERM_INPUTS})
+            self.assertEqual(resp.status_code, 429)
+            self.assertLess(time.perf_counter() - begin, 1.0)
+        finally:
+            release.set()
+            worker.join()
+        resp = self.client.post("/api/calculate", json={"slug": fixtures.THERM_SLUG, "inputs": fixtures.THERM_INPUTS})
+        self.assertEqual(resp.status_code, 200)
+
+    def test_budget_overrun_is_reported(self):
+        with self.app.app_context():
+            with self.assertRaises(BudgetExceeded):
+                pool.run(time.sleep, 0.5, timeout=0.05)
+
+    def test_overrunning_work_stops_at_its_next_check(self):
+        stopped = threading.Event()
+
+        def spin():
+            try:
+                while True:
+                    check_deadline()
+                    time.sleep(0.01)
+            finally:
+                stopped.set()
+
+        with self.app.app_context():
+            with self.assertRaises(BudgetExceeded):
+                pool.run(spin, timeout=0.05)
+        self.assertTrue(stopped.wait(1))
+        check_deadline()
+
+    def test_pooled_stages_keep_the_request_endpoint(self):
+        self.app.config["METRICS_ENABLED"] = True
+        registry.reset()
+
+        def timed():
+            with stage("pooled"):
+                pass
+
+        with self.app.test_request_context("/api/calculate", method="POST"):
+            pool.run(timed, timeout=5)
+        self.assertIn(("api.calculate", "pooled"), {(row["endpoint"], row["stage"]) for row in registry.snapshot()})
+        registry.reset()
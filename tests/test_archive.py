@@ -0,0 +1,119 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime
+
+from app import create_app
+from app.archive import ArchiveError, append_records, archive_runs, load_run, read_record
+from app.extensions import db
+from app.models import ArchivedRun, StudentRun
+from tests import fixtures
+from tests.fixtures import make_app
+
+
+class TestArchiveFile(unittest.TestCase):
+    def test_frames_round_trip_and_detect_corruption(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "runs.lra")
+            records = [{"id": idx, "results": {"trials": [{"h": 5.1 + idx}] * 20}} for idx in range(3)]
+            spans = append_records(path, records[:2]) + append_records(path, records[2:])
+            self.assertEqual([read_record(path, *span) for span in spans], records)
+            self.assertLess(spans[1][1], len(str(records[1])) / 4)
+
+            offset, length = spans[1]
+            with open(path, "r+b") as fh:
+                fh.seek(offset + length - 3)
+                fh.write(b"\xff\xff")
+            with self.assertRaises(Exception):
+                read_record(path, offset, length)
+            with self.assertRaises(ArchiveError):
+                read_record(path, offset, length + 10 ** 6)
+
+
+class TestArchiveRuns(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.app = make_app()
+        self.app.config["ARCHIVE_DIR"] = self.tmp.name
+        self.client = self.app.test_client()
+        self.ids = []
+        for date in ["2024-03-01", "2024-09-01", "2024-10-01", "2026-01-01"]:
+            form = {**fixtures.STUDENT, **fixtures.THERM_INPUTS, "date": date}
+            res = self.client.post("/api/save_run", json={"slug": fixtures.THERM_SLUG, "formData": form})
+            self.ids.append(res.json["id"])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_archived_runs_stay_readable(self):
+        with self.app.app_context():
+            before = load_run(self.ids[1])
+            self.assertEqual(archive_runs(datetime(2025, 1, 1), batch_size=2), 3)
+            self.assertEqual(StudentRun.query.count(), 1)
+            self.assertEqual(ArchivedRun.query.count(), 3)
+            after = load_run(self.ids[1])
+            self.assertTrue(after.pop("archived"))
+            before.pop("archived")
+            self.assertEqual(after, before)
+            self.assertIsNone(load_run(10 ** 6))
+        self.assertEqual(sorted(os.listdir(self.tmp.name)),
+                         [f"{fixtures.THERM_SLUG}-2024-s1.lra", f"{fixtures.THERM_SLUG}-2024-s2.lra"])
+
+        page = self.client.get(f"/admin/runs/{self.ids[0]}")
+        self.assertEqual(page.status_code, 200)
+        self.assertIn(b"Archived", page.data)
+        exported = self.client.get(f"/admin/runs/{self.ids[0]}/export")
+        self.assertEqual(exported.json["usn"], fixtures.STUDENT["usn"])
+        self.assertEqual(exported.json["experiment"], fixtures.THERM_SLUG)
+        self.assertEqual(self.client.get("/admin/runs/999999").status_code, 404)
+
+    def test_archived_ids_are_never_reused(self):
+        with self.app.app_context():
+            self.assertEqual(archive_runs(datetime(2030, 1, 1)), 4)
+            self.assertEqual(StudentRun.query.count(), 0)
+        new_id = self.client.post("/api/save_run", json={
+            "slug": fixtures.THERM_SLUG, "formData": {**fixtures.STUDENT, **fixtures.THERM_INPUTS}}).json["id"]
+        self.assertGreater(new_id, max(self.ids))
+
+
+class TestAutoincrementUpgrade(unittest.TestCase):
+    def test_old_run_table_is_rebuilt_past_archived_ids(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "old.db")
+            conn = sqlite3.connect(path)
+            conn.executescript("""
+                CREATE TABLE student_run (id INTEGER PRIMARY KEY, experiment_id INTEGER NOT NULL,
+                    student_name VARCHAR(64) NOT NULL, usn VARCHAR(32) NOT NULL, date DATETIME,
+                    inputs JSON NOT NULL, results JSON NOT NULL, idempotency_key VARCHAR(64));
+                CREATE UNIQUE INDEX ix_student_run_idempotency_key ON student_run (idempotency_key);
+                CREATE TABLE archived_run (id INTEGER NOT NULL PRIMARY KEY, experiment_id INTEGER NOT NULL,
+                    student_name VARCHAR(64) NOT NULL, usn VARCHAR(32) NOT NULL, date DATETIME,
+                    archive VARCHAR(128) NOT NULL, "offset" INTEGER NOT NULL, length INTEGER NOT NULL);
+                INSERT INTO student_run (id, experiment_id, student_name, usn, inputs, results, idempotency_key)
+                    VALUES (2, 1, 'Asha Rao', '1RV21ME010', '{}', '{}', 'k2');
+                INSERT INTO archived_run VALUES (9, 1, 'Old Student', '1RV19ME001', NULL, 'x.lra', 0, 1);
+            """)
+            conn.commit()
+            conn.close()
+            app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}", "TESTING": True})
+            with app.app_context():
+                self.assertEqual(StudentRun.query.one().idempotency_key, "k2")
+                run = StudentRun(experiment_id=1, student_name="New", usn="1RV25ME001", inputs={}, results={})
+                db.session.add(run)
+                db.session.commit()
+                self.assertEqual(run.id, 10)
+                indexed = db.session.execute(db.text("SELECT rowid FROM student_run_search ORDER BY rowid"))
+                self.assertEqual(indexed.scalars().all(), [2, 9, 10])
+                db.engine.dispose()
+            conn = sqlite3.connect(path)
+            sql = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'student_run'").fetchone()[0]
+            with self.assertRaises(sqlite3.IntegrityError):
+                conn.execute("INSERT INTO student_run (experiment_id, student_name, usn, inputs, results, "
+                             "idempotency_key) VALUES (1, 'a', 'b', '{}', '{}', 'k2')")
+            conn.close()
+            self.assertIn("AUTOINCREMENT", sql)
+
+
+if __name__ == "__main__":
+    unittest.main()
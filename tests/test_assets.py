@@ -0,0 +1,60 @@
+import base64
+import hashlib
+import os
+import tempfile
+import unittest
+
+from app import create_app
+from app.assets import MANIFEST_PATH, build_manifest, load_manifest
+
+
+class TestAssetManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.css = b"body{margin:0}"
+        os.makedirs(os.path.join(self.tmp.name, "vendor", "bootstrap"))
+        with open(os.path.join(self.tmp.name, "vendor", "bootstrap", "bootstrap.min.css"), "wb") as fh:
+            fh.write(self.css)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_local_file_gets_hashed_copy_and_integrity(self):
+        manifest = build_manifest(self.tmp.name)
+        entry = manifest["bootstrap_css"]
+        digest = hashlib.sha1(self.css).hexdigest()[:8]
+        self.assertEqual(entry["file"], f"vendor/bootstrap/bootstrap.min.{digest}.css")
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, entry["file"])))
+        expected = "sha384-" + base64.b64encode(hashlib.sha384(self.css).digest()).decode()
+        self.assertEqual(entry["integrity"], expected)
+        self.assertNotIn("file", manifest["chartjs"])
+
+    def test_stale_hashed_copies_are_removed(self):
+        stale = os.path.join(self.tmp.name, "vendor", "bootstrap", "bootstrap.min.0badc0de.css")
+        open(stale, "w").close()
+        build_manifest(self.tmp.name)
+        self.assertFalse(os.path.exists(stale))
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, "vendor", "bootstrap", "bootstrap.min.css")))
+
+    def test_startup_only_reads_the_built_manifest(self):
+        before = sorted(os.walk(self.tmp.name))
+        manifest = load_manifest(self.tmp.name)
+        self.assertEqual(sorted(os.walk(self.tmp.name)), before)
+        self.assertNotIn("file", manifest["bootstrap_css"])
+
+        built = build_manifest(self.tmp.name)
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, MANIFEST_PATH)))
+        self.assertEqual(load_manifest(self.tmp.name), built)
+        os.remove(os.path.join(self.tmp.name, built["bootstrap_css"]["file"]))
+        self.assertNotIn("file", load_manifest(self.tmp.name)["bootstrap_css"])
+
+    def test_page_uses_local_assets_and_cdn_fallback(self):
+        app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:"})
+        app.static_folder = self.tmp.name
+        app.extensions["assets"] = build_manifest(self.tmp.name)
+        html = app.test_client().get("/").data.decode()
+        self.assertIn('<link rel="stylesheet" href="/static/vendor/bootstrap/bootstrap.min.', html)
+        self.assertIn('integrity="sha384-', html)
+        self.assertIn('rel="preload" href="/static/vendor/bootstrap/', html)
+        self.assertIn('<script src="https://cdn.jsdelivr.net/npm/chart.js@4.4.0/dist/chart.umd.min.js" crossorigin="anonymous"></script>', html)
+        self.assertNotIn("bootstrap@5.3.2/dist/css", html)
@@ -0,0 +1,66 @@
+import unittest
+
+from app.calc_state import apply_delta, store
+from tests import fixtures
+from tests.fixtures import make_app
+
+
+class TestApplyDelta(unittest.TestCase):
+    def test_patches_adds_and_removes_trials(self):
+        inputs = {"air_props_mode": "auto", "observations": [
+            {"trial": 1, "v": 80, "t1": 60},
+            {"trial": "2", "v": 75, "t1": 61},
+        ]}
+        merged = apply_delta(inputs, {"inputs": {"air_props_mode": "manual"},
+                                      "trials": {"2": {"t1": 65, "bogus": 1}, "3": {"v": 70}, "1": None}})
+        self.assertEqual(merged["air_props_mode"], "manual")
+        self.assertEqual([obs["trial"] for obs in merged["observations"]], ["2", 3])
+        self.assertEqual(merged["observations"][0], {"trial": "2", "v": 75, "t1": 65})
+        self.assertIsNone(merged["observations"][1]["t7"])
+        self.assertEqual(inputs["observations"][1]["t1"], 61)
+
+
+class TestIncrementalCalculate(unittest.TestCase):
+    def setUp(self):
+        self.app = make_app()
+        self.client = self.app.test_client()
+
+    def calculate(self, **body):
+        return self.client.post("/api/calculate", json={"slug": fixtures.CONVECTION_SLUG, **body})
+
+    def cached_results(self):
+        (state,) = [state for key, state in store._entries.items() if key[1] == fixtures.CONVECTION_SLUG]
+        return {result.trial: result for result, _ in state.trial_cache.values()}
+
+    def test_delta_recomputes_only_changed_trials(self):
+        inputs = fixtures.convection_inputs(20)
+        first = self.calculate(inputs=inputs).json
+        self.assertTrue(first["calc_token"])
+        before = self.cached_results()
+
+        delta = {"token": first["calc_token"], "trials": {"7": {"t3": 90.0}}}
+        second = self.calculate(delta=delta).json
+        self.assertTrue(second["success"])
+        after = self.cached_results()
+        self.assertIs(after[1], before[1])
+        self.assertIs(after[20], before[20])
+        self.assertIsNot(after[7], before[7])
+
+        inputs["observations"][6]["t3"] = 90.0
+        full = self.client.post("/api/calculate", json={"slug": fixtures.CONVECTION_SLUG, "inputs": inputs}).json
+        for key in ("trials", "explanation_blocks", "final_explanation", "steps_by_trial", "warnings"):
+            self.assertEqual(second[key], full[key])
+
+        self.assertEqual(self.calculate(delta=delta).status_code, 409)
+        changed = self.calculate(delta={"token": full["calc_token"], "inputs": {"air_props_mode": "manual"}}).json
+        self.assertTrue(changed["success"])
+        self.assertIsNot(self.cached_results()[1], after[1])
+
+    def test_stale_or_foreign_token(self):
+        resp = self.calculate(delta={"token": "nope", "trials": {}})
+        self.assertEqual(resp.status_code, 409)
+        self.assertTrue(resp.json["stale"])
+        token = self.calculate(inputs=fixtures.convection_inputs(2)).json["calc_token"]
+        other = self.app.test_client()
+        resp = other.post("/api/calculate", json={"slug": fixtures.CONVECTION_SLUG, "delta": {"token": token}})
+        self.assertEqual(resp.status_code, 409)
@@ -0,0 +1,50 @@
+import base64
+import unittest
+import xml.etree.ElementTree as ET
+
+from app.charts import chart_uri, nice_ticks, report_charts
+
+
+def decode(uri):
+    prefix = "data:image/svg+xml;base64,"
+    assert uri.startswith(prefix)
+    return ET.fromstring(base64.b64decode(uri[len(prefix):]))
+
+
+class TestCharts(unittest.TestCase):
+    def test_nice_ticks_cover_range(self):
+        ticks = nice_ticks(41.2, 88.2)
+        self.assertLessEqual(ticks[0], 41.2)
+        self.assertGreaterEqual(ticks[-1], 88.2)
+        self.assertTrue(2 <= len(ticks) <= 12)
+        self.assertEqual(len(nice_ticks(5.0, 5.0)) > 1, True)
+
+    def test_line_chart_is_valid_svg_with_gaps(self):
+        uri = chart_uri("line", ["T1", "T2", "T3"], [("Rod", [88.2, None, 70.9])], y_label="Temperature (C)")
+        root = decode(uri)
+        ns = "{http://www.w3.org/2000/svg}"
+        paths = root.findall(f"{ns}path")
+        self.assertEqual(len(paths), 1)
+        self.assertEqual(paths[0].get("d").count("M"), 2)
+        self.assertEqual(len(root.findall(f"{ns}circle")), 2)
+
+    def test_identical_data_hits_cache(self):
+        first = chart_uri("bar", ["Trial 1"], [("h_exp", [5.2]), ("h_theoretical", [4.8])])
+        second = chart_uri("bar", ["Trial 1"], [("h_exp", [5.2]), ("h_theoretical", [4.8])])
+        self.assertIs(first, second)
+
+    def test_report_charts_per_experiment(self):
+        therm = report_charts("therm-conductivity-metal-rod", {"normalized": {"t_rod": [88, 79, 70, 62, 54]}, "results": {}})
+        self.assertEqual(len(therm), 1)
+        convection = report_charts("natural-convection-vertical-tube", {"results": {"trials": [
+            {"trial": 1, "temps": [60, 61, 62, 63, 64, 65], "h_exp": 5.1, "h_theoretical": 4.9},
+            {"trial": 2, "temps": [70, 71, 72, 73, 74, 75], "h_exp": None, "h_theoretical": 5.3},
+        ]}})
+        self.assertEqual([chart["title"] for chart in convection], ["Temperature Distribution Graph", "Comparison Graph"])
+        bars = decode(convection[1]["uri"]).findall("{http://www.w3.org/2000/svg}rect")
+        # background + 2 legend swatches + 3 finite bars
+        self.assertEqual(len(bars), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import unittest
+
+import numpy as np
+
+from app.extensions import db
+from app.formulas import FormulaError, compile_formulas
+from app.models import Experiment
+from app.utils import _simulate_formula_cached, calculate_experiment, quantize, simulate_formula_experiment
+from tests.fixtures import make_app
+
+
+CONTENT = {
+    "inputs": [
+        {"name": "v", "label": "Voltage", "unit": "V"},
+        {"name": "i", "label": "Current", "unit": "A"},
+        {"name": "ts", "label": "Surface Temp", "unit": "C"},
+        {"name": "ta", "label": "Ambient Temp", "unit": "C"},
+        {"name": "mode", "type": "select", "options": []},
+    ],
+    "constants": {
+        "d_tube": {"value": 0.038, "unit": "m", "desc": "Tube Diameter"},
+        "L_tube": {"value": 0.5, "unit": "m", "desc": "Tube Length"},
+    },
+    "formulas": [
+        {"name": "q", "expr": "v * i", "label": "Heat input", "unit": "W"},
+        {"name": "area_s", "expr": "pi * d_tube * L_tube", "unit": "m^2"},
+        {"name": "h_exp", "expr": "q / (area_s * (ts - ta))", "unit": "W/m^2K"},
+    ],
+}
+
+
+class TestFormulaCompiler(unittest.TestCase):
+    def test_vectorized_evaluation(self):
+        compiled = compile_formulas(CONTENT)
+        self.assertEqual(compiled.input_names, ["v", "i", "ts", "ta"])
+        out = compiled.evaluate(
+            {"v": [80, 75], "i": [1.5, 1.4], "ts": [65, 60], "ta": [30, 30]},
+            {"d_tube": 0.038, "L_tube": 0.5},
+        )
+        area = np.pi * 0.038 * 0.5
+        np.testing.assert_allclose(out["q"], [120.0, 105.0])
+        np.testing.assert_allclose(out["area_s"], [area, area])
+        np.testing.assert_allclose(out["h_exp"], [120.0 / (area * 35), 105.0 / (area * 30)])
+
+    def test_caret_is_power(self):
+        compiled = compile_formulas({"inputs": [{"name": "x"}], "formulas": [{"name": "y", "expr": "x^3"}]})
+        self.assertEqual(float(compiled.evaluate({"x": [2.0]})["y"][0]), 8.0)
+
+    def test_rejects_unsafe_or_invalid_expressions(self):
+        bad_exprs = [
+            "__import__('os').system('ls')",
+            "v.__class__",
+            "[v for v in range(3)]",
+            "lambda: 1",
+            "undefined_name * 2",
+            "sqrt(v, i)",
+            "v +",
+        ]
+        for expr in bad_exprs:
+            content = {"inputs": [{"name": "v"}, {"name": "i"}], "formulas": [{"name": "out", "expr": expr}]}
+            with self.subTest(expr=expr):
+                with self.assertRaises(FormulaError):
+                    compile_formulas(content)
+
+    def test_literal_and_evaluation_errors_are_formula_errors(self):
+        with self.assertRaises(FormulaError):
+            compile_formulas({"inputs": [{"name": "x"}], "formulas": [{"name": "y", "expr": "x * " + "9" * 400}]})
+        compiled = compile_formulas({"inputs": [{"name": "v"}, {"name": "i"}], "formulas": [{"name": "q", "expr": "v * i"}]})
+        with self.assertRaises(FormulaError):
+            compiled.evaluate({"v": [1.0, 2.0], "i": [1.0, 2.0, 3.0]})
+
+    def test_rejects_forward_references_and_shadowing(self):
+        with self.assertRaises(FormulaError):
+            compile_formulas({"inputs": [{"name": "v"}], "formulas": [
+                {"name": "a", "expr": "b * 2"},
+                {"name": "b", "expr": "v"},
+            ]})
+        with self.assertRaises(FormulaError):
+            compile_formulas({"inputs": [{"name": "v"}], "formulas": [{"name": "v", "expr": "1"}]})
+
+
+class TestFormulaExperiment(unittest.TestCase):
+    slug = "test-formula-experiment"
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = make_app()
+        cls.ctx = cls.app.app_context()
+        cls.ctx.push()
+        db.session.add(Experiment(slug=cls.slug, title="Formula Test", content=CONTENT))
+        db.session.commit()
+
+    @classmethod
+    def tearDownClass(cls):
+        db.session.remove()
+        cls.ctx.pop()
+
+    def test_single_and_batch(self):
+        single = calculate_experiment(self.slug, {"v": "80", "i": 1.5, "ts": 65, "ta": 30})
+        self.assertAlmostEqual(single["results"]["q"], 120.0)
+        self.assertFalse(single["batch"])
+
+        batch = calculate_experiment(self.slug, {"runs": [
+            {"v": 80, "i": 1.5, "ts": 65, "ta": 30},
+            {"v": 75, "i": 1.4, "ts": 30, "ta": 30},
+        ]})
+        runs = batch["results"]["runs"]
+        self.assertEqual(len(runs), 2)
+        self.assertAlmostEqual(runs[0]["h_exp"], single["results"]["h_exp"])
+        self.assertIsNone(runs[1]["h_exp"])
+        self.assertTrue(any("h_exp" in w for w in batch["warnings"]))
+
+    def test_simulate_sweep(self):
+        sim = simulate_formula_experiment(self.slug, {"i": 2, "ts": 60, "ta": 30}, {"input": "v", "min": 0, "max": 100, "points": 5})
+        self.assertEqual(sim["x"], [0.0, 25.0, 50.0, 75.0, 100.0])
+        self.assertEqual(sim["outputs"]["q"], [0.0, 50.0, 100.0, 150.0, 200.0])
+
+    def test_simulate_reuses_quantized_sweeps(self):
+        _simulate_formula_cached.cache_clear()
+        sweep = {"input": "v", "min": 0, "max": 100, "points": 5}
+        first = simulate_formula_experiment(self.slug, {"i": 2, "ts": 60, "ta": 30}, sweep)
+        nudged = simulate_formula_experiment(self.slug, {"i": "2.00001", "ts": 60, "ta": 30}, sweep)
+        self.assertIs(first, nudged)
+        self.assertEqual(_simulate_formula_cached.cache_info().misses, 1)
+        moved = simulate_formula_experiment(self.slug, {"i": 2.5, "ts": 60, "ta": 30}, sweep)
+        self.assertEqual(moved["outputs"]["q"][-1], 250.0)
+        self.assertEqual(quantize("123456"), 123500.0)
+
+    def test_simulate_cache_follows_content_edits(self):
+        sweep = {"input": "v", "min": 0, "max": 100, "points": 5}
+        inputs = {"i": 2, "ts": 60, "ta": 30}
+        self.assertEqual(simulate_formula_experiment(self.slug, inputs, sweep)["outputs"]["q"][-1], 200.0)
+        exp = Experiment.query.filter_by(slug=self.slug).first()
+        formulas = [{**spec, "expr": "2 * v * i"} if spec["name"] == "q" else spec for spec in CONTENT["formulas"]]
+        exp.content = {**CONTENT, "formulas": formulas}
+        db.session.commit()
+        try:
+            self.assertEqual(simulate_formula_experiment(self.slug, inputs, sweep)["outputs"]["q"][-1], 400.0)
+        finally:
+            exp.content = CONTENT
+            db.session.commit()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import json
+import unittest
+
+from flask import g
+
+from app import create_app, fragments
+from app.extensions import db
+from app.fragments import content_version
+from app.models import Experiment
+
+
+CONTENT = {
+    "aim": "Find $k$ of the rod",
+    "apparatus": "Rod, heater",
+    "description": "Plain text",
+    "theory": "Fourier: $$ Q = -k A \\frac{dT}{dx} $$",
+    "procedure": ["Switch on the heater", "Wait for steady state"],
+    "inputs": [{"name": "q", "label": "Heat input", "unit": "W"}],
+    "constants": {"area": {"desc": "Area", "value": 0.01, "unit": "m^2"}},
+    "viva": [{"question": "What is k?", "answer": "Conductivity"}],
+}
+
+
+class TestContentVersion(unittest.TestCase):
+    def test_version_ignores_key_order(self):
+        reordered = json.loads(json.dumps(CONTENT, sort_keys=True))
+        self.assertEqual(content_version(CONTENT), content_version(dict(reversed(list(reordered.items())))))
+        self.assertNotEqual(content_version(CONTENT), content_version({**CONTENT, "aim": "Other"}))
+
+
+class TestFragmentCache(unittest.TestCase):
+    def setUp(self):
+        fragments.invalidate()
+        self.app = create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+            "MATH_RENDERER": "text",
+        })
+        with self.app.app_context():
+            db.session.add(Experiment(slug="rod", title="Rod", content=CONTENT))
+            db.session.commit()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        fragments.invalidate()
+
+    def test_page_is_served_from_cache(self):
+        first = self.client.get("/experiment/rod").data.decode()
+        self.assertEqual(len(fragments.cache), len(fragments.FRAGMENTS))
+        self.assertIn("Switch on the heater", first)
+        self.assertIn('<span class="math">k</span>', first)
+        second = self.client.get("/experiment/rod").data.decode()
+        self.assertEqual(first, second)
+        self.assertEqual(len(fragments.cache), len(fragments.FRAGMENTS))
+
+    def test_admin_edit_invalidates(self):
+        self.client.get("/experiment/rod")
+        with self.app.app_context():
+            exp_id = Experiment.query.filter_by(slug="rod").first().id
+        content = {**CONTENT, "procedure": ["Record the readings"]}
+        self.client.post(f"/admin/experiment/{exp_id}/edit", data={
+            "title": "Rod", "slug": "rod", "content_json": json.dumps(content),
+        })
+        self.assertEqual(len(fragments.cache), 0)
+        page = self.client.get("/experiment/rod").data.decode()
+        self.assertIn("Record the readings", page)
+        self.assertNotIn("Switch on the heater", page)
+
+    def test_pending_math_survives_cache_hit(self):
+        self.app.config["MATH_RENDERER"] = "none"
+        for _ in range(2):
+            # Second pass is a cache hit and must still ask for MathJax.
+            with self.app.test_request_context("/experiment/rod"):
+                exp = Experiment.query.filter_by(slug="rod").first()
+                fragments.render_fragment("theory", exp)
+                self.assertTrue(g.math_pending)
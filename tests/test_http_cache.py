@@ -0,0 +1,94 @@
+import gzip
+import os
+import re
+import tempfile
+import unittest
+
+from flask import url_for
+
+from app import create_app
+from app.extensions import db
+from app.models import Experiment
+
+
+CONTENT = {"aim": "Find k", "procedure": ["Heat"], "inputs": [], "constants": {}, "viva": []}
+
+
+class TestConditionalPages(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:"})
+        with self.app.app_context():
+            db.session.add(Experiment(slug="rod", title="Rod", content=CONTENT))
+            db.session.commit()
+        self.client = self.app.test_client()
+
+    def test_not_modified_until_content_changes(self):
+        first = self.client.get("/experiment/rod")
+        etag = first.headers["ETag"]
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertEqual(first.headers["Cache-Control"], "no-cache")
+        again = self.client.get("/experiment/rod", headers={"If-None-Match": etag})
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.data, b"")
+
+        with self.app.app_context():
+            exp = Experiment.query.filter_by(slug="rod").first()
+            exp.content = {**CONTENT, "aim": "Find k again"}
+            db.session.commit()
+        changed = self.client.get("/experiment/rod", headers={"If-None-Match": etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers["ETag"], etag)
+
+    def test_index_etag_tracks_experiment_list(self):
+        etag = self.client.get("/").headers["ETag"]
+        self.assertEqual(self.client.get("/", headers={"If-None-Match": etag}).status_code, 304)
+        with self.app.app_context():
+            db.session.add(Experiment(slug="tube", title="Tube", content=CONTENT))
+            db.session.commit()
+        self.assertEqual(self.client.get("/", headers={"If-None-Match": etag}).status_code, 200)
+
+    def test_html_is_gzipped_above_threshold(self):
+        plain = self.client.get("/experiment/rod")
+        self.assertNotIn("Content-Encoding", plain.headers)
+        packed = self.client.get("/experiment/rod", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(packed.headers["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", packed.headers["Vary"])
+        self.assertEqual(gzip.decompress(packed.data), plain.data)
+
+        self.app.config["COMPRESS_MIN_SIZE"] = 10 ** 7
+        self.assertNotIn("Content-Encoding", self.client.get("/", headers={"Accept-Encoding": "gzip"}).headers)
+
+
+class TestStaticAssets(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:"})
+        self.app.static_folder = self.tmp.name
+        with open(os.path.join(self.tmp.name, "app.js"), "w") as fh:
+            fh.write("console.log('lab');\n" * 200)
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_fingerprinted_url_is_immutable(self):
+        with self.app.test_request_context("/"):
+            url = url_for("static", filename="app.js")
+        self.assertRegex(url, r"/static/app\.js\?v=[0-9a-f]{12}$")
+        resp = self.client.get(url)
+        self.assertIn("immutable", resp.headers["Cache-Control"])
+        self.assertIn("max-age=31536000", resp.headers["Cache-Control"])
+        resp.close()
+        bare = self.client.get("/static/app.js")
+        self.assertNotIn("immutable", bare.headers.get("Cache-Control", ""))
+        bare.close()
+
+    def test_precompressed_files_are_served(self):
+        result = self.app.test_cli_runner().invoke(args=["compress-static"])
+        self.assertIn("Wrote", result.output)
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, "app.js.gz")))
+        resp = self.client.get("/static/app.js", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(resp.headers["Content-Encoding"], "gzip")
+        self.assertTrue(re.match(r"(text|application)/javascript", resp.headers["Content-Type"]))
+        self.assertEqual(gzip.decompress(resp.data), ("console.log('lab');\n" * 200).encode())
+        resp.close()
@@ -0,0 +1,72 @@
+import json
+import unittest
+from datetime import datetime
+
+import numpy as np
+from flask import jsonify
+
+from app import create_app
+from app.json_provider import LabJSONProvider, orjson, round_floats
+from app.utils import TrialResult
+
+
+PAYLOAD = {
+    "area": np.pi * np.float64(0.038) * 0.5,
+    "count": np.int64(3),
+    "flag": np.bool_(True),
+    "x": np.linspace(0, 1, 5),
+    "grid": np.arange(6, dtype=np.float32).reshape(2, 3),
+    "strided": np.arange(10.0)[::3],
+    "trial": TrialResult(1, 80.0, 1.5, [70.0] * 6, 30.0, q=np.float64(120.0)),
+    "when": datetime(2024, 1, 2, 3, 4, 5),
+    "big": 2 ** 70,
+    "missing": float("nan"),
+    "temps": np.array([20.5, np.nan, np.inf]),
+}
+
+
+class TestJSONProvider(unittest.TestCase):
+    def make_app(self, **config):
+        return create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:", **config})
+
+    def test_serializes_numpy_values(self):
+        app = self.make_app(JSON_FAST=False)
+        self.assertIsInstance(app.json, LabJSONProvider)
+        with app.test_request_context():
+            raw = jsonify(PAYLOAD).get_data()
+        self.assertNotIn(b"NaN", raw)
+        self.assertNotIn(b"Infinity", raw)
+        data = json.loads(raw)
+        self.assertAlmostEqual(data["area"], 0.0596902604, places=8)
+        self.assertEqual(data["count"], 3)
+        self.assertIs(data["flag"], True)
+        self.assertEqual(data["x"], [0.0, 0.25, 0.5, 0.75, 1.0])
+        self.assertEqual(data["grid"], [[0.0, 1.0, 2.0], [3.0, 4.0, 5.0]])
+        self.assertEqual(data["strided"], [0.0, 3.0, 6.0, 9.0])
+        self.assertEqual(data["trial"]["q"], 120.0)
+        self.assertEqual(data["when"], "Tue, 02 Jan 2024 03:04:05 GMT")
+        self.assertEqual(data["big"], 2 ** 70)
+        self.assertIsNone(data["missing"])
+        self.assertEqual(data["temps"], [20.5, None, None])
+        self.assertEqual(json.loads(app.json.dumps({"h": np.float64("nan")})), {"h": None})
+
+    @unittest.skipIf(orjson is None, "orjson is not installed")
+    def test_fast_encoder_matches_stdlib(self):
+        slow = self.make_app(JSON_FAST=False)
+        fast = self.make_app()
+        self.assertTrue(fast.json.fast)
+        with slow.test_request_context():
+            expected = jsonify(PAYLOAD).get_data()
+        with fast.test_request_context():
+            actual = jsonify(PAYLOAD).get_data()
+        self.assertEqual(json.loads(actual), json.loads(expected))
+        small = {"b": np.float64(1.5), "a": [1, 2], "nan": float("nan"), "inf": np.array([np.inf])}
+        self.assertEqual(json.loads(fast.json.dumps(small)), json.loads(slow.json.dumps(small)))
+
+    def test_float_rounding(self):
+        self.assertEqual(round_floats({"a": [1 / 3, np.float64(2 / 3)], "b": float("nan")}, 3),
+                         {"a": [0.333, 0.667], "b": None})
+        app = self.make_app(JSON_FLOAT_DIGITS=4)
+        with app.test_request_context():
+            data = json.loads(jsonify({"h": 12.345678, "x": np.array([1e-5 / 3])}).get_data())
+        self.assertEqual(data, {"h": 12.35, "x": [3.333e-06]})
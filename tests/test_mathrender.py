@@ -0,0 +1,70 @@
+import sys
+import types
+import unittest
+from unittest import mock
+
+from app import mathrender
+from app.mathrender import active_renderer, prerender, prerender_steps
+from tests import fixtures
+from tests.fixtures import make_app
+
+
+def fake_render(tex, display, renderer):
+    if "\\bad" in tex:
+        return None
+    return f"<{'B' if display else 'I'}>{tex}</>"
+
+
+class TestMathPrerender(unittest.TestCase):
+    def test_segments_are_replaced(self):
+        with mock.patch.object(mathrender, "render_tex", fake_render):
+            out, pending = prerender("<p>Where $k$ is</p>$$ Q = -k A $$ and \\(x &lt; 1\\)", renderer="svg")
+        self.assertEqual(str(out), "<p>Where <I>k</> is</p><B>Q = -k A</> and <I>x < 1</>")
+        self.assertFalse(pending)
+
+    def test_failed_segments_are_left_for_mathjax(self):
+        with mock.patch.object(mathrender, "render_tex", fake_render):
+            out, pending = prerender("$a$ then $$\\bad{b}$$", renderer="svg")
+            steps, steps_pending = prerender_steps([{"trial": 1, "steps": ["$x$"]}], renderer="svg")
+        self.assertEqual(str(out), "<I>a</> then $$\\bad{b}$$")
+        self.assertTrue(pending)
+        self.assertEqual(steps, [{"trial": 1, "steps": ["<I>x</>"]}])
+        self.assertFalse(steps_pending)
+
+    def test_no_renderer_keeps_mathjax(self):
+        app = make_app({"MATH_RENDERER": "none"})
+        with app.test_request_context("/"):
+            out, pending = prerender("$$ x $$")
+            self.assertEqual(str(out), "$$ x $$")
+            self.assertTrue(pending)
+            self.assertTrue(app.jinja_env.globals["math_pending"]())
+            rendered = app.jinja_env.from_string("{{ text | math }}").render(text="<b>$y$</b>")
+            self.assertEqual(rendered, "<b>$y$</b>")
+
+
+class TestReportMath(unittest.TestCase):
+    def test_pdf_uses_svg_or_text_until_the_engine_finishes(self):
+        seen = []
+
+        class FakeHTML:
+            def __init__(self, string):
+                self.html = string
+
+            def write_pdf(self):
+                seen.append(active_renderer())
+                return b"%PDF-1.7"
+
+        app = make_app()
+        client = app.test_client()
+        weasyprint = types.SimpleNamespace(HTML=FakeHTML)
+        for available, expected in [({"mathml", "text"}, "text"), ({"svg", "mathml", "text"}, "svg")]:
+            with mock.patch.dict(sys.modules, {"weasyprint": weasyprint}), \
+                    mock.patch.object(mathrender, "_backend_available", lambda name: name in available), \
+                    mock.patch.object(mathrender, "render_tex", fake_render):
+                resp = client.post(f"/experiment/{fixtures.THERM_SLUG}/report", data=fixtures.THERM_INPUTS)
+            self.assertEqual(resp.mimetype, "application/pdf")
+            self.assertEqual(seen.pop(), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+
+from app.metrics import BUCKETS, LatencyHistogram, MetricsRegistry, NULL_STAGE, registry, stage
+from tests.fixtures import make_app
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test_percentiles_stay_within_bucket(self):
+        hist = LatencyHistogram()
+        for _ in range(90):
+            hist.observe(0.002)
+        for _ in range(10):
+            hist.observe(0.5)
+        self.assertEqual(hist.count, 100)
+        self.assertLess(hist.percentile(0.50), 0.003)
+        self.assertGreater(hist.percentile(0.99), 0.3)
+        self.assertLessEqual(hist.percentile(0.99), 0.5)
+        self.assertIsNone(LatencyHistogram().percentile(0.5))
+
+    def test_prometheus_buckets_are_cumulative(self):
+        reg = MetricsRegistry()
+        reg.observe("api.calculate", "calc", 0.001)
+        reg.observe("api.calculate", "calc", 100.0)
+        text = reg.prometheus_text()
+        self.assertIn('lab_stage_duration_seconds_bucket{endpoint="api.calculate",stage="calc",le="+Inf"} 2', text)
+        self.assertIn('lab_stage_duration_seconds_count{endpoint="api.calculate",stage="calc"} 2', text)
+        last_bound = f"{BUCKETS[-1]:.6g}"
+        self.assertIn(f'stage="calc",le="{last_bound}"}} 1', text)
+
+
+class TestStageInstrumentation(unittest.TestCase):
+    def setUp(self):
+        registry.reset()
+
+    def tearDown(self):
+        registry.reset()
+
+    def test_disabled_is_noop(self):
+        app = make_app({"METRICS_ENABLED": False})
+        with app.test_request_context("/api/calculate"):
+            self.assertIs(stage("calc"), NULL_STAGE)
+        app.test_client().post("/api/simulate", json={"slug": "natural-convection-vertical-tube"})
+        self.assertEqual(registry.snapshot(), [])
+
+    def test_enabled_records_stages_and_totals(self):
+        app = make_app({"METRICS_ENABLED": True})
+        client = app.test_client()
+        client.post("/api/calculate", json={"slug": "no-such-experiment", "inputs": {}})
+        stages = {(row["endpoint"], row["stage"]) for row in registry.snapshot()}
+        self.assertIn(("api.calculate", "calc"), stages)
+        self.assertIn(("api.calculate", "total"), stages)
+
+        response = client.get("/admin/metrics/prometheus")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'endpoint="api.calculate",stage="calc"', response.data)
+        self.assertEqual(client.get("/admin/metrics").status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,13 @@
+import json
+import tracemalloc
 import unittest
 
 from app import create_app
 from app.extensions import db
-from app.models import Experiment
-from app.utils import calculate_natural_convection, get_air_properties_auto
+from app.models import Experiment, StudentRun
+from app.utils import TrialResult, calculate_natural_convection, get_air_properties_auto, parse_observation_columns
+from tests import fixtures
+from tests.fixtures import make_app
 
 
 class TestNaturalConvection(unittest.TestCase):
@@ -82,6 +86,98 @@ class TestNaturalConvection(unittest.TestCase):
         self.assertGreater(trials[0]["h_theoretical"], 0)
         self.assertAlmostEqual(trials[0]["ra"], trials[0]["gr"] * trials[0]["pr"], delta=abs(trials[0]["ra"]) * 0.01 + 1e-6)
 
+    def test_columnar_observations_match_trial_list(self):
+        rows = [
+            {"trial": 1, "v": 80, "i": 1.5, "t1": 70, "t2": 68, "t3": 66, "t4": 64, "t5": 62, "t6": 60, "t7": 30},
+            {"trial": 2, "v": 75, "i": 1.4, "t1": 65, "t2": 63, "t3": 61, "t4": 60, "t5": 58, "t6": 57, "t7": 30},
+        ]
+        columns = {key: [row[key] for row in rows] for key in rows[0]}
+        slug = "natural-convection-vertical-tube"
+        by_rows = calculate_natural_convection(slug, {"observations": rows})
+        by_columns = calculate_natural_convection(slug, {"columns": columns})
+        self.assertEqual(by_columns["results"]["trials"], by_rows["results"]["trials"])
+        self.assertEqual(by_columns["raw_inputs"]["observations"], by_rows["raw_inputs"]["observations"])
+
+        by_keys = calculate_natural_convection(slug, {
+            f"trial_{row['trial']}_{key}": val for row in rows for key, val in row.items() if key != "trial"
+        })
+        self.assertEqual(by_keys["results"]["trials"], by_rows["results"]["trials"])
+
+    def test_columnar_observations_validation(self):
+        trials = parse_observation_columns({"V": [80, "1.2x10^1"], "i": [1.5, None], "Ta": ["", 30]})
+        self.assertEqual([t["trial"] for t in trials], [1, 2])
+        self.assertEqual(trials[1]["v"], 12.0)
+        self.assertIsNone(trials[1]["i"])
+        self.assertIsNone(trials[0]["t7"])
+        self.assertIsNone(trials[0]["t1"])
+
+        calc = calculate_natural_convection("natural-convection-vertical-tube", {"columns": {"v": [80, 75], "i": [1.5]}})
+        self.assertIn("same number of trials", calc["error"])
+
+    def test_vectorized_trials_match_one_at_a_time(self):
+        slug = "natural-convection-vertical-tube"
+        rows = fixtures.convection_trials(12, seed=3)
+        rows[2]["t4"] = ""
+        rows[5]["t7"] = 95.0
+        rows[7].update({f"t{idx}": 600.0 for idx in range(1, 7)})
+        for mode in [{"air_props_mode": "auto"}, {"air_props_mode": "manual", "k_air": 0.027, "nu_air": 1.7e-5}]:
+            batch = calculate_natural_convection(slug, {**mode, "columns": {key: [row[key] for row in rows] for key in rows[0]}})
+            for row, trial in zip(rows, batch["results"]["trials"]):
+                single = calculate_natural_convection(slug, {**mode, "observations": [row]})
+                self.assertEqual(single["results"]["trials"][0], trial)
+            self.assertTrue(any("Missing temperature" in w for w in batch["warnings"]))
+            self.assertTrue(any("deltaT is non-positive" in w for w in batch["warnings"]))
+
+    def test_trial_results_are_compact_records(self):
+        count = 500
+        columns = {
+            "v": [80.0 + idx % 7 for idx in range(count)],
+            "i": [1.5] * count,
+            **{f"t{idx}": [70.0 - idx] * count for idx in range(1, 7)},
+            "t7": [30.0] * count,
+        }
+        calc = calculate_natural_convection("natural-convection-vertical-tube", {"columns": columns})
+        as_dicts = [dict(trial) for trial in calc["results"]["trials"]]
+
+        tracemalloc.start()
+        before, _ = tracemalloc.get_traced_memory()
+        records = [TrialResult(**item) for item in as_dicts]
+        records_size = tracemalloc.get_traced_memory()[0] - before
+        copies = [dict(item) for item in as_dicts]
+        dicts_size = tracemalloc.get_traced_memory()[0] - before - records_size
+        tracemalloc.stop()
+        self.assertEqual(len(records), len(copies))
+        # The same trial values held as 26-key dicts take more than twice the memory of slotted records.
+        self.assertLess(records_size * 2, dicts_size)
+
+        trials = calc["results"]["trials"]
+        self.assertIsInstance(trials[0], TrialResult)
+        self.assertFalse(hasattr(trials[0], "__dict__"))
+        self.assertEqual(trials[0]["q"], trials[0].q)
+        self.assertIsNone(trials[0].get("missing"))
+        self.assertEqual(as_dicts[0], trials[0])
+
+        payload = json.loads(self.app.json.dumps(calc["results"]))
+        self.assertEqual(payload["trials"][3], json.loads(json.dumps(as_dicts[3])))
+
+
+class TestNaturalConvectionRuns(unittest.TestCase):
+    def test_save_run_stores_trial_records_as_json(self):
+        app = make_app()
+        client = app.test_client()
+        columns = {"v": [80, 75], "i": [1.5, 1.4], "t1": [70, 65], "t2": [68, 63], "t3": [66, 61],
+                   "t4": [64, 60], "t5": [62, 58], "t6": [60, 57], "t7": [30, 30]}
+        saved = client.post("/api/save_run", json={
+            "slug": fixtures.CONVECTION_SLUG,
+            "formData": {**fixtures.STUDENT, "columns": columns},
+        }).json
+        self.assertTrue(saved["success"])
+        calc = client.post("/api/calculate", json={"slug": fixtures.CONVECTION_SLUG, "inputs": {"columns": columns}}).json
+        with app.app_context():
+            stored = db.session.get(StudentRun, saved["id"]).results["results"]["trials"]
+        self.assertEqual(stored, calc["trace"]["trials"])
+        self.assertEqual(calc["trials"][1]["h_exp"], stored[1]["h_exp"])
+
 
 if __name__ == '__main__':
     unittest.main()
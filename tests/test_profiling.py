@@ -0,0 +1,76 @@
+import pstats
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from app import profiling
+from app.profiling import profiler
+from tests import fixtures
+from tests.fixtures import make_app
+
+
+class TestRequestProfiler(unittest.TestCase):
+    def setUp(self):
+        self.app = make_app()
+        self.client = self.app.test_client()
+        self.tmpdir = tempfile.mkdtemp()
+        self.old_directory = profiler.directory
+        profiler.directory = self.tmpdir
+
+    def tearDown(self):
+        profiler.disarm()
+        profiler.directory = self.old_directory
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_captures_next_n_requests_then_disarms(self):
+        self.client.post("/admin/profiling", data={"rule": "/api/simulate", "count": "2"})
+        self.assertEqual(profiler.status()["count"], 2)
+
+        self.client.get("/")
+        self.client.post("/api/simulate", json={"slug": "natural-convection-vertical-tube"})
+        self.assertEqual(profiler.status()["done"], 1)
+        self.client.post("/api/simulate", json={"slug": "natural-convection-vertical-tube"})
+        self.assertIsNone(profiler.status())
+
+        captures = profiler.captures()
+        self.assertEqual(len(captures), 1)
+        self.assertEqual(captures[0]["rule"], "/api/simulate")
+        self.assertEqual(captures[0]["requests"], 2)
+
+        stats_path = profiler.capture_path(captures[0]["id"], "pstats")
+        names = {func[2] for func in pstats.Stats(stats_path).stats}
+        self.assertIn("simulate", names)
+
+        response = self.client.get(f"/admin/profiling/{captures[0]['id']}.collapsed")
+        self.assertEqual(response.status_code, 200)
+        for line in response.data.decode().splitlines():
+            stack, _, hits = line.rpartition(" ")
+            self.assertTrue(stack)
+            self.assertTrue(hits.isdigit())
+        response.close()
+
+    def test_pooled_calculations_are_profiled(self):
+        self.client.post("/admin/profiling", data={"rule": "/api/calculate", "count": "1"})
+        inputs = fixtures.convection_inputs(200)
+        # Sampled often enough to catch a calculation that only takes a few milliseconds.
+        with mock.patch.object(profiling, "SAMPLE_INTERVAL", 0.0002):
+            self.client.post("/api/calculate", json={"slug": fixtures.CONVECTION_SLUG, "inputs": inputs})
+        capture_id = profiler.captures()[0]["id"]
+
+        names = {func[2] for func in pstats.Stats(profiler.capture_path(capture_id, "pstats")).stats}
+        self.assertIn("calculate_natural_convection", names)
+        self.assertIn("compute_trials", names)
+        with open(profiler.capture_path(capture_id, "collapsed"), encoding="utf-8") as fh:
+            collapsed = fh.read()
+        self.assertIn("calculate_natural_convection", collapsed)
+
+    def test_rejects_unknown_rule_and_bad_download(self):
+        self.client.post("/admin/profiling", data={"rule": "/nope", "count": "2"})
+        self.assertIsNone(profiler.status())
+        self.assertEqual(self.client.get("/admin/profiling/..-secret.pstats").status_code, 404)
+        self.assertEqual(self.client.get("/admin/profiling").status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import json
+import unittest
+
+from app import run_results
+from app.extensions import db
+from app.models import Experiment, StudentRun
+from app.utils import calculate_experiment
+from tests import fixtures
+from tests.fixtures import make_app
+
+
+CASES = [
+    (fixtures.THERM_SLUG, fixtures.THERM_INPUTS),
+    (fixtures.CONVECTION_SLUG, fixtures.convection_inputs(10)),
+    (fixtures.FORMULA_SLUG, {"runs": fixtures.formula_runs(3)}),
+]
+
+
+class TestSlimStorage(unittest.TestCase):
+    def setUp(self):
+        self.app = make_app()
+        self.client = self.app.test_client()
+
+    def save(self, slug, form):
+        res = self.client.post("/api/save_run", json={"slug": slug, "formData": {**fixtures.STUDENT, **form}})
+        self.assertTrue(res.json["success"])
+        return res.json["id"]
+
+    def stored(self, run_id):
+        with self.app.app_context():
+            run = db.session.get(StudentRun, run_id)
+            return run.results, run.experiment_version_id
+
+    def test_slim_runs_recalculate_to_the_full_results(self):
+        for slug, form in CASES:
+            with self.subTest(slug=slug):
+                self.app.config["RUN_STORAGE"] = "full"
+                full_id = self.save(slug, form)
+                self.app.config["RUN_STORAGE"] = "slim"
+                slim_id = self.save(slug, form)
+
+                full, version = self.stored(full_id)
+                slim, slim_version = self.stored(slim_id)
+                self.assertTrue(slim["slim"])
+                self.assertEqual(slim_version, version)
+                self.assertLess(len(json.dumps(slim)) * 5, len(json.dumps(full)))
+
+                exported = self.client.get(f"/admin/runs/{slim_id}/export").json["results"]
+                self.assertTrue(exported.pop("recalculated"))
+                self.assertEqual(exported.pop("version"), 1)
+                self.assertEqual(exported, full)
+
+    def test_slim_natural_convection_keeps_trial_scalars(self):
+        self.app.config["RUN_STORAGE"] = "slim"
+        form = fixtures.convection_inputs(3)
+        run_id = self.save(fixtures.CONVECTION_SLUG, form)
+        stored, _ = self.stored(run_id)
+        calc = self.client.post("/api/calculate", json={"slug": fixtures.CONVECTION_SLUG, "inputs": form})
+        overall = calc.json["final_results"]["optional_overall"]
+        with self.app.app_context():
+            trials = calculate_experiment(fixtures.CONVECTION_SLUG, form)["results"]["trials"]
+        self.assertEqual(stored["results"]["trials"], [
+            {"trial": t.trial, "h_exp": t.h_exp, "h_theoretical": t.h_theoretical, "nu_nusselt": t.nu_nusselt}
+            for t in trials
+        ])
+        self.assertIsNotNone(stored["results"]["mean_h_exp"])
+        self.assertAlmostEqual(stored["results"]["mean_h_exp"], overall["mean_h_exp"])
+        self.assertAlmostEqual(stored["results"]["mean_h_theoretical"], overall["mean_h_theoretical"])
+
+    def test_recalculation_uses_the_runs_snapshot(self):
+        self.app.config["RUN_STORAGE"] = "slim"
+        run_id = self.save(fixtures.FORMULA_SLUG, {"runs": fixtures.formula_runs(2)})
+        before = self.client.get(f"/admin/runs/{run_id}/export").json["results"]
+        self.assertEqual(len(run_results.cache), 1)
+        self.client.get(f"/admin/runs/{run_id}")
+        self.assertEqual(len(run_results.cache), 1)
+
+        with self.app.app_context():
+            exp = Experiment.query.filter_by(slug=fixtures.FORMULA_SLUG).first()
+            constants = {**exp.content["constants"], "d_tube": {"value": 0.05, "unit": "m"}}
+            exp.content = {**exp.content, "constants": constants}
+            db.session.commit()
+            self.assertEqual(exp.version, 2)
+            run = db.session.get(StudentRun, run_id)
+            current = calculate_experiment(fixtures.FORMULA_SLUG, run.inputs)
+            self.assertNotEqual(self.app.json.loads(self.app.json.dumps(current["results"])), before["results"])
+        run_results.cache.invalidate()
+        self.assertEqual(self.client.get(f"/admin/runs/{run_id}/export").json["results"], before)
+        page = self.client.get(f"/admin/runs/{run_id}")
+        self.assertIn(b"Calculated with version 1", page.data)
+
+
+if __name__ == "__main__":
+    unittest.main()
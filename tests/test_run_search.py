@@ -0,0 +1,77 @@
+import tempfile
+import unittest
+from datetime import datetime
+
+from app.archive import archive_runs
+from app.extensions import db
+from app.models import Experiment, StudentRun
+from app.run_search import fts_available, search
+from tests import fixtures
+from tests.fixtures import make_app
+
+
+class TestRunSearch(unittest.TestCase):
+    def setUp(self):
+        self.app = make_app()
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            self.assertTrue(fts_available(db.engine))
+            exp = Experiment.query.filter_by(slug=fixtures.THERM_SLUG).first()
+            for name, usn in [("John Kumar", "1RV21ME001"), ("Priya Sharma", "1RV21ME002"), ("Johnny Rao", "1RV22ME003")]:
+                db.session.add(StudentRun(experiment_id=exp.id, student_name=name, usn=usn, inputs={}, results={}))
+            db.session.commit()
+
+    def names(self, text, mode="prefix"):
+        with self.app.app_context():
+            return [run["student_name"] for run in search(text, mode)]
+
+    def test_prefix_matches_words_newest_first(self):
+        self.assertEqual(self.names("joh"), ["Johnny Rao", "John Kumar"])
+        self.assertEqual(self.names("john kum"), ["John Kumar"])
+        self.assertEqual(self.names("1rv22"), ["Johnny Rao"])
+        self.assertEqual(self.names("thermal sharma"), ["Priya Sharma"])
+        self.assertEqual(self.names('"); DROP'), [])
+        self.assertEqual(self.names("  "), [])
+
+    def test_fuzzy_tolerates_typos(self):
+        self.assertEqual(self.names("shrama"), [])
+        self.assertEqual(self.names("shrama", "fuzzy"), ["Priya Sharma"])
+        self.assertIn("John Kumar", self.names("jhon", "fuzzy"))
+
+    def test_index_follows_edits(self):
+        with self.app.app_context():
+            run = StudentRun.query.filter_by(usn="1RV21ME002").first()
+            run.student_name = "Priya Menon"
+            exp = Experiment.query.filter_by(slug=fixtures.THERM_SLUG).first()
+            exp.title = "Heat Conduction"
+            db.session.commit()
+            db.session.delete(StudentRun.query.filter_by(usn="1RV22ME003").first())
+            db.session.commit()
+        self.assertEqual(self.names("sharma"), [])
+        self.assertEqual(self.names("menon"), ["Priya Menon"])
+        self.assertEqual(self.names("conduction"), ["Priya Menon", "John Kumar"])
+        self.assertEqual(self.names("johnny"), [])
+
+    def test_archived_runs_stay_searchable(self):
+        with self.app.app_context():
+            self.app.config["ARCHIVE_DIR"] = tempfile.mkdtemp()
+            StudentRun.query.filter_by(usn="1RV21ME001").update({"date": datetime(2023, 3, 1)})
+            db.session.commit()
+            self.assertEqual(archive_runs(datetime(2024, 1, 1)), 1)
+            self.assertEqual([(run["usn"], run["archived"]) for run in search("joh")],
+                             [("1RV22ME003", False), ("1RV21ME001", True)])
+            Experiment.query.filter_by(slug=fixtures.THERM_SLUG).first().title = "Heat Conduction"
+            db.session.commit()
+        self.assertEqual(self.names("conduction kumar"), ["John Kumar"])
+        res = self.client.get("/admin/runs/search?q=kumar&format=json")
+        self.assertTrue(res.json["runs"][0]["archived"])
+
+    def test_endpoint(self):
+        res = self.client.get("/admin/runs/search?q=1rv21&format=json")
+        self.assertEqual([run["usn"] for run in res.json["runs"]], ["1RV21ME002", "1RV21ME001"])
+        page = self.client.get("/admin/runs/search?q=shrama&mode=fuzzy")
+        self.assertIn(b"Priya Sharma", page.data)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from app.blueprints import api
+from app.extensions import db
+from app.models import StudentRun
+from app.streaming import hub
+from tests import fixtures
+from tests.fixtures import make_app
+
+
+def therm_run(key=None, **form):
+    item = {"slug": fixtures.THERM_SLUG, "formData": {**fixtures.STUDENT, **fixtures.THERM_INPUTS, **form}}
+    if key is not None:
+        item["idempotency_key"] = key
+    return item
+
+
+class TestSaveRuns(unittest.TestCase):
+    def setUp(self):
+        self.app = make_app()
+        self.client = self.app.test_client()
+
+    def count(self):
+        with self.app.app_context():
+            return StudentRun.query.count()
+
+    def test_single_save_is_idempotent(self):
+        before = self.count()
+        first = self.client.post("/api/save_run", json=therm_run("abc-1"))
+        again = self.client.post("/api/save_run", json=therm_run("abc-1"))
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(again.json["id"], first.json["id"])
+        self.assertTrue(again.json["duplicate"])
+        self.assertNotIn("duplicate", first.json)
+        self.assertEqual(self.count(), before + 1)
+
+    def test_batch_commits_runs_and_reports_each(self):
+        before = self.count()
+        stored = self.client.post("/api/save_run", json=therm_run("old")).json["id"]
+        res = self.client.post("/api/save_runs", json={"runs": [
+            therm_run("new-1"),
+            therm_run("old"),
+            therm_run("new-1"),
+            therm_run(),
+            {"slug": "no-such-experiment", "formData": {}, "idempotency_key": "x"},
+            therm_run("bad key!"),
+        ]})
+        self.assertEqual(res.status_code, 200)
+        results = res.json["results"]
+        self.assertTrue(results[0]["success"])
+        self.assertEqual(results[1], {"success": True, "id": stored, "duplicate": True})
+        self.assertEqual(results[2]["id"], results[0]["id"])
+        self.assertTrue(results[2]["duplicate"])
+        self.assertTrue(results[3]["success"])
+        self.assertEqual(results[4]["status"], 404)
+        self.assertEqual(results[5]["status"], 400)
+        self.assertEqual(self.count(), before + 3)
+        with self.app.app_context():
+            self.assertEqual(db.session.get(StudentRun, results[0]["id"]).idempotency_key, "new-1")
+
+    def test_key_stored_by_a_concurrent_request_is_a_duplicate(self):
+        stored = self.client.post("/api/save_run", json=therm_run("race")).json["id"]
+        lookups = [{}]
+        real = api._stored_runs
+        with mock.patch.object(api, "_stored_runs", lambda keys: lookups.pop() if lookups else real(keys)):
+            res = self.client.post("/api/save_runs", json={"runs": [therm_run("race"), therm_run("fresh")]})
+        results = res.json["results"]
+        self.assertEqual(results[0], {"success": True, "id": stored, "duplicate": True})
+        self.assertTrue(results[1]["success"])
+        self.assertNotIn("duplicate", results[1])
+
+    def test_logger_history_is_written_before_the_single_commit(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.addCleanup(hub.clear)
+        self.app.config["TIMESERIES_DIR"] = tmp.name
+        hub.ingest("rig1", np.arange(5.0), {"T1": np.arange(5.0) + 20})
+        runs = [{**therm_run(f"ts-{idx}"), "stream_id": "rig1"} for idx in range(3)]
+
+        with mock.patch.object(db.session, "commit", wraps=db.session.commit) as commit:
+            results = self.client.post("/api/save_runs", json={"runs": runs}).json["results"]
+        self.assertEqual(commit.call_count, 1)
+        self.assertTrue(all(result["timeseries"] for result in results))
+        with self.app.app_context():
+            names = [db.session.get(StudentRun, result["id"]).timeseries for result in results]
+        self.assertEqual(sorted(os.listdir(tmp.name)), sorted(names))
+
+        with mock.patch.object(db.session, "commit", side_effect=RuntimeError("disk full")):
+            res = self.client.post("/api/save_runs", json={"runs": [{**therm_run("ts-x"), "stream_id": "rig1"}]})
+        self.assertEqual(res.status_code, 500)
+        self.assertEqual(sorted(os.listdir(tmp.name)), sorted(names))
+
+    def test_batch_limits(self):
+        self.app.config["SAVE_MAX_BATCH"] = 2
+        res = self.client.post("/api/save_runs", json={"runs": [therm_run()] * 3})
+        self.assertEqual(res.status_code, 413)
+        self.assertEqual(self.client.post("/api/save_runs", json={"runs": []}).status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+
+import numpy as np
+
+from app import create_app
+from app.simulate_logger import SimulatedLogger
+from app.steady_state import RollingStats, SteadyStateDetector, steady_inputs
+from app.streaming import hub
+
+
+class TestRollingStats(unittest.TestCase):
+    def test_matches_full_recompute_over_window(self):
+        rng = np.random.default_rng(3)
+        times = 1.7e9 + np.arange(2000) * 0.1
+        values = 40 + 0.01 * np.arange(2000) + rng.normal(0, 0.2, 2000)
+        stats = RollingStats(window=30.0)
+        for t, y in zip(times, values):
+            stats.push(t, y)
+        mask = times >= times[-1] - 30.0
+        self.assertEqual(stats.n, mask.sum())
+        self.assertAlmostEqual(stats.mean, values[mask].mean(), places=9)
+        self.assertAlmostEqual(stats.variance, values[mask].var(ddof=1), places=7)
+        self.assertAlmostEqual(stats.slope, np.polyfit(times[mask] - times[mask][0], values[mask], 1)[0], places=7)
+
+
+class TestSteadyStateDetector(unittest.TestCase):
+    def test_warm_up_then_steady_snapshot(self):
+        logger = SimulatedLogger("rod", tau=20.0, noise=0.05, seed=7)
+        detector = SteadyStateDetector(window=60.0, max_drift=0.2, max_std=0.5)
+        batch = logger.batch(0.0, np.arange(0, 60, 0.5))
+        detector.update(batch["t"], batch["channels"])
+        self.assertFalse(detector.status()["steady"])
+        self.assertIsNone(detector.snapshot)
+
+        batch = logger.batch(0.0, np.arange(60, 400, 0.5))
+        detector.update(batch["t"], batch["channels"])
+        status = detector.status()
+        self.assertTrue(status["steady"])
+        self.assertAlmostEqual(status["snapshot"]["means"]["T1"], 78.0, delta=0.3)
+
+        inputs = steady_inputs("therm-conductivity-metal-rod", status["snapshot"]["means"])
+        self.assertEqual(set(inputs), {f"t{idx}" for idx in [1, 2, 3, 4, 5, 6, 7, 8, 9, 12, 13]} | {"t_wi", "t_wo"})
+        self.assertAlmostEqual(inputs["t_wi"], 26.0, delta=0.3)
+
+    def test_convection_snapshot_is_one_trial(self):
+        inputs = steady_inputs("natural-convection-vertical-tube", {"T1": 61.987, "T7": 28.0, "X": 1.0})
+        self.assertEqual(inputs, {"observations": [{"trial": 1, "t1": 61.99, "t7": 28.0}]})
+
+    def test_steady_endpoint(self):
+        app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:", "STEADY_WINDOW": 30.0})
+        client = app.test_client()
+        try:
+            batch = SimulatedLogger("convection", tau=5.0, noise=0.05, seed=2).batch(0.0, np.arange(0, 200, 0.5))
+            client.post("/api/stream/bench2/ingest", json=batch)
+            status = client.get("/api/stream/bench2/steady?slug=natural-convection-vertical-tube").json
+            self.assertTrue(status["steady"])
+            self.assertEqual(len(status["inputs"]["observations"][0]), 8)
+            self.assertTrue(client.get("/api/stream/bench2/latest").json["steady"])
+        finally:
+            hub.clear()
@@ -0,0 +1,90 @@
+import unittest
+
+import numpy as np
+
+from app import create_app
+from app.simulate_logger import SimulatedLogger
+from app.streaming import BatchTooLarge, RingBuffer, StreamError, hub, parse_batch
+
+
+class TestRingBuffer(unittest.TestCase):
+    def test_wraps_in_preallocated_storage(self):
+        ring = RingBuffer(5)
+        storage = ring.values
+        ring.extend(np.arange(3.0), np.arange(3.0) * 10)
+        ring.extend(np.arange(3.0, 7.0), np.arange(3.0, 7.0) * 10)
+        self.assertIs(ring.values, storage)
+        times, values = ring.snapshot()
+        self.assertEqual(times.tolist(), [2.0, 3.0, 4.0, 5.0, 6.0])
+        self.assertEqual(values.tolist(), [20.0, 30.0, 40.0, 50.0, 60.0])
+        self.assertEqual(ring.latest(), (6.0, 60.0))
+        ring.extend(np.arange(10.0, 22.0), np.arange(10.0, 22.0))
+        self.assertEqual(ring.snapshot(2)[0].tolist(), [20.0, 21.0])
+
+
+class TestStreamHub(unittest.TestCase):
+    def tearDown(self):
+        hub.clear()
+
+    def test_export_aligns_channels_by_time(self):
+        hub.ingest("rig", np.array([1.0, 2.0, 3.0]), {"T1": np.array([10.0, 11.0, 12.0])})
+        hub.ingest("rig", np.array([2.0, 4.0]), {"T1": np.array([21.0, 23.0]), "T2": np.array([30.0, 31.0])})
+        times, columns = hub.export("rig")
+        self.assertEqual(times.tolist(), [1.0, 2.0, 3.0, 4.0])
+        self.assertEqual(columns["T1"].tolist(), [10.0, 21.0, 12.0, 23.0])
+        self.assertTrue(np.isnan(columns["T2"][[0, 2]]).all())
+        self.assertEqual(columns["T2"][[1, 3]].tolist(), [30.0, 31.0])
+
+
+class TestParseBatch(unittest.TestCase):
+    def test_rejects_mismatched_or_oversized_batches(self):
+        times, columns = parse_batch({"t": [1, 2], "channels": {"T1": [20, 21]}}, 100)
+        self.assertEqual(columns["T1"].tolist(), [20.0, 21.0])
+        with self.assertRaises(StreamError):
+            parse_batch({"t": [1, 2], "channels": {"T1": [20]}}, 100)
+        with self.assertRaises(StreamError):
+            parse_batch({"t": [1], "channels": {"bad name": [20]}}, 100)
+        with self.assertRaises(BatchTooLarge):
+            parse_batch({"t": [1, 2], "channels": {"T1": [1, 2], "T2": [1, 2]}}, 3)
+
+
+class TestStreamEndpoints(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+            "STREAM_PUSH_INTERVAL": 0,
+            "STREAM_MAX_BATCH": 1000,
+        })
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        hub.clear()
+
+    def test_ingest_latest_and_events(self):
+        batch = SimulatedLogger("convection", seed=1).batch(1000.0, np.arange(10) / 10)
+        resp = self.client.post("/api/stream/bench1/ingest", json=batch)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json["samples"], 10)
+
+        latest = self.client.get("/api/stream/bench1/latest").json
+        self.assertEqual(set(latest["channels"]), {f"T{idx}" for idx in range(1, 8)})
+        self.assertAlmostEqual(latest["channels"]["T1"]["t"], 1000.9)
+
+        events = self.client.get("/api/stream/bench1/events", buffered=False)
+        self.assertEqual(events.mimetype, "text/event-stream")
+        chunks = iter(events.response)
+        self.assertEqual(next(chunks), b"retry: 2000\n\n")
+        self.assertIn(b"event: reading", next(chunks))
+        events.close()
+
+    def test_errors(self):
+        self.assertEqual(self.client.get("/api/stream/nobody/latest").status_code, 404)
+        self.assertEqual(self.client.post("/api/stream/bench1/ingest", json={"t": [1]}).status_code, 400)
+        big = {"t": list(range(600)), "channels": {"T1": [0] * 600, "T2": [0] * 600}}
+        self.assertEqual(self.client.post("/api/stream/bench1/ingest", json=big).status_code, 413)
+        self.app.config["STREAM_INGEST_TOKEN"] = "secret"
+        ok = {"t": [1], "channels": {"T1": [20]}}
+        self.assertEqual(self.client.post("/api/stream/bench1/ingest", json=ok).status_code, 403)
+        resp = self.client.post("/api/stream/bench1/ingest", json=ok, headers={"X-Logger-Token": "secret"})
+        self.assertEqual(resp.status_code, 200)
@@ -0,0 +1,44 @@
+import unittest
+
+from app.texlite import tex_to_html
+from app.utils import format_theory_html
+
+
+class TestTexLite(unittest.TestCase):
+    def test_nested_fractions(self):
+        html = tex_to_html(r"Q = \frac{K_{ins} (T_i - T_o)}{\frac{\ln(r_o / r_i)}{2\pi L}}")
+        self.assertEqual(
+            html,
+            "Q = (K<sub>ins</sub> (T<sub>i</sub> - T<sub>o</sub>))/((ln(r<sub>o</sub> / r<sub>i</sub>))/(2&pi; L))",
+        )
+
+    def test_scripts_bind_single_tokens_or_groups(self):
+        self.assertEqual(tex_to_html("10^-3"), "10<sup>-</sup>3")
+        self.assertEqual(tex_to_html("10^{-3}"), "10<sup>-3</sup>")
+        self.assertEqual(tex_to_html("x^2_i"), "x<sup>2</sup><sub>i</sub>")
+        self.assertEqual(tex_to_html(r"65^\circ\text{C}"), "65<sup>&deg;</sup>C")
+
+    def test_text_accents_and_escaping(self):
+        self.assertEqual(tex_to_html(r"\dot{V}\ \text{m}^3/\text{s}"), "V&#775; m<sup>3</sup>/s")
+        self.assertEqual(tex_to_html(r"a < b \le c"), "a &lt; b &le; c")
+        self.assertEqual(tex_to_html(r"Q_{radial\_loss}"), "Q<sub>radial_loss</sub>")
+
+    def test_unbalanced_input_does_not_raise(self):
+        self.assertEqual(tex_to_html(r"\frac{1}{2"), "1/2")
+        self.assertEqual(tex_to_html("}}a{"), "a")
+
+
+class TestFormatTheoryHtml(unittest.TestCase):
+    def test_only_math_is_transformed(self):
+        html = format_theory_html("<p>x_1 stays, $x_1$ and</p>$$ \\frac{dT}{dx} $$")
+        self.assertEqual(
+            html,
+            '<p>x_1 stays, <span class="math">x<sub>1</sub></span> and</p>'
+            '<div class="math-block"><span class="math">dT/dx</span></div>',
+        )
+        self.assertIs(format_theory_html("$a$"), format_theory_html("$a$"))
+        self.assertEqual(format_theory_html(None), "")
+
+
+if __name__ == '__main__':
+    unittest.main()
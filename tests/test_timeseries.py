@@ -0,0 +1,129 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+import numpy as np
+
+from app import create_app
+from app.extensions import db
+from app.models import StudentRun
+from app.simulate_logger import SimulatedLogger
+from app.streaming import hub
+from app.timeseries import TimeSeries, TimeSeriesError, write_series
+from tests import fixtures
+from tests.fixtures import make_app
+
+
+class TestSeriesFile(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "run.lts")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip_and_window(self):
+        times = 1.7e9 + np.arange(5000) * 0.1
+        columns = {"T1": 20 + np.arange(5000) * 0.01, "T2": np.full(5000, 30.5)}
+        columns["T2"][10] = np.nan
+        size = write_series(self.path, times, columns)
+        self.assertLess(size, 64 + 3 * 5000 * 4 + 64)
+
+        with TimeSeries(self.path) as series:
+            self.assertIsInstance(series.data, np.memmap)
+            self.assertEqual(series.channels, ["T1", "T2"])
+            self.assertEqual(series.span(times[100], times[199]), (100, 200))
+            win_t, win = series.window(times[100], times[199], ["T1"])
+            np.testing.assert_allclose(win_t, times[100:200], atol=1e-3)
+            np.testing.assert_allclose(win["T1"], columns["T1"][100:200], rtol=1e-6)
+            _, thinned = series.window(max_points=100)
+            self.assertEqual(len(thinned["T2"]), 100)
+            self.assertTrue(np.isnan(thinned["T2"][0]) or thinned["T2"][0] == np.float32(30.5))
+            with self.assertRaises(TimeSeriesError):
+                series.window(channels=["T9"])
+
+    def test_rejects_other_files(self):
+        with open(self.path, "wb") as fh:
+            fh.write(b"not a series at all, definitely not")
+        with self.assertRaises(TimeSeriesError):
+            TimeSeries(self.path)
+
+    def test_out_of_order_samples_are_sorted(self):
+        write_series(self.path, [3.0, 1.0, 2.0, 0.0], {"T1": [30, 10, 20, 0]})
+        with TimeSeries(self.path) as series:
+            win_t, win = series.window(1.0, 2.0)
+        np.testing.assert_allclose(win_t, [1.0, 2.0])
+        np.testing.assert_allclose(win["T1"], [10, 20])
+        with self.assertRaises(TimeSeriesError):
+            write_series(self.path, [0.0, np.nan], {"T1": [1, 2]})
+
+    def test_truncated_data_is_a_series_error(self):
+        write_series(self.path, np.arange(100.0), {"T1": np.arange(100.0)})
+        with open(self.path, "r+b") as fh:
+            fh.truncate(os.path.getsize(self.path) - 4)
+        with self.assertRaises(TimeSeriesError):
+            TimeSeries(self.path)
+
+
+class TestRunTimeseries(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.app = make_app()
+        self.app.config["TIMESERIES_DIR"] = self.tmp.name
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        hub.clear()
+        self.tmp.cleanup()
+
+    def test_save_run_keeps_logger_history(self):
+        batch = SimulatedLogger("rod", seed=4).batch(1000.0, np.arange(0, 30, 0.5))
+        self.client.post("/api/stream/bench9/ingest", json=batch)
+        form = {**fixtures.STUDENT, **fixtures.THERM_INPUTS, "slug": fixtures.THERM_SLUG}
+        saved = self.client.post("/api/save_run", json={"slug": fixtures.THERM_SLUG, "formData": form, "stream_id": "bench9"}).json
+        self.assertTrue(saved["success"])
+        self.assertTrue(saved["timeseries"])
+        with self.app.app_context():
+            self.assertEqual(db.session.get(StudentRun, saved["id"]).timeseries, f"run-{saved['id']}.lts")
+
+        window = self.client.get(f"/api/runs/{saved['id']}/timeseries?start=1010&end=1014.9&channels=T1,T10").json
+        self.assertEqual(len(window["t"]), 10)
+        self.assertEqual(set(window["channels"]), {"T1", "T10"})
+
+    def test_upload_replaces_series(self):
+        form = {**fixtures.STUDENT, **fixtures.THERM_INPUTS, "slug": fixtures.THERM_SLUG}
+        run_id = self.client.post("/api/save_run", json={"slug": fixtures.THERM_SLUG, "formData": form}).json["id"]
+        self.assertEqual(self.client.get(f"/api/runs/{run_id}/timeseries").status_code, 404)
+        resp = self.client.post(f"/api/runs/{run_id}/timeseries", json={"t": [0, 1, 2], "channels": {"T1": [1, 2, 3]}})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(self.client.get(f"/api/runs/{run_id}/timeseries").json["channels"]["T1"], [1.0, 2.0, 3.0])
+
+
+class TestSchemaUpgrade(unittest.TestCase):
+    def test_adds_missing_columns(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "old.db")
+            conn = sqlite3.connect(path)
+            conn.execute("CREATE TABLE student_run (id INTEGER PRIMARY KEY, experiment_id INTEGER NOT NULL, "
+                         "student_name VARCHAR(64) NOT NULL, usn VARCHAR(32) NOT NULL, date DATETIME, "
+                         "inputs JSON NOT NULL, results JSON NOT NULL)")
+            conn.commit()
+            conn.close()
+            app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}", "TESTING": True})
+            with app.app_context():
+                self.assertIsNone(StudentRun.query.first())
+                db.engine.dispose()
+            conn = sqlite3.connect(path)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(student_run)")}
+            conn.close()
+            self.assertIn("timeseries", columns)
+            self.assertIn("idempotency_key", columns)
+            self.assertIn("experiment_version_id", columns)
+            conn = sqlite3.connect(path)
+            conn.execute("INSERT INTO student_run (experiment_id, student_name, usn, inputs, results, idempotency_key) "
+                         "VALUES (1, 'a', 'b', '{}', '{}', 'k1')")
+            with self.assertRaises(sqlite3.IntegrityError):
+                conn.execute("INSERT INTO student_run (experiment_id, student_name, usn, inputs, results, idempotency_key) "
+                             "VALUES (1, 'a', 'b', '{}', '{}', 'k1')")
+            conn.close()
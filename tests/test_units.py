@@ -1,6 +1,9 @@
 import math
 import unittest
 
+import numpy as np
+
+from app.units import UnitError, canonical_unit, convert, convert_many
 from app.utils import normalize_inputs
 
 
@@ -28,6 +31,45 @@ class TestUnitNormalization(unittest.TestCase):
         area = math.pi * norm["d_rod"] ** 2 / 4
         self.assertAlmostEqual(area, 9.62e-4, delta=1e-6)
 
+    def test_mm_lengths_and_kj_cp(self):
+        inputs = {
+            "flow_rate_value": 0.12,
+            "flow_rate_unit": "kg/min",
+            "cpw": 4.18,
+            "cpw_unit": "kJ/kg-K",
+            "l1": 60,
+            "l1_unit": "millimetres",
+            "dx": 0.06,
+        }
+        norm = normalize_inputs(inputs, {})["normalized"]
+        self.assertAlmostEqual(norm["m_dot"], 0.002)
+        self.assertAlmostEqual(norm["flow_lmin"], 0.12)
+        self.assertAlmostEqual(norm["cpw"], 4180.0)
+        self.assertAlmostEqual(norm["l1"], 0.06)
+        self.assertAlmostEqual(norm["dx"], 0.06)
+
+    def test_unknown_flow_unit_warns_and_assumes_lmin(self):
+        data = normalize_inputs({"flow_rate_value": 0.15, "flow_rate_unit": "gal/min"}, {})
+        self.assertEqual(data["raw_inputs"]["flow_rate_unit"], "gal/min")
+        self.assertAlmostEqual(data["normalized"]["m_dot"], 2.5e-3)
+        self.assertTrue(any("gal/min" in w for w in data["warnings"]))
+
+
+class TestUnitRegistry(unittest.TestCase):
+    def test_aliases_and_conversions(self):
+        self.assertEqual(canonical_unit(" Litres/Min ", "L/min"), "L/min")
+        self.assertEqual(canonical_unit("", "m"), "m")
+        self.assertEqual(canonical_unit("furlong", "m"), "furlong")
+        self.assertAlmostEqual(convert(100, "C", "K"), 373.15)
+        self.assertAlmostEqual(convert(212, "F", "C"), 100.0)
+        self.assertAlmostEqual(convert(1, "L/min", "mL/min"), 1000.0)
+        with self.assertRaises(UnitError):
+            convert(1, "m", "kg/s")
+
+    def test_convert_many_leaves_unknown_units_unscaled(self):
+        out = convert_many([35, 1.2, 0.5, 7], ["mm", "cm", "m", "kg/s"], "length")
+        np.testing.assert_allclose(out, [0.035, 0.012, 0.5, 7.0])
+
 
 if __name__ == '__main__':
     unittest.main()
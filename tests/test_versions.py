@@ -0,0 +1,118 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from sqlalchemy.exc import IntegrityError
+
+from app import create_app
+from app.extensions import db
+from app.models import Experiment, ExperimentVersion, StudentRun
+from app.versions import ExperimentInUse, ImmutableVersion
+from tests import fixtures
+from tests.fixtures import make_app
+
+
+class TestExperimentVersions(unittest.TestCase):
+    def setUp(self):
+        self.app = make_app()
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        self.exp = Experiment.query.filter_by(slug=fixtures.THERM_SLUG).first()
+
+    def tearDown(self):
+        db.session.remove()
+        self.ctx.pop()
+
+    def test_each_content_edit_is_a_new_snapshot(self):
+        self.assertEqual(self.exp.version, 1)
+        first_key = self.exp.cache_key
+        original = self.exp.content
+
+        self.exp.title = "Renamed"
+        self.exp.content = dict(original)
+        db.session.commit()
+        self.assertEqual(self.exp.version, 1)
+
+        self.exp.content = {**original, "aim": "Edited"}
+        db.session.commit()
+        self.assertEqual(self.exp.version, 2)
+        self.assertNotEqual(self.exp.cache_key, first_key)
+        snapshots = self.exp.versions.all()
+        self.assertEqual([snap.version for snap in snapshots], [1, 2])
+        self.assertEqual(snapshots[0].content, original)
+        self.assertEqual(snapshots[1].content_hash, self.exp.content_hash)
+
+        snapshots[0].content = {"aim": "rewritten"}
+        with self.assertRaises(ImmutableVersion):
+            db.session.commit()
+        db.session.rollback()
+
+    def test_runs_reference_their_snapshot(self):
+        form = {**fixtures.STUDENT, **fixtures.THERM_INPUTS}
+        first = self.client.post("/api/save_run", json={"slug": fixtures.THERM_SLUG, "formData": form}).json["id"]
+        self.exp.content = {**self.exp.content, "aim": "Edited"}
+        db.session.commit()
+        second = self.client.post("/api/save_run", json={"slug": fixtures.THERM_SLUG, "formData": form}).json["id"]
+        versions = [db.session.get(ExperimentVersion, db.session.get(StudentRun, run_id).experiment_version_id).version
+                    for run_id in (first, second)]
+        self.assertEqual(versions, [1, 2])
+
+    def test_experiments_in_use_cannot_be_deleted(self):
+        db.session.delete(self.exp)
+        with self.assertRaises(ExperimentInUse):
+            db.session.commit()
+        db.session.rollback()
+        with self.assertRaises(IntegrityError):
+            Experiment.query.filter_by(slug=fixtures.FORMULA_SLUG).delete()
+        db.session.rollback()
+        self.assertEqual({snap.experiment_id for snap in ExperimentVersion.query}, {1, 2, 3})
+
+
+class TestVersionBackfill(unittest.TestCase):
+    def test_existing_experiments_get_a_first_snapshot(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "old.db")
+            conn = sqlite3.connect(path)
+            conn.execute("CREATE TABLE experiment (id INTEGER PRIMARY KEY, slug VARCHAR(64) NOT NULL UNIQUE, "
+                         "title VARCHAR(128) NOT NULL, content JSON NOT NULL)")
+            conn.execute("INSERT INTO experiment (slug, title, content) VALUES ('old', 'Old', '{\"aim\": \"x\"}')")
+            conn.commit()
+            conn.close()
+            app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}", "TESTING": True})
+            with app.app_context():
+                exp = Experiment.query.one()
+                self.assertEqual((exp.version, [snap.content for snap in exp.versions]), (1, [{"aim": "x"}]))
+                self.assertIsNotNone(exp.content_hash)
+                db.engine.dispose()
+
+    def test_content_hashes_fold_into_snapshot_ids(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "runs.db")
+            uri = f"sqlite:///{path}"
+            app = create_app({"SQLALCHEMY_DATABASE_URI": uri, "TESTING": True})
+            with app.app_context():
+                db.session.add(Experiment(slug="old", title="Old", content={"aim": "x"}))
+                db.session.commit()
+                exp = Experiment.query.one()
+                digest, snapshot = exp.content_hash, exp.versions.one().id
+                db.engine.dispose()
+            conn = sqlite3.connect(path)
+            conn.execute("ALTER TABLE student_run ADD COLUMN content_version VARCHAR(16)")
+            for usn, version in [("1RV21ME001", digest), ("1RV21ME002", "0123456789abcdef")]:
+                conn.execute("INSERT INTO student_run (experiment_id, student_name, usn, inputs, results, "
+                             "content_version) VALUES (1, 'a', ?, '{}', '{}', ?)", (usn, version))
+            conn.commit()
+            conn.close()
+            app = create_app({"SQLALCHEMY_DATABASE_URI": uri, "TESTING": True})
+            with app.app_context():
+                runs = StudentRun.query.order_by(StudentRun.usn).all()
+                self.assertEqual([run.experiment_version_id for run in runs], [snapshot, None])
+                columns = {col["name"] for col in db.inspect(db.engine).get_columns("student_run")}
+                self.assertNotIn("content_version", columns)
+                db.engine.dispose()
+
+
+if __name__ == "__main__":
+    unittest.main()